@@ -2,9 +2,10 @@ from flask import Flask
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 from datetime import timedelta
-from config import JWT_SECRET_KEY
+from config import JWT_SECRET_KEY, CORS_ORIGINS
 from routes.auth import auth_bp
 from routes.interview import interview_bp
+from routes.interview_socket import sock
 from routes.organization import organization_bp
 from routes.mock_interview import mock_interview_bp
 from routes.candidate_route import candidate_bp
@@ -12,6 +13,8 @@ from routes.pricing_routes import pricing_bp
 from routes.admin import admin_bp
 from routes.prompts_routes import prompts_bp
 from routes.resume_screening import resume_screening_bp
+from routes.advisory import advisory_bp
+from services.evaluation_queue import start_worker
 
 app = Flask(__name__)
 app.config["JWT_SECRET_KEY"] = JWT_SECRET_KEY
@@ -19,11 +22,12 @@ app.config["JWT_ACCESS_TOKEN_EXPIRES"] = timedelta(hours=24)
 
 CORS(
     app,
-    resources={r"/*": {"origins": ["https://interview.onewebmart.com", "http://localhost:5173"]}},
+    resources={r"/*": {"origins": CORS_ORIGINS}},
     supports_credentials=True
 )
 
 jwt = JWTManager(app)
+sock.init_app(app)
 
 @jwt.unauthorized_loader
 def unauthorized_callback(reason):
@@ -42,6 +46,10 @@ app.register_blueprint(pricing_bp, url_prefix="/pricing-api")
 app.register_blueprint(admin_bp, url_prefix="/admin")
 app.register_blueprint(prompts_bp, url_prefix="/prompts-api")
 app.register_blueprint(resume_screening_bp, url_prefix="/api")
+app.register_blueprint(advisory_bp, url_prefix="/advisory")
+
+# Interview evaluations run in a background thread of every worker
+start_worker()
 
 if __name__ == "__main__":
     app.run(debug=True, port=5003)
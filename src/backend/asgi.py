@@ -0,0 +1,327 @@
+"""
+ASGI Entry Point
+================
+Async serving mode: one process keeps hundreds of interviews waiting on
+Gemini without a thread each.
+
+    uvicorn asgi:app --host 0.0.0.0 --port 5000
+
+The routes that wait on the model are served natively with the async
+Gemini client (services/ai_engine_db "Async turns", run_analysis_async):
+
+  POST /interview/next-question
+  POST /interview/next-question/stream
+  WS   /interview/ws
+  POST /api/resumes/analyze
+
+Every other route is the unchanged Flask app (app.py), wrapped with
+a2wsgi on ASGI_WSGI_THREADS threads. Request/response bodies, JWT
+handling and WebSocket frames are the same as in routes/interview.py,
+routes/interview_socket.py and routes/resume_screening.py, so clients
+do not change. The gunicorn entry point (app:app) keeps working.
+"""
+
+import asyncio
+import json
+
+from a2wsgi import WSGIMiddleware
+from bson import ObjectId
+from flask_jwt_extended import decode_token
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Mount, Route, WebSocketRoute
+from starlette.websockets import WebSocketDisconnect
+
+from app import app as flask_app
+from config import CORS_ORIGINS, ASGI_WSGI_THREADS, screening_jobs_collection
+from routes.interview import queue_evaluation
+from routes.interview_socket import server_error_frame
+from services.ai_engine_db import (
+    TurnConflictError,
+    create_session_async,
+    load_owned_session,
+    next_question_async,
+    next_question_stream_async
+)
+from services import llm_guard
+from services import proctoring
+from services.async_runtime import run_blocking
+from services.resume_orchestrator import run_analysis_async
+
+
+def _decode_identity(token):
+    with flask_app.app_context():
+        return decode_token(token)["sub"]
+
+
+def _identity(request):
+    """JWT identity of a request (Authorization: Bearer ...), or None."""
+    header = request.headers.get("Authorization", "")
+    if not header.startswith("Bearer "):
+        return None
+    try:
+        return _decode_identity(header[len("Bearer "):])
+    except Exception:
+        return None
+
+
+def _unauthorized():
+    return JSONResponse({"error": "Missing or invalid token"}, status_code=401)
+
+
+async def _json_body(request):
+    try:
+        return await request.json()
+    except ValueError:
+        return {}
+
+
+# ─── Interview ───────────────────────────────────────────────────────────────
+
+async def next_question_route(request):
+    if not _identity(request):
+        return _unauthorized()
+    data = await _json_body(request)
+
+    session_id = data.get("session_id")
+    answer = data.get("answer")
+    if not session_id or not answer:
+        return JSONResponse({"error": "Invalid request"}, status_code=400)
+
+    try:
+        q = await next_question_async(session_id, answer, data.get("timeRemaining"), data.get("scheduledInterviewId"),
+                                      turn_index=data.get("turn_index"), idempotency_key=data.get("idempotency_key"))
+    except TurnConflictError as e:
+        return JSONResponse({"error": str(e)}, status_code=409)
+    except llm_guard.LLMUnavailableError as e:
+        return JSONResponse({"error": str(e)}, status_code=503)
+    return JSONResponse({"question": q})
+
+
+async def next_question_stream_route(request):
+    """Same as /next-question, but streams the question as server-sent events."""
+    if not _identity(request):
+        return _unauthorized()
+    data = await _json_body(request)
+
+    session_id = data.get("session_id")
+    answer = data.get("answer")
+    if not session_id or not answer:
+        return JSONResponse({"error": "Invalid request"}, status_code=400)
+
+    async def events():
+        async for event in next_question_stream_async(
+            session_id, answer, data.get("timeRemaining"), data.get("scheduledInterviewId"),
+            turn_index=data.get("turn_index"), idempotency_key=data.get("idempotency_key")
+        ):
+            yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+async def _send(ws, payload):
+    await ws.send_text(json.dumps(payload, default=str))
+
+
+async def _authenticate_socket(ws):
+    """Return the JWT identity for the connection, or None after reporting the error."""
+    try:
+        frame = json.loads(await asyncio.wait_for(ws.receive_text(), timeout=10) or "{}")
+    except (ValueError, asyncio.TimeoutError):
+        frame = {}
+    token = frame.get("token") if frame.get("type") == "auth" else None
+
+    if not token:
+        await _send(ws, {"type": "error", "error": "Missing or invalid token"})
+        return None
+    try:
+        return _decode_identity(token)
+    except Exception as e:
+        print(f"WebSocket authentication failed: {e}")
+        await _send(ws, {"type": "error", "error": "Missing or invalid token"})
+        return None
+
+
+async def interview_socket(ws):
+    """Async twin of routes/interview_socket.py (same frames, see its docstring)."""
+    await ws.accept()
+    current_user = await _authenticate_socket(ws)
+    if not current_user:
+        await ws.close()
+        return
+    await _send(ws, {"type": "ready"})
+    print(f"🔌 Interview WebSocket opened for {current_user} (async)")
+
+    state = {"session_id": None, "scheduledInterviewId": None, "credentialId": None, "timeRemaining": None}
+    hot = {}  # session document and chat kept for the life of the connection
+
+    try:
+        while True:
+            raw = await ws.receive_text()
+            try:
+                message = json.loads(raw)
+            except ValueError:
+                await _send(ws, {"type": "error", "error": "Invalid JSON"})
+                continue
+
+            kind = message.get("type")
+
+            if kind == "ping":
+                await _send(ws, {"type": "pong"})
+
+            elif kind == "tick":
+                state["timeRemaining"] = message.get("timeRemaining")
+
+            elif kind == "start":
+                config = message.get("config") or {}
+                session_id, first_q = await create_session_async(config, candidate_id=current_user)
+                state.update(
+                    session_id=session_id,
+                    scheduledInterviewId=config.get("scheduledInterviewId"),
+                    credentialId=config.get("credentialId")
+                )
+                hot.clear()
+                await _send(ws, {"type": "question", "session_id": session_id, "question": first_q, "turn": 0})
+
+            elif kind == "resume":
+                # Only the candidate who started the interview may take it over
+                session_doc, chat = await run_blocking(load_owned_session, message.get("session_id"), current_user)
+                if not session_doc:
+                    await _send(ws, {"type": "error", "error": "Session expired or invalid. Please restart the interview."})
+                    continue
+                state.update(
+                    session_id=session_doc["_id"],
+                    scheduledInterviewId=message.get("scheduledInterviewId"),
+                    credentialId=message.get("credentialId")
+                )
+                hot.update(session=session_doc, chat=chat)
+                await _send(ws, {
+                    "type": "question",
+                    "session_id": session_doc["_id"],
+                    "question": session_doc["questions"][-1],
+                    "turn": session_doc.get("turn_count", 0)
+                })
+
+            elif kind == "answer":
+                if not state["session_id"] or not message.get("answer"):
+                    await _send(ws, {"type": "error", "error": "Invalid request"})
+                    continue
+                timeRemaining = message.get("timeRemaining", state["timeRemaining"])
+                async for event in next_question_stream_async(
+                    state["session_id"],
+                    message["answer"],
+                    timeRemaining,
+                    state["scheduledInterviewId"],
+                    hot=hot,
+                    turn_index=message.get("turn_index"),
+                    idempotency_key=message.get("idempotency_key")
+                ):
+                    if event["type"] == "done":
+                        await _send(ws, {
+                            "type": "question",
+                            "session_id": state["session_id"],
+                            "question": event["question"],
+                            "turn": event["turn"]
+                        })
+                    else:
+                        await _send(ws, event)
+
+            elif kind == "violation":
+                if state["session_id"]:
+                    accepted = await run_blocking(proctoring.ingest, state["session_id"], current_user,
+                                                  message.get("violations") or [message.get("violation")],
+                                                  state["scheduledInterviewId"])
+                    if accepted is None:
+                        # Violation frames get no reply: an error would fail the answer in flight
+                        print(f"Proctoring events for session {state['session_id']} refused for {current_user}")
+
+            elif kind == "end":
+                if not state["session_id"]:
+                    await _send(ws, {"type": "error", "error": "Session ID required"})
+                    continue
+                job_id = await run_blocking(
+                    queue_evaluation,
+                    current_user,
+                    state["session_id"],
+                    state["scheduledInterviewId"],
+                    state["credentialId"]
+                )
+                if not job_id:
+                    await _send(ws, {"type": "error", "error": "Session not found"})
+                    continue
+                await _send(ws, {"type": "queued", "job_id": job_id, "session_id": state["session_id"]})
+                await ws.close()
+                break
+
+            else:
+                await _send(ws, {"type": "error", "error": f"Unknown message type: {kind}"})
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        print(f"Interview WebSocket error for {current_user}: {e}")
+        try:
+            await _send(ws, server_error_frame(e))
+            await ws.close()
+        except (WebSocketDisconnect, RuntimeError):
+            pass
+
+    print(f"🔌 Interview WebSocket closed for {current_user} (session {state['session_id']})")
+
+
+# ─── Resume screening ────────────────────────────────────────────────────────
+
+async def analyze_resumes_route(request):
+    """Async twin of POST /api/resumes/analyze (same body and responses)."""
+    user_id = _identity(request)
+    if not user_id:
+        return _unauthorized()
+    data = await _json_body(request)
+    job_id = data.get("jobId")
+
+    if not job_id:
+        return JSONResponse({"error": "jobId is required"}, status_code=400)
+
+    try:
+        result = await run_analysis_async(job_id, user_id)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    except Exception as e:
+        # Mark job as failed on unexpected errors
+        try:
+            await run_blocking(
+                screening_jobs_collection.update_one,
+                {"_id": ObjectId(job_id)},
+                {"$set": {"status": "failed", "error": str(e)}}
+            )
+        except Exception:
+            pass
+        return JSONResponse({"error": f"Analysis failed: {str(e)}"}, status_code=500)
+
+    return JSONResponse({
+        "message": "Analysis complete",
+        "total": result["total"],
+        "completed": result["completed"],
+        "failed": result["failed"],
+        "results": result["results"]
+    })
+
+
+app = Starlette(
+    routes=[
+        Route("/interview/next-question", next_question_route, methods=["POST"]),
+        Route("/interview/next-question/stream", next_question_stream_route, methods=["POST"]),
+        WebSocketRoute("/interview/ws", interview_socket),
+        Route("/api/resumes/analyze", analyze_resumes_route, methods=["POST"]),
+        # Everything else: the Flask app, unchanged
+        Mount("/", app=WSGIMiddleware(flask_app, workers=ASGI_WSGI_THREADS)),
+    ],
+    # Answers preflights itself; on wrapped Flask responses it replaces Flask-CORS's headers
+    middleware=[Middleware(CORSMiddleware, allow_origins=CORS_ORIGINS, allow_credentials=True,
+                           allow_methods=["*"], allow_headers=["*"])]
+)
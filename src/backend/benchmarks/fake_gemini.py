@@ -0,0 +1,187 @@
+"""
+Fake Gemini Backend
+===================
+A local HTTP server speaking the subset of the Generative Language REST
+API the engine uses, so benchmarks can drive the real SDK code paths
+(chat history, streaming, request deadlines, count_tokens, context
+cache fallback) without network calls or token spend.
+
+  POST /v1beta/models/{model}:generateContent        scripted reply
+  POST /v1beta/models/{model}:streamGenerateContent  same reply, chunked
+  POST /v1beta/models/{model}:countTokens            chars/4 estimate
+  POST /v1beta/cachedContents                        400 (implicit caching)
+
+Replies come from a script (the recorded questions of a fixture): a
+request whose history holds n model messages gets script[n], so every
+replayed interview hears its recorded questions in order. When the
+system instruction asks for a turn-score trailer, a fixed one is
+appended. Token counts are estimated at 4 characters per token, the same
+estimate turn_protocol_bench uses without an API key.
+
+    server = FakeGemini(script, latency_ms=800, ttft_ms=300).start()
+    server.configure()   # point google.generativeai at it
+"""
+
+import json
+import threading
+import time
+from collections import Counter
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import google.generativeai as genai
+
+from services.turn_scoring import SCORE_MARKER
+
+SCORE_TRAILER = json.dumps({
+    "subject_knowledge": 3, "practical_knowledge": 3, "aptitude": 3,
+    "communication": 4, "confidence": 3, "note": "Replayed answer"
+})
+
+# Streamed replies are split into this many chunks
+STREAM_CHUNKS = 8
+
+
+def _estimate_tokens(text):
+    return max(1, len(text) // 4)
+
+
+def _texts(contents):
+    return [part.get("text", "") for content in contents or [] for part in content.get("parts", [])]
+
+
+class FakeGemini:
+    """Threaded fake Gemini server with per-method request counters."""
+
+    def __init__(self, script, latency_ms=800, ttft_ms=300, host="127.0.0.1", port=0):
+        self.script = list(script) or ["Could you tell me more about that?"]
+        self.latency_ms = latency_ms
+        self.ttft_ms = min(ttft_ms, latency_ms)
+        self.counters = Counter()
+        self.tokens = Counter()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+
+    @property
+    def endpoint(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, name="fake-gemini", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def configure(self):
+        """Send every google.generativeai call of this process to the fake server."""
+        genai.configure(api_key="fake-gemini", transport="rest", client_options={"api_endpoint": self.endpoint})
+
+    def stats(self):
+        with self._lock:
+            return {"requests": dict(self.counters), "tokens": dict(self.tokens)}
+
+    # ─── Replies ─────────────────────────────────────────────────────────────
+
+    def _reply(self, body):
+        contents = body.get("contents") or []
+        turn = sum(1 for content in contents if content.get("role") == "model")
+        text = self.script[turn % len(self.script)]
+        system = " ".join(_texts([body.get("systemInstruction") or {}]))
+        if SCORE_MARKER in system:
+            text = f"{text}\n{SCORE_MARKER}\n{SCORE_TRAILER}"
+
+        prompt_tokens = _estimate_tokens(system + "".join(_texts(contents)))
+        output_tokens = _estimate_tokens(text)
+        with self._lock:
+            self.tokens["prompt"] += prompt_tokens
+            self.tokens["output"] += output_tokens
+        return text, {
+            "promptTokenCount": prompt_tokens,
+            "candidatesTokenCount": output_tokens,
+            "totalTokenCount": prompt_tokens + output_tokens
+        }
+
+    @staticmethod
+    def _response(text, usage=None, finished=True):
+        response = {"candidates": [{
+            "content": {"role": "model", "parts": [{"text": text}]},
+            "index": 0,
+            **({"finishReason": "STOP"} if finished else {})
+        }]}
+        if usage:
+            response["usageMetadata"] = usage
+        return response
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send_json(self, status, payload):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _write_chunk(self, text):
+                data = text.encode("utf-8")
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+                self.wfile.flush()
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"{}")
+                path = self.path.split("?")[0]
+                method = path.rsplit(":", 1)[-1] if ":" in path else path.rsplit("/", 1)[-1]
+                with fake._lock:
+                    fake.counters[method] += 1
+
+                if method == "cachedContents":
+                    # Explicit caching "unavailable": prompt_cache falls back to implicit caching
+                    self._send_json(400, {"error": {"code": 400, "status": "INVALID_ARGUMENT",
+                                                    "message": "Context caching is not simulated"}})
+                elif method == "countTokens":
+                    request = body.get("generateContentRequest") or body
+                    text = " ".join(_texts([request.get("systemInstruction") or {}]) + _texts(request.get("contents")))
+                    self._send_json(200, {"totalTokens": _estimate_tokens(text)})
+                elif method == "generateContent":
+                    text, usage = fake._reply(body)
+                    time.sleep(fake.latency_ms / 1000)
+                    self._send_json(200, fake._response(text, usage))
+                elif method == "streamGenerateContent":
+                    self._stream(*fake._reply(body))
+                else:
+                    self._send_json(404, {"error": {"code": 404, "status": "NOT_FOUND", "message": path}})
+
+            def _stream(self, text, usage):
+                # A JSON array of partial responses, written as the chunks are "generated"
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+
+                size = max(1, -(-len(text) // STREAM_CHUNKS))
+                pieces = [text[i:i + size] for i in range(0, len(text), size)] or [""]
+                gap = (fake.latency_ms - fake.ttft_ms) / 1000 / max(1, len(pieces) - 1)
+                time.sleep(fake.ttft_ms / 1000)
+                self._write_chunk("[")
+                for i, piece in enumerate(pieces):
+                    last = i == len(pieces) - 1
+                    if i:
+                        time.sleep(gap)
+                        self._write_chunk(",")
+                    self._write_chunk(json.dumps(fake._response(piece, usage if last else None, finished=last)))
+                self._write_chunk("]")
+                self.wfile.write(b"0\r\n\r\n")
+                self.wfile.flush()
+
+        return Handler
@@ -0,0 +1,356 @@
+"""
+Interview Replay Benchmark
+==========================
+Records real interview sessions into fixtures and replays them against
+the interview engine (services/ai_engine_db) at a chosen concurrency,
+with Gemini replaced by a local fake server (benchmarks/fake_gemini).
+Use it to see how a change to the engine or to the seeded prompts moves
+latency, tokens and MongoDB load.
+
+Record a session (live, or closed and not yet evaluated) from the
+configured database into a fixture:
+
+    python -m benchmarks.replay_bench record <session_id> [-o fixtures/name.json]
+
+Replay a fixture:
+
+    python -m benchmarks.replay_bench replay [fixture.json] --sessions 20 --concurrency 5
+
+Each replayed interview runs create_session and then every recorded
+answer through next_question (next_question_stream with --stream),
+waiting `answer_delay_ms * --think-scale` between turns. The fake backend
+answers with the recorded questions after --latency-ms (first streamed
+chunk after --ttft-ms).
+
+Replays write to the MONGO_DB_NAME database (default ai_interview_bench
+here), which must hold the prompt set under test:
+
+    MONGO_DB_NAME=ai_interview_bench python seed_prompts.py
+
+Replayed sessions are deleted afterwards.
+
+Reports:
+  - turn latency p50/p95/p99/max (and time to first token when streaming)
+  - prompt, cached and output tokens per turn (the sessions' usage records)
+  - bytes written to interview_sessions, per session and per turn
+  - MongoDB commands per turn, by command, counted on the thread that ran
+    the turn; commands of background threads (token ledger flushes,
+    prefetch, write-behind) are reported per turn separately
+  - requests received by the fake Gemini backend
+
+Fixtures use the format of fixtures/interview_accountant_20_turns.json
+(also read by turn_protocol_bench). `--json` saves the report for
+comparing runs.
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import bson
+from pymongo import monitoring
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "interview_accountant_20_turns.json")
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+SESSIONS_COLLECTION = "interview_sessions"
+WRITE_COMMANDS = {"insert", "update", "findAndModify", "delete"}
+ANONYMISED_NAME = "Candidate A"
+
+
+# ─── MongoDB command accounting ──────────────────────────────────────────────
+#
+# The listener must be registered before config.py creates the MongoClient,
+# so engine modules are imported inside the commands below.
+
+class CommandCounter(monitoring.CommandListener):
+    """Counts commands per replayed turn (by thread) and bytes written to interview_sessions."""
+
+    def __init__(self):
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.background = Counter()
+        self.session_bytes = 0
+        self.enabled = False
+
+    def begin(self):
+        self.local.ops = Counter()
+        self.local.bytes = 0
+
+    def end(self):
+        ops, written = self.local.ops, self.local.bytes
+        self.local.ops = None
+        return ops, written
+
+    def started(self, event):
+        if not self.enabled:
+            return
+        written = 0
+        collection = event.command.get(event.command_name)
+        if event.command_name in WRITE_COMMANDS and collection == SESSIONS_COLLECTION:
+            written = len(bson.encode(event.command))
+        ops = getattr(self.local, "ops", None)
+        if ops is not None:
+            ops[event.command_name] += 1
+            self.local.bytes += written
+        with self.lock:
+            self.session_bytes += written
+            if ops is None:
+                self.background[event.command_name] += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+# ─── Recording ───────────────────────────────────────────────────────────────
+
+def _answer_delays(session_doc, turns):
+    """Milliseconds the candidate took per answer, from the turn usage timestamps."""
+    records = {u.get("turn"): u for u in session_doc.get("usage", []) if u.get("call") == "next_question"}
+    previous = session_doc.get("created_at")
+    delays = []
+    for turn in range(1, turns + 1):
+        usage = records.get(turn) or {}
+        at = usage.get("at")
+        if not at or not previous:
+            delays.append(None)
+        else:
+            answered = (at - previous).total_seconds() * 1000 - (usage.get("latency_ms") or 0)
+            delays.append(max(0, round(answered)))
+        previous = at
+    return delays
+
+
+def record(session_id, output=None):
+    from config import interview_sessions_collection
+    from services.session_codec import decode_messages
+
+    session_doc = interview_sessions_collection.find_one({"_id": session_id})
+    if not session_doc:
+        sys.exit(f"Session {session_id} not found (evaluated sessions are deleted)")
+
+    if not session_doc.get("turn_log"):
+        sys.exit(f"Session {session_id} has no turn log (pre-codec session)")
+    # Turn 0: candidate profile, first-question prompt, first question
+    opening = decode_messages(session_doc["turn_log"][0]["data"])
+    config = dict(session_doc.get("config") or {})
+    if not config:
+        print("⚠️ Session predates stored interview configs; replays will use an empty profile")
+    if config.get("candidateName"):
+        config["candidateName"] = ANONYMISED_NAME
+
+    answers, questions = session_doc.get("answers", []), session_doc.get("questions", [])
+    records = {u.get("turn"): u for u in session_doc.get("usage", []) if u.get("call") == "next_question"}
+    delays = _answer_delays(session_doc, len(answers))
+    fixture = {
+        "name": f"{re.sub(r'[^a-z0-9]+', '_', str(config.get('role') or 'interview').lower())}_{len(answers)}_turns",
+        "description": f"Recorded from session {session_id}; answers are verbatim, review before committing",
+        "config": config,
+        "first_question_prompt": opening[1]["text"] if len(opening) > 1 else "",
+        "first_question": questions[0] if questions else "",
+        "turns": [
+            {
+                "answer": answer,
+                "time_remaining": (records.get(turn) or {}).get("time_remaining"),
+                "answer_delay_ms": delays[turn - 1],
+                "question": questions[turn] if turn < len(questions) else ""
+            }
+            for turn, answer in enumerate(answers, start=1)
+        ]
+    }
+
+    output = output or os.path.join(FIXTURES_DIR, f"{fixture['name']}.json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(fixture, f, indent=2, ensure_ascii=False)
+    print(f"Recorded {len(answers)} turns of session {session_id} to {output}")
+
+
+# ─── Replay ──────────────────────────────────────────────────────────────────
+
+def _percentile(samples, p):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[max(0, -(-p * len(ordered) // 100) - 1)]
+
+
+def _replay_interview(engine, counter, fixture, args):
+    """Run one interview; returns per-turn measurements and its session id."""
+    config = dict(fixture["config"])
+    session_id, _ = engine.create_session(config)
+    turns = []
+    for index, turn in enumerate(fixture["turns"], start=1):
+        time.sleep((turn.get("answer_delay_ms") or 0) * args.think_scale / 1000)
+        key = uuid.uuid4().hex
+        counter.begin()
+        started = time.perf_counter()
+        ttft = None
+        if args.stream:
+            for event in engine.next_question_stream(session_id, turn["answer"], turn.get("time_remaining"), None,
+                                                     turn_index=index, idempotency_key=key):
+                if event["type"] == "delta" and ttft is None:
+                    ttft = time.perf_counter() - started
+                elif event["type"] == "error":
+                    raise RuntimeError(event.get("error"))
+        else:
+            engine.next_question(session_id, turn["answer"], turn.get("time_remaining"), None,
+                                 turn_index=index, idempotency_key=key)
+        latency = time.perf_counter() - started
+        ops, written = counter.end()
+        turns.append({"latency_ms": latency * 1000, "ttft_ms": ttft * 1000 if ttft is not None else None,
+                      "ops": ops, "bytes": written})
+    return session_id, turns
+
+
+def _turn_usage(collection, session_ids):
+    usage = []
+    for doc in collection.find({"_id": {"$in": session_ids}}, {"usage": 1}):
+        usage += [u for u in doc.get("usage", []) if u.get("call") == "next_question"]
+    return usage
+
+
+def replay(args):
+    os.environ.setdefault("MONGO_DB_NAME", "ai_interview_bench")
+    counter = CommandCounter()
+    monitoring.register(counter)
+
+    from benchmarks.fake_gemini import FakeGemini
+    from config import MONGO_DB_NAME, prompts_collection, interview_sessions_collection
+    from services import ai_engine_db as engine
+    from services import token_ledger
+
+    if not prompts_collection.count_documents({"active": True}):
+        sys.exit(f"No active prompts in '{MONGO_DB_NAME}'; seed them with "
+                 f"MONGO_DB_NAME={MONGO_DB_NAME} python seed_prompts.py")
+
+    fixture = json.load(open(args.fixture, encoding="utf-8"))
+    script = [fixture["first_question"]] + [turn["question"] for turn in fixture["turns"]]
+    fake = FakeGemini(script, latency_ms=args.latency_ms, ttft_ms=args.ttft_ms).start()
+    fake.configure()
+
+    counter.enabled = True
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        futures = [pool.submit(_replay_interview, engine, counter, fixture, args) for _ in range(args.sessions)]
+        results = [future.result() for future in futures]
+    wall = time.perf_counter() - started
+    token_ledger.flush()
+    counter.enabled = False
+
+    session_ids = [session_id for session_id, _ in results]
+    turns = [turn for _, session_turns in results for turn in session_turns]
+    usage = _turn_usage(interview_sessions_collection, session_ids)
+    for session_id in session_ids:
+        engine.close_session(session_id)
+        engine.delete_session(session_id)
+    fake.stop()
+
+    report = _report(fixture, args, wall, turns, usage, counter, fake.stats())
+    _print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nSaved report to {args.json}")
+
+
+def _report(fixture, args, wall, turns, usage, counter, fake_stats):
+    latencies = [t["latency_ms"] for t in turns]
+    ttfts = [t["ttft_ms"] for t in turns if t["ttft_ms"] is not None]
+    ops = Counter()
+    for t in turns:
+        ops.update(t["ops"])
+    count = max(1, len(turns))
+
+    def token_mean(field):
+        return round(sum(u.get(field) or 0 for u in usage) / max(1, len(usage)))
+
+    return {
+        "fixture": fixture["name"],
+        "sessions": args.sessions,
+        "concurrency": args.concurrency,
+        "stream": args.stream,
+        "fake_latency_ms": args.latency_ms,
+        "turns": len(turns),
+        "wall_seconds": round(wall, 2),
+        "turns_per_second": round(len(turns) / wall, 2) if wall else None,
+        "latency_ms": {**{f"p{p}": round(_percentile(latencies, p)) for p in (50, 95, 99)},
+                       "max": round(max(latencies))},
+        "ttft_ms": {f"p{p}": round(_percentile(ttfts, p)) for p in (50, 95, 99)} if ttfts else None,
+        "tokens_per_turn": {field: token_mean(field) for field in
+                            ("prompt_tokens", "cached_tokens", "output_tokens", "total_tokens")},
+        "session_bytes_written": {
+            "total": counter.session_bytes,
+            "per_session": round(counter.session_bytes / max(1, args.sessions)),
+            "per_turn": round(sum(t["bytes"] for t in turns) / count)
+        },
+        "mongo_ops_per_turn": {name: round(n / count, 2) for name, n in ops.most_common()},
+        "background_ops_per_turn": {name: round(n / count, 2) for name, n in counter.background.most_common()},
+        "gemini": fake_stats
+    }
+
+
+def _print_report(report):
+    mode = "stream" if report["stream"] else "blocking"
+    print(f"\nFixture: {report['fixture']} | {report['sessions']} sessions x {report['turns'] // max(1, report['sessions'])} turns, "
+          f"concurrency {report['concurrency']}, {mode}, fake Gemini {report['fake_latency_ms']} ms")
+    print(f"Wall time {report['wall_seconds']} s, {report['turns_per_second']} turns/s\n")
+
+    print(f"{'turn latency':<24} " + "  ".join(f"{k}={v:,} ms" for k, v in report["latency_ms"].items()))
+    if report["ttft_ms"]:
+        print(f"{'time to first token':<24} " + "  ".join(f"{k}={v:,} ms" for k, v in report["ttft_ms"].items()))
+    print(f"{'tokens per turn':<24} " + "  ".join(f"{k}={v:,}" for k, v in report["tokens_per_turn"].items()))
+    written = report["session_bytes_written"]
+    print(f"{'interview_sessions bytes':<24} total={written['total']:,}  per_session={written['per_session']:,}  "
+          f"per_turn={written['per_turn']:,}")
+
+    print(f"\n{'mongo command':<20} | {'per turn':>9} | {'background':>10}")
+    print("-" * 45)
+    names = list(report["mongo_ops_per_turn"]) + [n for n in report["background_ops_per_turn"]
+                                                  if n not in report["mongo_ops_per_turn"]]
+    for name in names:
+        print(f"{name:<20} | {report['mongo_ops_per_turn'].get(name, 0):>9} | "
+              f"{report['background_ops_per_turn'].get(name, 0):>10}")
+    print("-" * 45)
+    print(f"{'sum':<20} | {round(sum(report['mongo_ops_per_turn'].values()), 2):>9} | "
+          f"{round(sum(report['background_ops_per_turn'].values()), 2):>10}")
+
+    print(f"\nFake Gemini requests: {report['gemini']['requests']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record and replay interview sessions against the engine")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rec = commands.add_parser("record", help="save a session as a replay fixture")
+    rec.add_argument("session_id")
+    rec.add_argument("-o", "--output", help="fixture path (default: fixtures/<role>_<turns>_turns.json)")
+
+    rep = commands.add_parser("replay", help="replay a fixture against the engine")
+    rep.add_argument("fixture", nargs="?", default=FIXTURE)
+    rep.add_argument("--sessions", type=int, default=10, help="interviews to replay")
+    rep.add_argument("--concurrency", type=int, default=5, help="interviews running at once")
+    rep.add_argument("--latency-ms", type=int, default=800, help="fake Gemini time per reply")
+    rep.add_argument("--ttft-ms", type=int, default=300, help="fake Gemini time to first streamed chunk")
+    rep.add_argument("--think-scale", type=float, default=0.0,
+                     help="fraction of the recorded answer delays to wait between turns")
+    rep.add_argument("--stream", action="store_true", help="replay turns through next_question_stream")
+    rep.add_argument("--json", help="also write the report to this file")
+
+    args = parser.parse_args()
+    if args.command == "record":
+        record(args.session_id, args.output)
+    else:
+        replay(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Session Codec Benchmark
+=======================
+Compares the pickled `chat.history` storage used before the turn log
+against the session codec for 5-, 20- and 50-turn interviews.
+
+Reports, per interview length:
+  - bytes stored for the full history
+  - bytes written over the whole interview (pickle rewrote the full
+    history every turn; the codec appends one entry per turn)
+  - encode / decode time of the full history
+
+Run from src/backend:
+    python -m benchmarks.session_codec_bench
+"""
+
+import pickle
+import random
+import time
+
+from google.generativeai import protos
+
+from services.session_codec import encode_messages, decode_messages
+
+TURN_COUNTS = [5, 20, 50]
+REPEATS = 50
+
+SYSTEM_PROMPT = (
+    "You are a professional human interviewer conducting a realistic mock interview.\n"
+    "Interview type: Technical\nRole: Accountant\nDuration: 45 minutes\n"
+    + "INTERVIEW STRUCTURE:\n- Ask questions ONE AT A TIME.\n- Never provide feedback.\n" * 30
+)
+NEXT_QUESTION_RULES = (
+    "Silently evaluate the response across accuracy, practical understanding and confidence.\n"
+    "ADAPTIVE QUESTIONING LOGIC:\n- weak -> simpler\n- average -> deeper\n- strong -> harder\n"
+    + "STRICT RULES:\n- Ask ONLY ONE question.\n- No feedback, no hints.\n" * 8
+)
+WORDS = ("ledger reconciliation accrual audit variance budget forecast invoice "
+         "compliance depreciation payable receivable journal closing").split()
+
+
+def _sentence(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def build_interview(turns, seed=7):
+    """Return a synthetic interview as a list of per-turn message lists."""
+    rng = random.Random(seed)
+    first = [
+        {"role": "user", "text": SYSTEM_PROMPT},
+        {"role": "user", "text": "Start the interview with a brief greeting and first question."},
+        {"role": "model", "text": _sentence(rng, 30) + "?"},
+    ]
+    interview = [first]
+    for _ in range(turns):
+        answer = " ".join(_sentence(rng, 18) for _ in range(6))
+        interview.append([
+            {"role": "user", "text": f"Candidate's latest answer:\n{answer}\n\n{NEXT_QUESTION_RULES}\nTime remaining: 1200"},
+            {"role": "model", "text": _sentence(rng, 28) + "?"},
+        ])
+    return interview
+
+
+def _to_protos(messages):
+    return [protos.Content(role=m["role"], parts=[protos.Part(text=m["text"])]) for m in messages]
+
+
+def _timed(fn, repeats=REPEATS):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        result = fn()
+    return result, (time.perf_counter() - start) / repeats * 1000
+
+
+def bench(turns):
+    interview = build_interview(turns)
+    flat = [m for turn in interview for m in turn]
+    history = _to_protos(flat)
+
+    pickled, pickle_encode_ms = _timed(lambda: pickle.dumps(history))
+    _, pickle_decode_ms = _timed(lambda: pickle.loads(pickled))
+
+    entries, codec_encode_ms = _timed(lambda: [encode_messages(turn) for turn in interview])
+    _, codec_decode_ms = _timed(lambda: [m for blob in entries for m in decode_messages(blob)])
+
+    # Bytes written over the interview: pickle re-wrote everything each turn
+    pickle_written = 0
+    so_far = []
+    for turn in interview:
+        so_far.extend(turn)
+        pickle_written += len(pickle.dumps(_to_protos(so_far)))
+    codec_written = sum(len(blob) for blob in entries)
+
+    return {
+        "turns": turns,
+        "pickle_bytes": len(pickled),
+        "codec_bytes": codec_written,
+        "pickle_written": pickle_written,
+        "codec_written": codec_written,
+        "pickle_encode_ms": pickle_encode_ms,
+        "pickle_decode_ms": pickle_decode_ms,
+        "codec_encode_ms": codec_encode_ms,
+        "codec_decode_ms": codec_decode_ms,
+    }
+
+
+def main():
+    header = (f"{'turns':>5} | {'stored pickle':>13} {'stored codec':>12} | "
+              f"{'written pickle':>14} {'written codec':>13} | "
+              f"{'enc pickle':>10} {'enc codec':>9} | {'dec pickle':>10} {'dec codec':>9}")
+    print(header)
+    print("-" * len(header))
+    for turns in TURN_COUNTS:
+        r = bench(turns)
+        print(f"{r['turns']:>5} | {r['pickle_bytes']:>13,} {r['codec_bytes']:>12,} | "
+              f"{r['pickle_written']:>14,} {r['codec_written']:>13,} | "
+              f"{r['pickle_encode_ms']:>8.3f}ms {r['codec_encode_ms']:>7.3f}ms | "
+              f"{r['pickle_decode_ms']:>8.3f}ms {r['codec_decode_ms']:>7.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
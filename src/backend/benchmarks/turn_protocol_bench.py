@@ -0,0 +1,112 @@
+"""
+Turn Protocol Token Benchmark
+=============================
+Replays a recorded interview and compares the input tokens billed per
+turn under the two next-question protocols:
+
+  full     every user turn repeats the whole `next_question_prompt`
+           rules block around the answer (and it stays in history)
+  compact  the static `next_question_rules` live once in the system
+           instruction; each turn sends {"answer", "time_remaining"}
+
+Prompt texts are read from seed_prompts.py. Token counts come from
+Gemini's count_tokens when GEMINI_API_KEY is set, otherwise from a
+4-characters-per-token estimate.
+
+Run from src/backend:
+    python -m benchmarks.turn_protocol_bench [fixture.json]
+"""
+
+import ast
+import json
+import os
+import sys
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "interview_accountant_20_turns.json")
+SEED_FILE = os.path.join(os.path.dirname(__file__), "..", "seed_prompts.py")
+MODEL_NAME = "gemini-2.5-flash"
+
+
+def load_seeded_prompts():
+    """Read the prompts_data literal from seed_prompts.py without touching the database."""
+    tree = ast.parse(open(SEED_FILE, encoding="utf-8").read())
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Assign) and getattr(node.targets[0], "id", None) == "prompts_data":
+            return {p["name"]: p["prompt_text"] for p in ast.literal_eval(node.value)}
+    raise RuntimeError("prompts_data not found in seed_prompts.py")
+
+
+def build_conversations(prompts, fixture):
+    """Return {protocol: (system_instruction, [turn message lists])}."""
+    system_prompt = prompts["system_prompt"].format(**fixture["config"])
+    opening = [
+        {"role": "user", "parts": [fixture["first_question_prompt"]]},
+        {"role": "model", "parts": [fixture["first_question"]]},
+    ]
+
+    full_turns, compact_turns = [], []
+    for turn in fixture["turns"]:
+        full_prompt = prompts["next_question_prompt"].format(
+            answer=turn["answer"], time_remaining=turn["time_remaining"]
+        )
+        compact_prompt = json.dumps(
+            {"answer": turn["answer"], "time_remaining": turn["time_remaining"]}, ensure_ascii=False
+        )
+        reply = {"role": "model", "parts": [turn["question"]]}
+        full_turns.append([{"role": "user", "parts": [full_prompt]}, reply])
+        compact_turns.append([{"role": "user", "parts": [compact_prompt]}, reply])
+
+    rules = prompts["next_question_rules"].format()
+    return {
+        "full": (system_prompt, opening, full_turns),
+        "compact": (system_prompt.rstrip() + "\n\n" + rules.strip(), opening, compact_turns),
+    }
+
+
+def make_counter():
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        def estimate(system_instruction, contents):
+            chars = len(system_instruction) + sum(len(c["parts"][0]) for c in contents)
+            return chars // 4
+        return estimate, "estimated (chars/4)"
+
+    import google.generativeai as genai
+    genai.configure(api_key=api_key)
+
+    def count(system_instruction, contents):
+        model = genai.GenerativeModel(MODEL_NAME, system_instruction=system_instruction)
+        return model.count_tokens(contents).total_tokens
+    return count, f"count_tokens ({MODEL_NAME})"
+
+
+def per_turn_input_tokens(counter, system_instruction, opening, turns):
+    """Input tokens of each next-question request (history replayed + new message)."""
+    history = list(opening)
+    counts = []
+    for user_message, reply in turns:
+        counts.append(counter(system_instruction, history + [user_message]))
+        history += [user_message, reply]
+    return counts
+
+
+def main():
+    fixture_path = sys.argv[1] if len(sys.argv) > 1 else FIXTURE
+    fixture = json.load(open(fixture_path, encoding="utf-8"))
+    counter, method = make_counter()
+    conversations = build_conversations(load_seeded_prompts(), fixture)
+
+    results = {name: per_turn_input_tokens(counter, *conv) for name, conv in conversations.items()}
+
+    print(f"Fixture: {fixture['name']} ({len(fixture['turns'])} turns), tokens {method}\n")
+    print(f"{'turn':>4} | {'full':>8} | {'compact':>8} | {'saved':>6}")
+    print("-" * 37)
+    for i, (full, compact) in enumerate(zip(results["full"], results["compact"]), start=1):
+        print(f"{i:>4} | {full:>8,} | {compact:>8,} | {1 - compact / full:>6.1%}")
+    total_full, total_compact = sum(results["full"]), sum(results["compact"])
+    print("-" * 37)
+    print(f"{'sum':>4} | {total_full:>8,} | {total_compact:>8,} | {1 - total_compact / total_full:>6.1%}")
+
+
+if __name__ == "__main__":
+    main()
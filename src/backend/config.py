@@ -1,6 +1,7 @@
 import os
 from dotenv import load_dotenv
 from pymongo import MongoClient
+from pymongo.errors import OperationFailure
 
 load_dotenv()
 
@@ -9,11 +10,54 @@ MONGO_URI = os.getenv("MONGO_URI")
 JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY")
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
+# Worker-local interview session cache
+SESSION_CACHE_SIZE = int(os.getenv("SESSION_CACHE_SIZE", "256"))
+SESSION_CACHE_TTL_SECONDS = int(os.getenv("SESSION_CACHE_TTL_SECONDS", "900"))
+
+# Session store for the chat engines (memory | mongo | hybrid)
+SESSION_STORE_BACKEND = os.getenv("SESSION_STORE_BACKEND", "hybrid")
+SESSION_STORE_WRITE_BEHIND_SECONDS = float(os.getenv("SESSION_STORE_WRITE_BEHIND_SECONDS", "1"))
+
+# Candidate answer compaction before answers are sent to the model
+ANSWER_NORMALIZATION = os.getenv("ANSWER_NORMALIZATION", "true").lower() in ("1", "true", "yes")
+ANSWER_MAX_TOKENS = int(os.getenv("ANSWER_MAX_TOKENS", "600"))
+
+# Buffered per-call token ledger
+TOKEN_LEDGER_FLUSH_SECONDS = float(os.getenv("TOKEN_LEDGER_FLUSH_SECONDS", "5"))
+TOKEN_LEDGER_BATCH_SIZE = int(os.getenv("TOKEN_LEDGER_BATCH_SIZE", "200"))
+
+# Browser origins allowed by CORS (Flask app and ASGI entry point)
+CORS_ORIGINS = ["https://interview.onewebmart.com", "http://localhost:5173"]
+
+# Buffered proctoring event ingestion
+PROCTORING_FLUSH_SECONDS = float(os.getenv("PROCTORING_FLUSH_SECONDS", "1"))
+PROCTORING_BATCH_SIZE = int(os.getenv("PROCTORING_BATCH_SIZE", "1000"))
+
+# ASGI serving mode: threads for the blocking (pymongo / parsing) steps of async routes,
+# held per round trip and never across a Gemini call (see services/async_runtime),
+# and for the Flask routes it wraps
+ASYNC_BLOCKING_THREADS = int(os.getenv("ASYNC_BLOCKING_THREADS", "64"))
+ASGI_WSGI_THREADS = int(os.getenv("ASGI_WSGI_THREADS", "16"))
+
+# Gemini call guard: deadlines, hedging and circuit breaker (see services/llm_guard)
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+LLM_STREAM_TIMEOUT_SECONDS = float(os.getenv("LLM_STREAM_TIMEOUT_SECONDS", "120"))
+LLM_HEDGE_FEATURES = {f.strip() for f in os.getenv("LLM_HEDGE_FEATURES", "").split(",") if f.strip()}
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+LLM_BREAKER_WINDOW = int(os.getenv("LLM_BREAKER_WINDOW", "50"))
+LLM_BREAKER_MIN_CALLS = int(os.getenv("LLM_BREAKER_MIN_CALLS", "20"))
+LLM_BREAKER_ERROR_RATE = float(os.getenv("LLM_BREAKER_ERROR_RATE", "0.5"))
+LLM_BREAKER_SLOW_SECONDS = float(os.getenv("LLM_BREAKER_SLOW_SECONDS", "30"))
+LLM_BREAKER_SLOW_RATE = float(os.getenv("LLM_BREAKER_SLOW_RATE", "0.5"))
+LLM_BREAKER_COOLDOWN_SECONDS = float(os.getenv("LLM_BREAKER_COOLDOWN_SECONDS", "30"))
+
 # MongoDB connection
 client = MongoClient(MONGO_URI)
 print(MONGO_URI)
 print("MongoDB connection successful")
-db = client["ai_interview"]
+# Overridable so benchmarks can replay into a scratch database
+MONGO_DB_NAME = os.getenv("MONGO_DB_NAME", "ai_interview")
+db = client[MONGO_DB_NAME]
 # print(db)
 organizations_collection = db["organizations"]
 interviews_collection = db["interviews"]
@@ -23,6 +67,12 @@ scheduled_interviews_collection = db["scheduled_interviews"]
 interview_results_collection = db["interview_results"]
 prompts_collection = db["prompts"]
 interview_sessions_collection = db["interview_sessions"]
+prompt_caches_collection = db["prompt_caches"]
+evaluation_jobs_collection = db["evaluation_jobs"]
+question_bank_collection = db["question_bank"]
+question_bank_jobs_collection = db["question_bank_jobs"]
+engine_sessions_collection = db["engine_sessions"]
+advisory_notes_collection = db["advisory_notes"]
 
 # Resume Screening collections
 screening_jobs_collection = db["screening_jobs"]
@@ -35,6 +85,58 @@ try:
 except Exception as e:
     print(f"TTL index already exists or error: {e}")
 
+try:
+    engine_sessions_collection.create_index("expires_at", expireAfterSeconds=0)
+except Exception as e:
+    print(f"engine_sessions TTL index already exists or error: {e}")
+
+# One evaluation job per interview session
+try:
+    evaluation_jobs_collection.create_index("session_id", unique=True)
+    evaluation_jobs_collection.create_index([("status", 1), ("available_at", 1)])
+except Exception as e:
+    print(f"Evaluation job index already exists or error: {e}")
+
+# One result per interview session: evaluation retries upsert into it and rely on the
+# DuplicateKeyError when two workers race. Partial, because older results have no sessionId.
+try:
+    interview_results_collection.create_index(
+        "sessionId", unique=True, partialFilterExpression={"sessionId": {"$exists": True}}
+    )
+except OperationFailure as e:
+    # A unique index left by an earlier deploy gives the same guarantee; anything else must stop startup
+    existing = interview_results_collection.index_information().get("sessionId_1") or {}
+    if not existing.get("unique"):
+        raise RuntimeError(f"interview_results needs a unique sessionId index: {e}") from e
+
+# Per-call LLM token ledger (time-series)
+try:
+    if "llm_usage" not in db.list_collection_names():
+        db.create_collection("llm_usage", timeseries={"timeField": "at", "metaField": "meta", "granularity": "seconds"})
+    print("Time-series collection ready: llm_usage")
+except Exception as e:
+    print(f"llm_usage time-series collection already exists or error: {e}")
+llm_usage_collection = db["llm_usage"]
+try:
+    llm_usage_collection.create_index([("meta.organization_id", 1), ("at", -1)])
+    llm_usage_collection.create_index([("meta.scheduled_interview_id", 1), ("at", -1)])
+    llm_usage_collection.create_index([("meta.screening_job_id", 1), ("at", -1)])
+except Exception as e:
+    print(f"llm_usage index already exists or error: {e}")
+
+# Proctoring events (time-series)
+try:
+    if "proctoring_events" not in db.list_collection_names():
+        db.create_collection("proctoring_events", timeseries={"timeField": "at", "metaField": "meta", "granularity": "seconds"})
+    print("Time-series collection ready: proctoring_events")
+except Exception as e:
+    print(f"proctoring_events time-series collection already exists or error: {e}")
+proctoring_events_collection = db["proctoring_events"]
+try:
+    proctoring_events_collection.create_index([("meta.session_id", 1), ("at", 1)])
+except Exception as e:
+    print(f"proctoring_events index already exists or error: {e}")
+
 # If any critical variable is not loaded, print an error message and exit
 if not MONGO_URI or not JWT_SECRET_KEY or not GEMINI_API_KEY:
     print("Error: Critical environment variables not loaded.")
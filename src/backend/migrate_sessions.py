@@ -0,0 +1,42 @@
+from config import interview_sessions_collection
+from services.session_codec import SCHEMA_VERSION, migrate_session_doc
+
+def migrate_sessions():
+    """Re-encode pickled and pre-codec interview sessions with the session codec,
+    and add the turn-claim fields (version, turn_keys, usage) older sessions lack"""
+    
+    legacy_query = {"$or": [
+        {"chat_history": {"$exists": True}},
+        {"turn_log.role": {"$exists": True}},
+        {"version": {"$exists": False}}
+    ]}
+    
+    migrated = 0
+    failed = 0
+    
+    for session_doc in interview_sessions_collection.find(legacy_query):
+        try:
+            update_fields = migrate_session_doc(session_doc)
+            if not update_fields:
+                continue
+            
+            query = {"_id": session_doc["_id"]}
+            if "version" in update_fields:
+                query["version"] = {"$exists": False}
+            result = interview_sessions_collection.update_one(
+                query,
+                {"$set": update_fields, "$unset": {"chat_history": "", "qa_pairs": ""}}
+            )
+            if not result.matched_count:
+                continue
+            migrated += 1
+            print(f"- {session_doc['_id']}: {len(update_fields.get('turn_log', session_doc.get('turn_log', [])))} turns")
+        except Exception as e:
+            failed += 1
+            print(f"Error migrating session {session_doc['_id']}: {e}")
+    
+    print(f"\nMigrated {migrated} sessions to codec v{SCHEMA_VERSION} ({failed} failed)")
+
+
+if __name__ == "__main__":
+    migrate_sessions()
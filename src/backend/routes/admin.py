@@ -1,9 +1,11 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
-from config import organizations_collection, candidate_credentials_collection, scheduled_interviews_collection
+from config import organizations_collection, candidate_credentials_collection, scheduled_interviews_collection, question_bank_collection
+from services import question_bank
+from services import model_router
 from werkzeug.security import generate_password_hash, check_password_hash
 from bson import ObjectId
-from datetime import datetime
+from datetime import datetime, timedelta
 
 admin_bp = Blueprint("admin", __name__)
 
@@ -260,3 +262,144 @@ def get_admin_stats():
     }
     
     return jsonify(stats), 200
+
+@admin_bp.route("/question-bank", methods=["GET"])
+@jwt_required()
+def list_question_pools():
+    admin_id = get_jwt_identity()
+    admin_collection = get_admin_collection()
+    admin = admin_collection.find_one({"_id": ObjectId(admin_id)})
+    
+    if not admin:
+        return jsonify({"error": "Unauthorized"}), 403
+    
+    pools = []
+    for pool in question_bank_collection.find({}, {"usage": 0}):
+        questions = pool.get("questions", [])
+        pools.append({
+            "key": pool["_id"],
+            "position": pool.get("position"),
+            "interviewType": pool.get("interviewType"),
+            "natureOfPosition": pool.get("natureOfPosition"),
+            "questionCount": len(questions),
+            "vettedCount": sum(1 for q in questions if q.get("vetted")),
+            "updatedAt": pool.get("updated_at").isoformat() if pool.get("updated_at") else None
+        })
+    
+    return jsonify({"pools": pools}), 200
+
+@admin_bp.route("/question-bank/generate", methods=["POST"])
+@jwt_required()
+def generate_question_pool():
+    admin_id = get_jwt_identity()
+    admin_collection = get_admin_collection()
+    admin = admin_collection.find_one({"_id": ObjectId(admin_id)})
+    
+    if not admin:
+        return jsonify({"error": "Unauthorized"}), 403
+    
+    data = request.json or {}
+    if data.get("missingOnly"):
+        # Batch: every frequently scheduled combination without a pool, in the background
+        job_id = question_bank.start_backfill(
+            min_interviews=int(data.get("minInterviews", 5)),
+            count=int(data.get("count", 30)),
+            requested_by=admin_id
+        )
+        return jsonify({"status": "running", "job_id": job_id}), 202
+    
+    if not data.get("position") or not data.get("interviewType"):
+        return jsonify({"error": "Position and interview type are required"}), 400
+    
+    try:
+        pool = question_bank.generate_pool(
+            data["position"],
+            data["interviewType"],
+            data.get("natureOfPosition", ""),
+            count=int(data.get("count", 30))
+        )
+    except Exception as e:
+        print(f"Question pool generation failed: {e}")
+        return jsonify({"error": str(e)}), 500
+    
+    return jsonify({"key": pool["_id"], "questions": pool["questions"]}), 200
+
+@admin_bp.route("/question-bank/generate/<job_id>", methods=["GET"])
+@jwt_required()
+def question_pool_backfill_status(job_id):
+    admin_id = get_jwt_identity()
+    admin_collection = get_admin_collection()
+    admin = admin_collection.find_one({"_id": ObjectId(admin_id)})
+    
+    if not admin:
+        return jsonify({"error": "Unauthorized"}), 403
+    
+    job = question_bank.backfill_status(job_id)
+    if not job:
+        return jsonify({"error": "Backfill not found"}), 404
+    
+    return jsonify({
+        "job_id": job_id,
+        "status": job["status"],
+        "generated": job.get("generated", []),
+        "failed": job.get("failed", []),
+        "error": job.get("error"),
+        "startedAt": job["started_at"].isoformat(),
+        "finishedAt": job["finished_at"].isoformat() if job.get("finished_at") else None
+    }), 200
+
+@admin_bp.route("/question-bank/<path:key>", methods=["GET"])
+@jwt_required()
+def get_question_pool(key):
+    admin_id = get_jwt_identity()
+    admin_collection = get_admin_collection()
+    admin = admin_collection.find_one({"_id": ObjectId(admin_id)})
+    
+    if not admin:
+        return jsonify({"error": "Unauthorized"}), 403
+    
+    pool = question_bank_collection.find_one({"_id": key}, {"usage": 0})
+    if not pool:
+        return jsonify({"error": "Question pool not found"}), 404
+    
+    return jsonify({
+        "key": pool["_id"],
+        "position": pool.get("position"),
+        "interviewType": pool.get("interviewType"),
+        "natureOfPosition": pool.get("natureOfPosition"),
+        "questions": pool.get("questions", [])
+    }), 200
+
+@admin_bp.route("/question-bank/<path:key>/questions/<question_id>", methods=["PUT", "DELETE"])
+@jwt_required()
+def edit_pool_question(key, question_id):
+    admin_id = get_jwt_identity()
+    admin_collection = get_admin_collection()
+    admin = admin_collection.find_one({"_id": ObjectId(admin_id)})
+    
+    if not admin:
+        return jsonify({"error": "Unauthorized"}), 403
+    
+    if request.method == "DELETE":
+        found = question_bank.remove_question(key, question_id)
+    else:
+        found = question_bank.update_question(key, question_id, request.json or {})
+    
+    if not found:
+        return jsonify({"error": "Question not found"}), 404
+    return jsonify({"message": "Question updated successfully"}), 200
+
+@admin_bp.route("/model-routing", methods=["GET"])
+@jwt_required()
+def model_routing_report():
+    """Active routing table plus per-task/model calls, tokens, latency and cost (?days=30)."""
+    admin_id = get_jwt_identity()
+    admin_collection = get_admin_collection()
+    admin = admin_collection.find_one({"_id": ObjectId(admin_id)})
+    
+    if not admin:
+        return jsonify({"error": "Unauthorized"}), 403
+    
+    days = request.args.get("days", default=30, type=int)
+    report = model_router.report(since=datetime.utcnow() - timedelta(days=days))
+    return jsonify({"days": days, **report}), 200
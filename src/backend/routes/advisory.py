@@ -0,0 +1,72 @@
+from flask import Blueprint, request, jsonify, Response, stream_with_context
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from services.ai_engine_db import (
+    create_advisory_session,
+    advisory_reply,
+    advisory_reply_stream,
+    get_advisory_note
+)
+import json
+
+advisory_bp = Blueprint("advisory", __name__)
+
+@advisory_bp.route("/start", methods=["POST"])
+@jwt_required()
+def start():
+    user_id = get_jwt_identity()
+    session_id, first_message = create_advisory_session(user_id)
+    return jsonify({
+        "session_id": session_id,
+        "message": first_message
+    })
+
+@advisory_bp.route("/reply", methods=["POST"])
+@jwt_required()
+def reply():
+    data = request.json
+    session_id = data.get("session_id")
+    message = data.get("message")
+
+    if not session_id or not message:
+        return jsonify({"error": "Invalid request"}), 400
+
+    event = advisory_reply(session_id, get_jwt_identity(), message)
+    if event["type"] == "error":
+        return jsonify({"error": event["error"]}), event.get("code", 404)
+    return jsonify({"message": event["reply"], "turn": event["turn"], "note": event["note"]})
+
+@advisory_bp.route("/reply/stream", methods=["POST"])
+@jwt_required()
+def reply_streamed():
+    """Same as /reply, but streams the strategist's reply as server-sent events."""
+    data = request.json
+    session_id = data.get("session_id")
+    message = data.get("message")
+
+    if not session_id or not message:
+        return jsonify({"error": "Invalid request"}), 400
+
+    user_id = get_jwt_identity()
+
+    def events():
+        for event in advisory_reply_stream(session_id, user_id, message):
+            yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+    return Response(
+        stream_with_context(events()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@advisory_bp.route("/<session_id>/note", methods=["GET"])
+@jwt_required()
+def note(session_id):
+    """The stored BUSINESS ADVISORY NOTE of a session; served without a model call."""
+    doc = get_advisory_note(session_id, get_jwt_identity())
+    if not doc:
+        return jsonify({"error": "No advisory note for this session yet"}), 404
+    return jsonify({
+        "session_id": session_id,
+        "note": doc["note"],
+        "created_at": doc["created_at"].isoformat()
+    })
@@ -1,13 +1,18 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from services.ai_engine_db import (
     create_session,
     next_question,
-    finish_interview
+    next_question_stream,
+    close_session,
+    TurnConflictError,
+    get_session_cache_stats,
+    get_session_store_stats
 )
-from config import scheduled_interviews_collection, interview_results_collection
-from bson import ObjectId
-from datetime import datetime
+from services import llm_guard
+from services import proctoring
+from services.evaluation_queue import enqueue_evaluation, get_job
+import json
 
 interview_bp = Blueprint("interview", __name__)
 
@@ -16,7 +21,7 @@ interview_bp = Blueprint("interview", __name__)
 def start():
     data = request.json
     print("Data:", data)
-    session_id, first_q = create_session(data)
+    session_id, first_q = create_session(data, candidate_id=get_jwt_identity())
     return jsonify({
         "session_id": session_id,
         "question": first_q
@@ -31,13 +36,90 @@ def next_questions():
     answer = data.get("answer")
     timeRemaining = data.get("timeRemaining")
     scheduledInterviewId = data.get("scheduledInterviewId")
+    turn_index = data.get("turn_index")
+    idempotency_key = data.get("idempotency_key")
 
     if not session_id or not answer:
         return jsonify({"error": "Invalid request"}), 400
 
-    q = next_question(session_id, answer, timeRemaining, scheduledInterviewId)
+    try:
+        q = next_question(session_id, answer, timeRemaining, scheduledInterviewId,
+                          turn_index=turn_index, idempotency_key=idempotency_key)
+    except TurnConflictError as e:
+        return jsonify({"error": str(e)}), 409
+    except llm_guard.LLMUnavailableError as e:
+        return jsonify({"error": str(e)}), 503
     return jsonify({"question": q})
 
+@interview_bp.route("/next-question/stream", methods=["POST"])
+@jwt_required()
+def next_question_streamed():
+    """Same as /next-question, but streams the question as server-sent events."""
+    data = request.json
+
+    session_id = data.get("session_id")
+    answer = data.get("answer")
+    timeRemaining = data.get("timeRemaining")
+    scheduledInterviewId = data.get("scheduledInterviewId")
+    turn_index = data.get("turn_index")
+    idempotency_key = data.get("idempotency_key")
+
+    if not session_id or not answer:
+        return jsonify({"error": "Invalid request"}), 400
+
+    def events():
+        for event in next_question_stream(session_id, answer, timeRemaining, scheduledInterviewId,
+                                          turn_index=turn_index, idempotency_key=idempotency_key):
+            yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+    return Response(
+        stream_with_context(events()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@interview_bp.route("/session-cache/stats", methods=["GET"])
+@jwt_required()
+def session_cache_stats():
+    """Hit/miss counters of this worker's session cache (for tuning its size/TTL)."""
+    return jsonify(get_session_cache_stats())
+
+@interview_bp.route("/llm-guard/stats", methods=["GET"])
+@jwt_required()
+def llm_guard_stats():
+    """Gemini circuit state and per-feature p50/p95/p99 latency of this worker."""
+    return jsonify(llm_guard.stats())
+
+@interview_bp.route("/session-store/stats", methods=["GET"])
+@jwt_required()
+def session_store_stats():
+    """Per-engine session store metrics of this worker (memory size, evictions, pending writes)."""
+    return jsonify(get_session_store_stats())
+
+@interview_bp.route("/proctoring/events", methods=["POST"])
+@jwt_required()
+def proctoring_events():
+    """
+    Batched proctoring events: {"session_id", "scheduledInterviewId"?, "events": [...]}
+    for a session of the calling candidate. Buffered per worker and written
+    in bulk (services/proctoring).
+    """
+    data = request.get_json(silent=True) or {}
+    events = data.get("events")
+    if not data.get("session_id") or not isinstance(events, list):
+        return jsonify({"error": "session_id and events are required"}), 400
+
+    accepted = proctoring.ingest(data["session_id"], get_jwt_identity(), events, data.get("scheduledInterviewId"))
+    if accepted is None:
+        return jsonify({"error": "Session not found"}), 404
+    return jsonify({"accepted": accepted}), 202
+
+@interview_bp.route("/proctoring/stats", methods=["GET"])
+@jwt_required()
+def proctoring_stats():
+    """Proctoring events received, flushed, dropped and still buffered on this worker."""
+    return jsonify(proctoring.stats())
+
 # @interview_bp.route("/next-question", methods=["POST"])
 # def next_q():
 #     data = request.json
@@ -49,6 +131,19 @@ def next_questions():
 #     return jsonify({ "question": q })
 5
 
+def queue_evaluation(current_user, session_id, scheduledInterviewId, credentialId):
+    """
+    Close the session and queue its evaluation. Returns the job id, or None
+    if the session does not exist. Shared by the REST end route and the WebSocket.
+    """
+    # The evaluator reads the session's violation counter: flush this worker's
+    # events now and give the other workers' flushers SETTLE_SECONDS
+    proctoring.flush_session(session_id)
+    if not close_session(session_id, scheduledInterviewId):
+        return None
+    return enqueue_evaluation(session_id, current_user, scheduledInterviewId, credentialId,
+                              delay_seconds=proctoring.SETTLE_SECONDS)
+
 @interview_bp.route("/end-interview", methods=["POST"])
 @jwt_required()
 def end():
@@ -58,44 +153,31 @@ def end():
     if not data or not data.get("session_id"):
         return jsonify({"error": "Session ID required"}), 400
 
-    scheduledInterviewId = data.get("scheduledInterviewId")
-    credentialId = data.get("credentialId")
-    
-    feedback = finish_interview(data["session_id"], scheduledInterviewId)
-    
+    job_id = queue_evaluation(
+        current_user,
+        data["session_id"],
+        data.get("scheduledInterviewId"),
+        data.get("credentialId")
+    )
+    if not job_id:
+        return jsonify({"error": "Session not found"}), 404
     
+    return jsonify({"status": "queued", "job_id": job_id, "session_id": data["session_id"]}), 202
 
-    
-    # Save interview results to database
-    try:
-        result_doc = {
-            "candidateId": current_user,
-            "credentialId": credentialId,
-            "scheduledInterviewId": scheduledInterviewId,
-            "score": feedback.get("score", 0),
-            "strengths": feedback.get("strengths", []),
-            "improvements": feedback.get("improvements", []),
-            "interview_verdict": feedback.get("interview_verdict", "Average"),
-            "improvement_guide": feedback.get("improvement_guide", "Average"),
-            "qa_pairs": feedback.get("qa_pairs", []),
-            "raw_result": feedback.get("raw_result", ""),
-            "completed_at": datetime.utcnow(),
-            "published": False
-        }
-        
-        interview_results_collection.insert_one(result_doc)
-        print(f"Interview results saved for candidate: {current_user}")
-    except Exception as e:
-        print(f"Error saving interview results: {e}")
-    
-    # Mark interview as completed
-    if scheduledInterviewId:
-        try:
-            scheduled_interviews_collection.update_one(
-                {"_id": ObjectId(scheduledInterviewId)},
-                {"$set": {"completed": True, "completedAt": datetime.utcnow()}}
-            )
-        except Exception as e:
-            print(f"Error marking interview as completed: {e}")
-    
-    return jsonify(feedback)
+@interview_bp.route("/evaluation-status/<job_id>", methods=["GET"])
+@jwt_required()
+def evaluation_status(job_id):
+    job = get_job(job_id, candidate_id=get_jwt_identity())
+    if not job:
+        return jsonify({"error": "Evaluation not found"}), 404
+
+    response = {
+        "job_id": job_id,
+        "status": job["status"],
+        "attempts": job.get("attempts", 0)
+    }
+    if job["status"] == "done":
+        response["result"] = job.get("evaluation")
+    elif job["status"] == "failed":
+        response["error"] = job.get("error")
+    return jsonify(response)
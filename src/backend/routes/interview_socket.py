@@ -0,0 +1,203 @@
+"""
+Interview WebSocket
+===================
+One persistent connection per candidate interview, mounted at
+/interview/ws on the interview blueprint.
+
+The connection authenticates once with an `auth` message as its first
+frame (never a URL query parameter, which access logs and proxies
+record), then carries the whole interview.
+The session document and rebuilt chat are held for the life of the
+connection, so turns skip the per-request session lookup.
+
+Client -> server frames (JSON):
+  {"type": "auth", "token": ...}
+  {"type": "start", "config": {...}}              same body as /start-interview
+  {"type": "resume", "session_id": ..., "scheduledInterviewId": ..., "credentialId": ...}
+                                                  own sessions only
+  {"type": "answer", "answer": ..., "timeRemaining": ..., "turn_index": ..., "idempotency_key": ...}
+  {"type": "tick", "timeRemaining": ...}
+  {"type": "violation", "violations": [...]}      batched proctoring events (services/proctoring)
+  {"type": "end"}
+  {"type": "ping"}
+
+Server -> client frames:
+  {"type": "ready"}                               after authentication
+  {"type": "question", "session_id", "question", "turn"}
+  {"type": "delta", "text"}                       streamed question tokens
+  {"type": "queued", "job_id"}                    evaluation queued; then the socket closes
+  {"type": "pong"} / {"type": "error", "error", "code"?}   code 409: turn owned by another request
+  {"type": "error", "error", "code", "fallback": true}    the server failed; the socket closes and
+                                                          the client continues over REST
+
+The evaluation itself runs in the background (services/evaluation_queue);
+poll GET /interview/evaluation-status/<job_id> for the result.
+
+Clients that cannot open a WebSocket use the REST routes in
+routes/interview.py; both paths share the same engine and session data.
+"""
+
+import json
+
+from flask_jwt_extended import decode_token
+from flask_sock import Sock
+from simple_websocket import ConnectionClosed
+
+from routes.interview import interview_bp, queue_evaluation
+from services.ai_engine_db import create_session, load_owned_session, next_question_stream
+from services import proctoring
+from services import llm_guard
+
+sock = Sock()
+
+
+def _send(ws, payload):
+    ws.send(json.dumps(payload, default=str))
+
+
+def server_error_frame(error):
+    """Error frame for an unexpected failure: the socket closes and the client falls back to REST."""
+    code = 503 if isinstance(error, llm_guard.LLMUnavailableError) else 500
+    return {"type": "error", "error": str(error) or "Internal server error", "code": code, "fallback": True}
+
+
+def _authenticate(ws):
+    """Return the JWT identity for the connection, or None after reporting the error."""
+    try:
+        frame = json.loads(ws.receive(timeout=10) or "{}")
+    except ValueError:
+        frame = {}
+    token = frame.get("token") if frame.get("type") == "auth" else None
+
+    if not token:
+        _send(ws, {"type": "error", "error": "Missing or invalid token"})
+        return None
+    try:
+        return decode_token(token)["sub"]
+    except Exception as e:
+        print(f"WebSocket authentication failed: {e}")
+        _send(ws, {"type": "error", "error": "Missing or invalid token"})
+        return None
+
+
+@sock.route("/ws", bp=interview_bp)
+def interview_socket(ws):
+    current_user = _authenticate(ws)
+    if not current_user:
+        return
+    _send(ws, {"type": "ready"})
+    print(f"🔌 Interview WebSocket opened for {current_user}")
+
+    state = {"session_id": None, "scheduledInterviewId": None, "credentialId": None, "timeRemaining": None}
+    hot = {}  # session document and chat kept for the life of the connection
+
+    try:
+        while True:
+            raw = ws.receive()
+            if raw is None:
+                break
+            try:
+                message = json.loads(raw)
+            except ValueError:
+                _send(ws, {"type": "error", "error": "Invalid JSON"})
+                continue
+
+            kind = message.get("type")
+
+            if kind == "ping":
+                _send(ws, {"type": "pong"})
+
+            elif kind == "tick":
+                state["timeRemaining"] = message.get("timeRemaining")
+
+            elif kind == "start":
+                config = message.get("config") or {}
+                session_id, first_q = create_session(config, candidate_id=current_user)
+                state.update(
+                    session_id=session_id,
+                    scheduledInterviewId=config.get("scheduledInterviewId"),
+                    credentialId=config.get("credentialId")
+                )
+                hot.clear()
+                _send(ws, {"type": "question", "session_id": session_id, "question": first_q, "turn": 0})
+
+            elif kind == "resume":
+                # Only the candidate who started the interview may take it over
+                session_doc, chat = load_owned_session(message.get("session_id"), current_user)
+                if not session_doc:
+                    _send(ws, {"type": "error", "error": "Session expired or invalid. Please restart the interview."})
+                    continue
+                state.update(
+                    session_id=session_doc["_id"],
+                    scheduledInterviewId=message.get("scheduledInterviewId"),
+                    credentialId=message.get("credentialId")
+                )
+                hot.update(session=session_doc, chat=chat)
+                _send(ws, {
+                    "type": "question",
+                    "session_id": session_doc["_id"],
+                    "question": session_doc["questions"][-1],
+                    "turn": session_doc.get("turn_count", 0)
+                })
+
+            elif kind == "answer":
+                if not state["session_id"] or not message.get("answer"):
+                    _send(ws, {"type": "error", "error": "Invalid request"})
+                    continue
+                timeRemaining = message.get("timeRemaining", state["timeRemaining"])
+                for event in next_question_stream(
+                    state["session_id"],
+                    message["answer"],
+                    timeRemaining,
+                    state["scheduledInterviewId"],
+                    hot=hot,
+                    turn_index=message.get("turn_index"),
+                    idempotency_key=message.get("idempotency_key")
+                ):
+                    if event["type"] == "done":
+                        _send(ws, {
+                            "type": "question",
+                            "session_id": state["session_id"],
+                            "question": event["question"],
+                            "turn": event["turn"]
+                        })
+                    else:
+                        _send(ws, event)
+
+            elif kind == "violation":
+                if state["session_id"]:
+                    accepted = proctoring.ingest(state["session_id"], current_user,
+                                                 message.get("violations") or [message.get("violation")],
+                                                 state["scheduledInterviewId"])
+                    if accepted is None:
+                        # Violation frames get no reply: an error would fail the answer in flight
+                        print(f"Proctoring events for session {state['session_id']} refused for {current_user}")
+
+            elif kind == "end":
+                if not state["session_id"]:
+                    _send(ws, {"type": "error", "error": "Session ID required"})
+                    continue
+                job_id = queue_evaluation(
+                    current_user,
+                    state["session_id"],
+                    state["scheduledInterviewId"],
+                    state["credentialId"]
+                )
+                if not job_id:
+                    _send(ws, {"type": "error", "error": "Session not found"})
+                    continue
+                _send(ws, {"type": "queued", "job_id": job_id, "session_id": state["session_id"]})
+                break
+
+            else:
+                _send(ws, {"type": "error", "error": f"Unknown message type: {kind}"})
+    except ConnectionClosed:
+        pass
+    except Exception as e:
+        print(f"Interview WebSocket error for {current_user}: {e}")
+        try:
+            _send(ws, server_error_frame(e))
+        except ConnectionClosed:
+            pass
+
+    print(f"🔌 Interview WebSocket closed for {current_user} (session {state['session_id']})")
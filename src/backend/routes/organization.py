@@ -9,6 +9,8 @@ import string
 from werkzeug.utils import secure_filename
 from werkzeug.security import generate_password_hash
 from config import interviews_collection
+from services.ai_engine_db import pregenerate_opening_async
+from services import token_ledger
 
 organization_bp = Blueprint("organization", __name__)
 
@@ -104,6 +106,7 @@ def schedule_interview():
         scheduled_interview["deadline"] = datetime.now() + timedelta(days=int(data["daysTimer"]))
     
     result = scheduled_interviews_collection.insert_one(scheduled_interview)
+    pregenerate_opening_async(result.inserted_id)
     
     interviews_collection.insert_one({
         "organizationId":   user_id,
@@ -236,6 +239,7 @@ def schedule_interview_resume():
         scheduled_interview["deadline"] = datetime.now() + timedelta(days=int(data.get("daysTimer", 2)))
     
     result = scheduled_interviews_collection.insert_one(scheduled_interview)
+    pregenerate_opening_async(result.inserted_id)
     
     # Print all scheduled interview details
     print("\n" + "="*80)
@@ -382,6 +386,8 @@ def update_interview(interview_id):
         )
         
         if result.modified_count > 0 or result.matched_count > 0:
+            if result.modified_count > 0:
+                pregenerate_opening_async(interview_id)
             return jsonify({"message": "Interview updated successfully"}), 200
         else:
             return jsonify({"error": "Interview not found"}), 404
@@ -409,6 +415,35 @@ def delete_interview(interview_id):
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@organization_bp.route("/token-usage", methods=["GET"])
+@jwt_required()
+def get_token_usage():
+    """Token usage of the organisation per feature over the last `days` (default 30)."""
+    user_id = get_jwt_identity()
+    user = organizations_collection.find_one({"_id": ObjectId(user_id)})
+    if not user or user.get("role") != "organization":
+        return jsonify({"error": "Unauthorized"}), 403
+
+    try:
+        days = int(request.args.get("days", 30))
+    except ValueError:
+        return jsonify({"error": "days must be a number"}), 400
+    since = datetime.utcnow() - timedelta(days=days)
+    return jsonify({"days": days, **token_ledger.organization_usage(user_id, since=since)}), 200
+
+@organization_bp.route("/interviews/<interview_id>/token-usage", methods=["GET"])
+@jwt_required()
+def get_interview_token_usage(interview_id):
+    user_id = get_jwt_identity()
+    user = organizations_collection.find_one({"_id": ObjectId(user_id)})
+    if not user or user.get("role") != "organization":
+        return jsonify({"error": "Unauthorized"}), 403
+
+    interview = scheduled_interviews_collection.find_one({"_id": ObjectId(interview_id), "organizationId": user_id}, {"_id": 1})
+    if not interview:
+        return jsonify({"error": "Interview not found"}), 404
+    return jsonify(token_ledger.interview_usage(interview_id)), 200
+
 @organization_bp.route("/candidates", methods=["GET"])
 @jwt_required()
 def get_candidates():
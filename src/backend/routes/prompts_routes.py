@@ -42,6 +42,8 @@ def update_prompt():
             "prompt_text": data.get('prompt_text'),
             "description": data.get('description')
         }
+        if 'settings' in data:
+            update_data["settings"] = data.get('settings')
         
         result = prompts_collection.update_one(
             {"_id": ObjectId(prompt_id)},
@@ -66,6 +68,8 @@ def update_prompt_by_id(prompt_id):
             "prompt_text": data.get('prompt_text'),
             "description": data.get('description')
         }
+        if 'settings' in data:
+            update_data["settings"] = data.get('settings')
         
         result = prompts_collection.update_one(
             {"_id": ObjectId(prompt_id)},
@@ -8,6 +8,7 @@ import uuid
 from config import screening_jobs_collection, screening_resumes_collection
 from services.resume_orchestrator import run_analysis
 from services.resume_ranker import generate_report
+from services import token_ledger
 
 resume_screening_bp = Blueprint("resume_screening", __name__)
 
@@ -209,6 +210,18 @@ def get_report(job_id):
     return jsonify(report), 200
 
 
+@resume_screening_bp.route("/reports/<job_id>/token-usage", methods=["GET"])
+@jwt_required()
+def get_report_token_usage(job_id):
+    """Token usage of a screening job's Gemini calls, per step."""
+    user_id = get_jwt_identity()
+
+    job = screening_jobs_collection.find_one({"_id": ObjectId(job_id), "userId": user_id}, {"_id": 1})
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(token_ledger.screening_usage(job_id)), 200
+
+
 # ===========================
 # 5. GET /api/history/jobs
 # ===========================
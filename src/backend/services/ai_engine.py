@@ -3,6 +3,7 @@ import uuid
 import os
 from config import GEMINI_API_KEY, scheduled_interviews_collection
 from bson.objectid import ObjectId
+from services import session_store
 
 genai.configure(api_key=GEMINI_API_KEY)
 print("GEMINI_API_KEY:", GEMINI_API_KEY)
@@ -11,8 +12,15 @@ print("GEMINI_API_KEY:", GEMINI_API_KEY)
 model = genai.GenerativeModel("gemini-2.5-flash")
 
 
-SESSIONS = {}
-print("SESSIONS:", SESSIONS)
+# Bounded, multi-worker session storage (see services/session_store)
+sessions = session_store.create("interview")
+
+
+def _session_chat(session):
+    """The session's live chat, rebuilt from its stored history on another worker."""
+    if "_chat" not in session:
+        session["_chat"] = session_store.chat_from_history(model, session["history"])
+    return session["_chat"]
 
 def create_session(config):
     print("\n" + "="*50)
@@ -80,12 +88,13 @@ Never tell Candidate about timing, Round types.
     first_question = response.text.strip()
     print(f"\n🎤 First Question Generated:\n{first_question}")
 
-    SESSIONS[session_id] = {
-        "chat": chat,
+    sessions.put(session_id, {
+        "_chat": chat,
+        "history": session_store.history_from_chat(chat),
         "answers": [],
         "questions": [first_question],
         "qa_pairs": [{"question": first_question, "answer": None}]
-    }
+    })
     
     print(f"\n✅ Session stored with {len(chat.history)} messages in history")
     print("="*50 + "\n")
@@ -99,11 +108,11 @@ def next_question(session_id, answer, timeRemaining, scheduledInterviewId):
     print(f"Session ID: {session_id}")
     print(f"Candidate Answer: {answer}")
     
-    if session_id not in SESSIONS:
+    session = sessions.get(session_id)
+    if session is None:
         print("❌ Session not found!")
         return "Session expired or invalid. Please restart the interview."
 
-    session = SESSIONS[session_id]
     session["answers"].append(answer)
     
     # Update the last Q&A pair with the answer
@@ -117,7 +126,7 @@ def next_question(session_id, answer, timeRemaining, scheduledInterviewId):
     #     print(f"     {msg.parts[0].text}")
 
     print(f"\n📝 Sending prompt to AI with candidate's answer...")
-    response = session["chat"].send_message(
+    response = _session_chat(session).send_message(
         f"""
 Candidate answer:
 {answer}
@@ -169,6 +178,8 @@ Do not give feedback.
     # Store the new question
     session["questions"].append(next_q)
     session["qa_pairs"].append({"question": next_q, "answer": None})
+    session["history"] = session_store.history_from_chat(_session_chat(session))
+    sessions.put(session_id, session)
     
     # print(f"\n📊 Updated Chat History ({len(session['chat'].history)} messages):")
     # for i, msg in enumerate(session['chat'].history):
@@ -185,7 +196,8 @@ def finish_interview(session_id, scheduledInterviewId):
     print("="*50)
     print(f"Session ID: {session_id}")
     
-    if session_id not in SESSIONS:
+    session = sessions.get(session_id)
+    if session is None:
         print("❌ Session not found!")
         return {
             "score": 0,
@@ -196,7 +208,6 @@ def finish_interview(session_id, scheduledInterviewId):
             "raw_result": None
         }
     
-    session = SESSIONS[session_id]
     violation_count = len(session.get("violations", []) or [])
 
     
@@ -235,7 +246,7 @@ Do not add extra text.
 """
     
     print(f"\n Sending Summary Prompt to AI:\n{summary_prompt}")
-    response = session["chat"].send_message(summary_prompt)
+    response = _session_chat(session).send_message(summary_prompt)
     result = response.text
 
     #Increase Tokens count with next question tokens
@@ -275,6 +286,7 @@ Do not add extra text.
     evaluation["qa_pairs"] = session["qa_pairs"]
     evaluation["raw_result"] = result
     
+    sessions.delete(session_id)
     print(f"\n✅ Session removed from memory")
     print(f"📋 Final Evaluation: {evaluation}")
     print("="*50 + "\n")
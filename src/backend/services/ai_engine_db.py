@@ -1,10 +1,36 @@
 import google.generativeai as genai
+import asyncio
+import hashlib
+import json
+import threading
 import uuid
 import os
-import pickle
+import time
 from datetime import datetime, timedelta
-from config import GEMINI_API_KEY, scheduled_interviews_collection, interview_sessions_collection
+from config import (
+    GEMINI_API_KEY,
+    SESSION_CACHE_SIZE,
+    SESSION_CACHE_TTL_SECONDS,
+    scheduled_interviews_collection,
+    interview_sessions_collection,
+    advisory_notes_collection
+)
 from services.prompt_service import PromptService
+from services.session_codec import SCHEMA_VERSION, encode_messages, decode_messages, migrate_session_doc
+from services.session_cache import SessionCache
+from services import session_store
+from services import prompt_cache
+from services import history_compaction
+from services import turn_scoring
+from services import question_bank
+from services import branch_prefetch
+from services import token_ledger
+from services import token_budget
+from services import answer_normalizer
+from services import llm_guard
+from services import model_router
+from services import proctoring
+from services.async_runtime import run_blocking, spawn
 from bson.objectid import ObjectId
 
 genai.configure(api_key=GEMINI_API_KEY)
@@ -15,17 +41,234 @@ model = genai.GenerativeModel("gemini-2.5-flash")
 # No longer using in-memory SESSIONS - using MongoDB instead
 print("Using MongoDB for session storage (multi-worker compatible)")
 
-def create_session(config):
-    print("\n" + "="*50)
-    print("🎯 CREATING NEW INTERVIEW SESSION")
-    print("="*50)
-    print(f"Interview Config: {config}")
-    
-    session_id = str(uuid.uuid4())
-    print(f"Generated Session ID: {session_id}")
+# Rebuilt chats are kept per worker and re-validated against the session version
+session_cache = SessionCache(max_size=SESSION_CACHE_SIZE, ttl_seconds=SESSION_CACHE_TTL_SECONDS)
+session_store.register("interview_db", session_cache)
+
+
+# ─── Turn log helpers ────────────────────────────────────────────────────────
+#
+# A session stores its chat as an append-only "turn_log". Each entry holds
+# one turn's messages packed by the session codec: turn 0 holds the system
+# prompt, the first-question prompt and the greeting, and every answered
+# question appends exactly one entry with its user and model messages, so
+# each write costs the same no matter how long the interview has been running.
+
+def _message(role, text):
+    return {"role": role, "text": text}
+
+
+def _log_entry(turn, messages):
+    return {"turn": turn, "data": encode_messages(messages)}
+
+
+def _load_history(session_doc, apply_compaction=True):
+    """
+    Decode the session's turn log into role/text messages, migrating
+    pickled or pre-codec sessions in place so later turns can simply
+    $push onto the log.
+
+    Turns folded by history compaction are replaced by the running summary
+    unless `apply_compaction` is False.
+    """
+    migrated = migrate_session_doc(session_doc)
+    if migrated:
+        # Only the first worker migrates; the others use the document it wrote
+        query = {"_id": session_doc["_id"]}
+        if "version" in migrated:
+            query["version"] = {"$exists": False}
+        result = interview_sessions_collection.update_one(
+            query,
+            {"$set": migrated, "$unset": {"chat_history": "", "qa_pairs": ""}}
+        )
+        if result.matched_count:
+            session_doc.update(migrated)
+            print(f"♻️ Migrated session {session_doc['_id']} to codec v{SCHEMA_VERSION} ({len(session_doc['turn_log'])} turns)")
+        else:
+            current = interview_sessions_collection.find_one({"_id": session_doc["_id"]})
+            if current:
+                session_doc.clear()
+                session_doc.update(current)
+
+    compaction = session_doc.get("compaction") if apply_compaction else None
+    history = []
+    for entry in session_doc["turn_log"]:
+        if compaction and 0 < entry["turn"] <= compaction["upto_turn"]:
+            continue
+        history.extend(decode_messages(entry["data"]))
+        if compaction and entry["turn"] == 0:
+            history.append(_message("user", history_compaction.summary_message(session_doc)))
+    return history
+
+
+def _session_model(prompt_cache_key):
+    """
+    Model for a session: sessions started with a cached system-prompt prefix
+    use it as system instruction; older sessions carry the full prompt in history.
+    """
+    return prompt_cache.get_model(prompt_cache_key) if prompt_cache_key else model
+
+
+def _rebuild_chat(history, prompt_cache_key=None):
+    """Recreate a chat object from decoded history messages."""
+    return _session_model(prompt_cache_key).start_chat(history=[
+        {"role": message["role"], "parts": [message["text"]]} for message in history
+    ])
+
+
+def _session_version(session_id):
+    """Cheap projected read of the session's version (None if the session is gone)."""
+    head = interview_sessions_collection.find_one({"_id": session_id}, {"version": 1})
+    return head.get("version", 0) if head else None
+
+
+def _get_session(session_id):
+    """
+    Return (session, chat) for a session, or (None, None) if it does not exist.
+
+    `session` is the session document without its turn log. The chat is
+    served from the worker-local cache when its version still matches
+    MongoDB; otherwise the full document is loaded and the chat rebuilt.
+    """
+    cached = session_cache.get(session_id, current_version=lambda: _session_version(session_id))
+    if cached:
+        return cached["session"], cached["chat"]
+
+    session_doc = interview_sessions_collection.find_one({"_id": session_id})
+    if not session_doc:
+        return None, None
+
+    chat = _rebuild_chat(_load_history(session_doc), session_doc.get("prompt_cache_key"))
+    session_doc.pop("turn_log", None)
+    session_doc.setdefault("version", 0)
+    session_cache.put(session_id, session_doc["version"], {"session": session_doc, "chat": chat})
+    return session_doc, chat
+
+
+def _record_tokens(scheduledInterviewId, usage, tokens_saved=0, session_id=None):
+    """
+    Add a call to the token ledger. The ledger flushes in batches and keeps
+    the scheduled interview's `tokens`, `cachedTokens` and
+    `compactionTokensSaved` counters up to date, so no call waits on a write.
+    """
+    token_ledger.record(
+        usage.get("call", "interview"),
+        usage,
+        scheduled_interview_id=scheduledInterviewId,
+        session_id=session_id,
+        tokens_saved=tokens_saved
+    )
+
+
+def _discard_prefetch(session_id, scheduledInterviewId):
+    """Drop a session's branch prefetch, recording the branches that already ran."""
+    for usage in branch_prefetch.discard(session_id):
+        _record_tokens(scheduledInterviewId, {"call": "prefetch", **usage}, session_id=session_id)
+
+
+def _record_late_prefetch(session_id, scheduledInterviewId):
+    """record_late callback for a session's prefetch (branches that finish after it was dropped)."""
+    return lambda usage: _record_tokens(scheduledInterviewId, {"call": "prefetch", **usage}, session_id=session_id)
+
+
+def _elapsed_ms(started):
+    return round((time.perf_counter() - started) * 1000)
+
+
+def _usage_summary(usage_log):
+    """Totals over a session's per-call usage records."""
+    summary = {"calls": len(usage_log), "prompt_tokens": 0, "cached_tokens": 0, "output_tokens": 0, "total_tokens": 0}
+    for usage in usage_log:
+        for field in ("prompt_tokens", "cached_tokens", "output_tokens", "total_tokens"):
+            summary[field] += usage.get(field) or 0
+    return summary
+
+
+def _compact_session(session_id, session_doc, scheduledInterviewId):
+    """Fold older turns into the running summary, then reload the compacted chat."""
+    try:
+        compaction, usage = history_compaction.compact(session_doc, model)
+    except Exception as e:
+        print(f"History compaction failed, replaying full history: {e}")
+        return _get_session(session_id)
+    return _store_compaction(session_id, compaction, usage, scheduledInterviewId)
+
 
-    # Get system prompt from database
-    system_prompt = PromptService.get_system_prompt(
+async def _compact_session_async(session_id, session_doc, scheduledInterviewId):
+    """_compact_session with the summarisation awaited."""
+    try:
+        compaction, usage = await history_compaction.compact_async(session_doc, model)
+    except Exception as e:
+        print(f"History compaction failed, replaying full history: {e}")
+        return await run_blocking(_get_session, session_id)
+    return await run_blocking(_store_compaction, session_id, compaction, usage, scheduledInterviewId)
+
+
+def _store_compaction(session_id, compaction, usage, scheduledInterviewId):
+    interview_sessions_collection.update_one(
+        {"_id": session_id},
+        {
+            "$set": {"compaction": compaction},
+            "$push": {"usage": usage},
+            "$inc": {"version": 1}
+        }
+    )
+    _record_tokens(scheduledInterviewId, usage, session_id=session_id)
+    session_cache.invalidate(session_id)
+    return _get_session(session_id)
+
+
+def _drop_session_state(session_id, hot=None):
+    """Forget every in-memory copy of a session so the next turn reloads it."""
+    session_cache.invalidate(session_id)
+    if hot is not None:
+        hot.clear()
+
+
+def load_session(session_id):
+    """Public (session, chat) accessor for long-lived transports; (None, None) if gone."""
+    return _get_session(session_id)
+
+
+def load_owned_session(session_id, candidate_id):
+    """
+    load_session for a candidate resuming an interview: (None, None) unless
+    the session was created by `candidate_id` (the JWT identity).
+    """
+    session_doc, chat = _get_session(session_id)
+    if not session_doc or session_doc.get("candidate_id") != candidate_id:
+        return None, None
+    return session_doc, chat
+
+
+def get_session_cache_stats():
+    return session_cache.stats()
+
+
+def get_session_store_stats():
+    """Size, eviction and write-behind metrics of every engine's session store."""
+    return session_store.stats()
+
+
+def _build_qa_pairs(session_doc):
+    """Pair every asked question with its answer (None for the open question)."""
+    answers = session_doc.get("answers", [])
+    return [
+        {"question": question, "answer": answers[i] if i < len(answers) else None}
+        for i, question in enumerate(session_doc.get("questions", []))
+    ]
+
+
+def _opening_context(config):
+    """
+    Render everything a new session needs before its first model call:
+    candidate profile, system instruction (and its prompt-cache key),
+    turn protocol, scoring settings and the first-question prompt.
+    `fingerprint` changes whenever any of them would change the opening.
+    """
+    # Get system prompt from database, split into the invariant (cacheable)
+    # prefix and the candidate-specific profile that follows it
+    static_prefix, candidate_profile = PromptService.get_system_prompt_parts(
         candidateName=config.get('candidateName'),
         role=config.get('role'),
         natureOfRole = config.get('natureOfRole'),
@@ -40,10 +283,56 @@ def create_session(config):
         duration=config.get('duration')
     )
     
-    print(f"\n📋 System Prompt:\n{system_prompt}")
+    # Static next-question rules join the system instruction once, so each
+    # turn only carries the answer payload ("compact" turn protocol)
+    turn_rules = PromptService.get_next_question_rules()
+    
+    # Optional per-answer score trailer, aggregated by finish_interview
+    scoring_settings = turn_scoring.load_settings()
+    scoring_rules = PromptService.get_turn_scoring_rules() if scoring_settings else None
+    
+    system_instruction = "\n\n".join(
+        part.strip() for part in (static_prefix, turn_rules, scoring_rules) if part and part.strip()
+    )
+
+    # Model tiers: the opening may use a lighter model than the interview turns
+    organization_id = model_router.organization_of(config.get("scheduledInterviewId"))
+    routes = {task: model_router.route(task, organization_id) for task in ("first_question", "next_question", "summary")}
+    prompt_cache_key, opening_cache_key = None, None
+    if system_instruction:
+        prompt_cache_key = prompt_cache.prefix_key(system_instruction, routes["next_question"]["model"])
+        opening_cache_key = prompt_cache.prefix_key(system_instruction, routes["first_question"]["model"])
+    first_question_prompt = PromptService.get_first_question_prompt()
+
+    fingerprint = hashlib.sha256("\n\0".join(
+        (prompt_cache_key or "", candidate_profile, first_question_prompt, json.dumps(routes["first_question"], sort_keys=True))
+    ).encode("utf-8")).hexdigest()[:32]
+
+    return {
+        "candidate_profile": candidate_profile,
+        "system_instruction": system_instruction,
+        "prompt_cache_key": prompt_cache_key,
+        "opening_cache_key": opening_cache_key,
+        "model_routes": routes,
+        "turn_protocol": "compact" if turn_rules else "full",
+        "turn_scoring": scoring_settings,
+        "first_question_prompt": first_question_prompt,
+        "fingerprint": fingerprint
+    }
+
+
+def _opening_model(opening):
+    # The static instruction is context-cached and shared by all interviews
+    if opening["opening_cache_key"]:
+        return prompt_cache.get_model(opening["opening_cache_key"], opening["system_instruction"],
+                                      opening["model_routes"]["first_question"]["model"])
+    return model
 
-    chat = model.start_chat(history=[
-        {"role": "user", "parts": [system_prompt]}
+
+def _generate_opening(opening):
+    """Live Gemini round trip for the greeting and first question. Returns (chat, first_question, usage)."""
+    chat = _opening_model(opening).start_chat(history=[
+        {"role": "user", "parts": [opening["candidate_profile"]]}
     ])
 
     print("\n💬 Initial Chat History:")
@@ -51,172 +340,1023 @@ def create_session(config):
         print(f"  {i+1}. Role: {msg.role}")
         print(f"     Content: {msg.parts[0].text[:100]}...")
 
-    # Get first question prompt from database
-    first_question_prompt = PromptService.get_first_question_prompt()
-    response = chat.send_message(first_question_prompt)
+    started = time.perf_counter()
+    first_route = opening["model_routes"]["first_question"]
+    response = llm_guard.send(chat, opening["first_question_prompt"], "first_question",
+                              generation_config=model_router.generation_config(first_route))
+    return chat, response.text.strip(), _opening_usage(first_route, response, started)
+
 
-    # Update Tokens in scheduledInterviewsCollection
-    print("Start Input Tokens", response.usage_metadata.total_token_count)
+async def _generate_opening_async(opening):
+    """_generate_opening with the Gemini round trip awaited."""
+    chat = _opening_model(opening).start_chat(history=[
+        {"role": "user", "parts": [opening["candidate_profile"]]}
+    ])
+    started = time.perf_counter()
+    first_route = opening["model_routes"]["first_question"]
+    response = await llm_guard.send_async(chat, opening["first_question_prompt"], "first_question",
+                                          generation_config=model_router.generation_config(first_route))
+    return chat, response.text.strip(), _opening_usage(first_route, response, started)
+
+
+def _opening_usage(first_route, response, started):
+    return {
+        "call": "first_question",
+        "turn": 0,
+        "model": first_route["model"],
+        **prompt_cache.usage_from_response(response),
+        "latency_ms": _elapsed_ms(started)
+    }
+
+
+# ─── Opening pre-generation ──────────────────────────────────────────────────
+#
+# When an interview is scheduled, the greeting and first question are
+# generated in the background and stored on the scheduled interview
+# ("opening"). start-interview then only rebuilds the chat locally. The
+# stored opening is used only while its fingerprint matches the live
+# prompts and profile and it has not expired; otherwise the live path runs.
+
+OPENING_TTL = timedelta(days=14)
+
+# Scheduled-interview field -> interview config field
+SCHEDULED_CONFIG_FIELDS = {
+    "candidateName": "candidateName",
+    "position": "role",
+    "natureOfPosition": "natureOfRole",
+    "educationalQualification": "educationalQualification",
+    "pastWorkExperienceYears": "pastYearsExperience",
+    "pastWorkExperienceField": "pastYearsExperienceField",
+    "currentWorkExperienceYears": "currentYearExperience",
+    "currentWorkExperienceField": "currentYearExperienceField",
+    "coreSkillSet": "coreSkillSet",
+    "typeOfCompany": "typeOfCompany",
+    "interviewType": "interviewType",
+    "duration": "duration",
+}
+
+
+def pregenerate_opening(scheduledInterviewId):
+    """Generate and store the opening for a scheduled interview."""
     try:
+        scheduled = scheduled_interviews_collection.find_one({"_id": ObjectId(scheduledInterviewId)})
+        if not scheduled:
+            return
+        config = {target: scheduled.get(source) for source, target in SCHEDULED_CONFIG_FIELDS.items()}
+        opening = _opening_context(config)
+        _, first_question, usage = _generate_opening(opening)
+        _record_tokens(scheduledInterviewId, {**usage, "call": "opening_pregeneration"})
         scheduled_interviews_collection.update_one(
-            {"_id": ObjectId(config.get("scheduledInterviewId"))},
-            {"$set": {"tokens": response.usage_metadata.total_token_count}})
+            {"_id": scheduled["_id"]},
+            {"$set": {"opening": {
+                "first_question": first_question,
+                "usage": usage,
+                "fingerprint": opening["fingerprint"],
+                "generated_at": datetime.utcnow(),
+                "expires_at": datetime.utcnow() + OPENING_TTL
+            }}}
+        )
+        print(f"🧾 Pre-generated opening for scheduled interview {scheduledInterviewId}")
     except Exception as e:
-        print(e)
-        print("Failed to update tokens in scheduledInterviewsCollection")
+        print(f"Opening pre-generation failed for {scheduledInterviewId}: {e}")
+
+
+def pregenerate_opening_async(scheduledInterviewId):
+    """Run pregenerate_opening in a background thread (scheduling requests don't wait on Gemini)."""
+    threading.Thread(
+        target=pregenerate_opening,
+        args=(str(scheduledInterviewId),),
+        name="opening-pregen",
+        daemon=True
+    ).start()
+
+
+def _stored_opening(scheduledInterviewId, fingerprint):
+    """The pre-generated opening if it exists, matches the live fingerprint and is unexpired."""
+    if not scheduledInterviewId:
+        return None
+    try:
+        scheduled = scheduled_interviews_collection.find_one({"_id": ObjectId(scheduledInterviewId)}, {"opening": 1})
+    except Exception:
+        return None
+    stored = (scheduled or {}).get("opening")
+    if not stored:
+        return None
+    if stored["fingerprint"] != fingerprint or stored["expires_at"] < datetime.utcnow():
+        print("Pre-generated opening is stale, generating live")
+        return None
+    return stored
+
+
+def _begin_session(config):
+    """New session id, opening context and the usable pre-generated opening (or None)."""
+    print("\n" + "="*50)
+    print("🎯 CREATING NEW INTERVIEW SESSION")
+    print("="*50)
+    print(f"Interview Config: {config}")
+    
+    session_id = str(uuid.uuid4())
+    print(f"Generated Session ID: {session_id}")
+
+    opening = _opening_context(config)
+    print(f"\n📋 System Instruction:\n{opening['system_instruction']}")
+    print(f"\n👤 Candidate Profile:\n{opening['candidate_profile']}")
+
+    return session_id, opening, _stored_opening(config.get("scheduledInterviewId"), opening["fingerprint"])
+
+
+def create_session(config, candidate_id=None):
+    """Start an interview for `candidate_id` (the JWT identity that owns the session)."""
+    session_id, opening, stored = _begin_session(config)
+    generated = None if stored else _generate_opening(opening)
+    return _store_session(session_id, config, candidate_id, opening, stored, generated)
+
+
+async def create_session_async(config, candidate_id=None):
+    """create_session for the ASGI entry point: a live opening is awaited, MongoDB steps run on the pool."""
+    session_id, opening, stored = await run_blocking(_begin_session, config)
+    generated = None if stored else await _generate_opening_async(opening)
+    return await run_blocking(_store_session, session_id, config, candidate_id, opening, stored, generated)
+
+
+def _store_session(session_id, config, candidate_id, opening, stored, generated):
+    """Create the session document from a pre-generated (`stored`) or live (`generated`) opening."""
+    candidate_profile = opening["candidate_profile"]
+    first_question_prompt = opening["first_question_prompt"]
+
+    if stored:
+        # Opening was generated at schedule time; rebuild the chat without a model call
+        first_question, usage = stored["first_question"], stored["usage"]
+        chat = _rebuild_chat([
+            _message("user", candidate_profile),
+            _message("user", first_question_prompt),
+            _message("model", first_question)
+        ], opening["prompt_cache_key"])
+        print("⚡ Using pre-generated opening")
+    else:
+        chat, first_question, usage = generated
+        if opening["opening_cache_key"] != opening["prompt_cache_key"]:
+            # The opening ran on its own tier; turns continue on the interview model
+            chat = _rebuild_chat([
+                _message("user", candidate_profile),
+                _message("user", first_question_prompt),
+                _message("model", first_question)
+            ], opening["prompt_cache_key"])
+        # Counters accumulate across restarts of the same scheduled interview
+        print("Start Input Tokens", usage["total_tokens"], "| Cached", usage["cached_tokens"])
+        _record_tokens(config.get("scheduledInterviewId"), usage, session_id=session_id)
     
-    first_question = response.text.strip()
     print(f"\n🎤 First Question Generated:\n{first_question}")
 
     # Store session in MongoDB instead of memory
     session_data = {
         "_id": session_id,
-        "chat_history": pickle.dumps(chat.history),  # Serialize chat history
+        "candidate_id": candidate_id,
+        "turn_log": [_log_entry(0, [
+            _message("user", candidate_profile),
+            _message("user", first_question_prompt),
+            _message("model", first_question)
+        ])],
+        "turn_count": 0,
+        "version": 0,
+        "prompt_cache_key": opening["prompt_cache_key"],
+        "model_routes": {task: opening["model_routes"][task] for task in ("next_question", "summary")},
+        "turn_protocol": opening["turn_protocol"],
+        "compaction_settings": history_compaction.load_settings(),
+        "turn_scoring": opening["turn_scoring"],
+        "question_bank": question_bank.session_state(config),
+        # Branches are written for hypothetical answers, so scored sessions answer live
+        "prefetch": None if opening["turn_scoring"] else branch_prefetch.load_settings(),
+        "budget": token_budget.session_state(config),
+        "candidate_profile": candidate_profile,
+        # Interview fields only, for replay fixtures (benchmarks/replay_bench)
+        "config": {field: config.get(field) for field in SCHEDULED_CONFIG_FIELDS.values()},
         "answers": [],
         "questions": [first_question],
-        "qa_pairs": [{"question": first_question, "answer": None}],
+        "usage": [usage],
         "created_at": datetime.utcnow(),
         "expires_at": datetime.utcnow() + timedelta(hours=2)  # Auto-expire after 2 hours
     }
     
     interview_sessions_collection.insert_one(session_data)
+
+    session_data.pop("turn_log")
+    session_cache.put(session_id, 0, {"session": session_data, "chat": chat})
+    _start_prefetch(session_id, session_data, chat, None, config.get("scheduledInterviewId"))
     
     print(f"\n✅ Session stored in MongoDB with {len(chat.history)} messages in history")
     print("="*50 + "\n")
 
     return session_id, first_question
 
-def next_question(session_id, answer, timeRemaining, scheduledInterviewId):
-    print("\n" + "="*50)
-    print("🔄 PROCESSING NEXT QUESTION")
-    print("="*50)
-    print(f"Session ID: {session_id}")
-    print(f"Candidate Answer: {answer}")
+# ─── Idempotent turns ────────────────────────────────────────────────────────
+#
+# A turn is identified by (session_id, turn_index) and carries the client's
+# idempotency key. Before any model call the turn is claimed with a
+# conditional write on the session version ("inflight"); the commit only
+# succeeds for the claim holder at the expected version. A retry of a
+# completed turn with the same key replays the stored question, a retry of
+# an in-flight turn waits for it, and any other concurrent writer gets a
+# TurnConflictError (HTTP 409).
+
+INFLIGHT_TIMEOUT = timedelta(seconds=120)
+REPLAY_WAIT_SECONDS = 60
+REPLAY_POLL_SECONDS = 0.25
+
+
+class TurnConflictError(Exception):
+    """The turn was answered, or is being answered, by a different request."""
+
+
+def _turn_head(session_id, turn_index):
+    """Version, progress, in-flight claim and the stored result of one turn."""
+    return interview_sessions_collection.find_one(
+        {"_id": session_id},
+        {
+            "version": 1,
+            "turn_count": 1,
+            "inflight": 1,
+            "questions": {"$slice": [turn_index, 1]},
+            "turn_keys": {"$slice": [turn_index - 1, 1]}
+        }
+    )
+
+
+def _stored_turn(head, turn_index, idempotency_key):
+    """The stored question of an answered turn if it was answered by this request."""
+    stored_keys = head.get("turn_keys") or [None]
+    if idempotency_key and stored_keys[0] == idempotency_key and head.get("questions"):
+        print(f"↩️ Replaying stored turn {turn_index}")
+        return head["questions"][0]
+    raise TurnConflictError(f"Turn {turn_index} was already answered")
+
+
+def _claim_turn(session_id, version, turn_index, idempotency_key):
+    """Atomically mark the turn as in flight. Returns the claim id, or None if someone else holds the session."""
+    claim_id = uuid.uuid4().hex
+    now = datetime.utcnow()
+    result = interview_sessions_collection.update_one(
+        {
+            "_id": session_id,
+            "version": version,
+            "turn_count": turn_index - 1,
+            "$or": [{"inflight": None}, {"inflight.at": {"$lt": now - INFLIGHT_TIMEOUT}}]
+        },
+        {"$set": {"inflight": {"turn": turn_index, "key": idempotency_key, "claim": claim_id, "at": now}}}
+    )
+    return claim_id if result.matched_count else None
+
+
+def _release_turn(ctx):
+    """Drop a claim after a failed turn so the client can retry it."""
+    interview_sessions_collection.update_one(
+        {"_id": ctx["session_id"], "inflight.claim": ctx["claim_id"]},
+        {"$unset": {"inflight": ""}}
+    )
+
+
+def _awaited_turn(head, turn_index, idempotency_key):
+    """One poll of a duplicate's wait: (finished, question)."""
+    if not head:
+        return True, None
+    if head.get("turn_count", 0) >= turn_index:
+        return True, _stored_turn(head, turn_index, idempotency_key)
+    if (head.get("inflight") or {}).get("key") != idempotency_key:
+        # the original attempt failed; the client may retry
+        raise TurnConflictError(f"Turn {turn_index} is still being processed")
+    return False, None
+
+
+def _await_turn(session_id, turn_index, idempotency_key):
+    """Wait for the in-flight duplicate of this request to finish and return its question."""
+    deadline = time.monotonic() + REPLAY_WAIT_SECONDS
+    while time.monotonic() < deadline:
+        time.sleep(REPLAY_POLL_SECONDS)
+        finished, question = _awaited_turn(_turn_head(session_id, turn_index), turn_index, idempotency_key)
+        if finished:
+            return question
+    raise TurnConflictError(f"Turn {turn_index} is still being processed")
+
+
+async def _await_turn_async(session_id, turn_index, idempotency_key):
+    """_await_turn without holding a thread between polls."""
+    deadline = time.monotonic() + REPLAY_WAIT_SECONDS
+    while time.monotonic() < deadline:
+        await asyncio.sleep(REPLAY_POLL_SECONDS)
+        head = await run_blocking(_turn_head, session_id, turn_index)
+        finished, question = _awaited_turn(head, turn_index, idempotency_key)
+        if finished:
+            return question
+    raise TurnConflictError(f"Turn {turn_index} is still being processed")
+
+
+def _load_turn_session(session_id, hot):
+    if hot and hot.get("session"):
+        return hot["session"], hot["chat"]
+    # Retrieve session (worker cache, else MongoDB)
+    return _get_session(session_id)
+
+
+def _claim_turn_session(session_id, hot, turn_index, idempotency_key):
+    """
+    Load the session and claim the turn. Returns {"session_doc", "chat",
+    "turn", "claim_id"} for a claimed turn, {"replay", "turn"} for a
+    duplicate of an answered turn, {"duplicate": turn} when the same
+    request is still in flight, or None if the session does not exist.
+    Raises TurnConflictError when another request owns the turn.
+    """
+    for attempt in range(2):
+        session_doc, chat = _load_turn_session(session_id, hot)
+        
+        if not session_doc or session_doc.get("closed"):
+            print("❌ Session not found in MongoDB!")
+            return None
+        
+        turn = session_doc.get("turn_count", 0) + 1
+        turn_index = int(turn_index or turn)
+        if turn_index < turn:
+            return {"replay": _stored_turn(_turn_head(session_id, turn_index), turn_index, idempotency_key), "turn": turn_index}
+        
+        claim_id = _claim_turn(session_id, session_doc["version"], turn_index, idempotency_key)
+        if claim_id:
+            return {"session_doc": session_doc, "chat": chat, "turn": turn_index, "claim_id": claim_id}
+        
+        head = _turn_head(session_id, turn_index)
+        if not head:
+            return None
+        if head.get("turn_count", 0) >= turn_index:
+            _drop_session_state(session_id, hot)
+            return {"replay": _stored_turn(head, turn_index, idempotency_key), "turn": turn_index}
+        inflight = head.get("inflight") or {}
+        if idempotency_key and inflight.get("turn") == turn_index and inflight.get("key") == idempotency_key:
+            return {"duplicate": turn_index}
+        if inflight or head.get("turn_count", 0) != turn_index - 1:
+            raise TurnConflictError(f"Turn {turn_index} is being answered by another request")
+        # Our copy of the session is behind MongoDB: reload once and claim again
+        _drop_session_state(session_id, hot)
+    raise TurnConflictError(f"Session {session_id} changed while claiming turn {turn_index}")
+
+
+def _turn_context(claimed, session_id, answer, timeRemaining, scheduledInterviewId, idempotency_key):
+    """The context of a claimed turn with its prompt; budget, bank and prefetch steps fill in the rest."""
+    session_doc = claimed["session_doc"]
     
-    # Retrieve session from MongoDB
-    session_doc = interview_sessions_collection.find_one({"_id": session_id})
+    # The model sees the compact answer; the original is stored for qa_pairs
+    model_answer, answer_stats = answer_normalizer.normalize(answer)
+    if answer_stats["tokens_saved"]:
+        print(f"✂️ Answer compacted: ~{answer_stats['original_tokens']} → ~{answer_stats['compact_tokens']} tokens")
     
-    if not session_doc:
-        print("❌ Session not found in MongoDB!")
-        return "Session expired or invalid. Please restart the interview."
+    if session_doc.get("turn_protocol") == "compact":
+        # Rules already live in the system instruction
+        turn_prompt = PromptService.format_turn_payload(model_answer, timeRemaining)
+    else:
+        # Get next question prompt from database
+        turn_prompt = PromptService.get_next_question_prompt(
+            answer=model_answer,
+            time_remaining=timeRemaining
+        )
     
-    # Deserialize chat history and recreate chat object
-    chat_history = pickle.loads(session_doc["chat_history"])
-    chat = model.start_chat(history=chat_history)
+    return {
+        "session_id": session_id,
+        "session_doc": session_doc,
+        "chat": claimed["chat"],
+        "turn": claimed["turn"],
+        "claim_id": claimed["claim_id"],
+        "idempotency_key": idempotency_key,
+        "turn_prompt": turn_prompt,
+        "answer": answer,
+        "model_answer": model_answer,
+        "answer_tokens_saved": answer_stats["tokens_saved"],
+        "scheduledInterviewId": scheduledInterviewId,
+        "bank_question": None,
+        "bank_state": None,
+        "prefetched": None,
+        "budget_stage": None,
+        "budget_reply": None,
+        "time_remaining": timeRemaining,
+        "started_at": time.perf_counter()
+    }
+
+
+def _apply_budget_stage(ctx, budget_stage):
+    """Token budget: wrap the interview up before its ceiling is reached."""
+    ctx["budget_stage"] = budget_stage
+    instruction = token_budget.stage_instruction(budget_stage)
+    if instruction:
+        ctx["turn_prompt"] = f"{ctx['turn_prompt']}\n\n{instruction}"
+    if budget_stage == token_budget.EXHAUSTED:
+        ctx["budget_reply"] = ctx["session_doc"]["budget"]["settings"]["closing_message"]
+
+
+def _plan_local_turn(ctx):
+    """
+    Question bank and prefetch bookkeeping of a turn. Returns True when
+    the turn should be served from the session's prefetched branches.
+    """
+    session_id, session_doc = ctx["session_id"], ctx["session_doc"]
+    wrapping_up = ctx["budget_stage"] not in (None, token_budget.NORMAL)
     
-    # Update session data
-    session_doc["answers"].append(answer)
+    # Question bank: weak/strong answers are served a pool question locally
+    if session_doc.get("question_bank") and not wrapping_up:
+        ctx["bank_question"], ctx["bank_state"] = question_bank.plan_turn(
+            session_doc["question_bank"], ctx["model_answer"], ctx["time_remaining"]
+        )
     
-    # Update the last Q&A pair with the answer
-    if session_doc["qa_pairs"]:
-        session_doc["qa_pairs"][-1]["answer"] = answer
+    # Branch prefetch: serve the follow-up generated while the candidate answered
+    if not session_doc.get("prefetch"):
+        return False
+    if ctx["bank_question"] or wrapping_up:
+        _discard_prefetch(session_id, ctx["scheduledInterviewId"])
+        return False
+    return True
+
+
+def _prepare_turn(session_id, answer, timeRemaining, scheduledInterviewId, hot=None,
+                  turn_index=None, idempotency_key=None):
+    """
+    Load the session, claim the turn and build this turn's prompt.
+    Returns a turn context dict, {"replay": question, "turn"} for a duplicate of an
+    already answered turn, or None if the session does not exist.
+    Raises TurnConflictError when another request owns the turn.
 
-    print(f"\n📝 Sending prompt to AI with candidate's answer...")
+    `hot` is a {"session", "chat"} dict owned by a long-lived connection
+    (the interview WebSocket); when filled it is used as-is instead of
+    re-validating the session against MongoDB, and it is kept up to date.
+    """
+    claimed = _claim_turn_session(session_id, hot, turn_index, idempotency_key)
+    if claimed and "duplicate" in claimed:
+        question = _await_turn(session_id, claimed["duplicate"], idempotency_key)
+        _drop_session_state(session_id, hot)
+        return {"replay": question, "turn": claimed["duplicate"]} if question else None
+    if not claimed or "replay" in claimed:
+        return claimed
     
-    # Get next question prompt from database
-    next_question_prompt = PromptService.get_next_question_prompt(
-        answer=answer,
-        time_remaining=timeRemaining
-    )
+    if history_compaction.needs_compaction(claimed["session_doc"]):
+        claimed["session_doc"], claimed["chat"] = _compact_session(session_id, claimed["session_doc"], scheduledInterviewId)
+    if hot is not None:
+        hot.update(session=claimed["session_doc"], chat=claimed["chat"])
     
-    response = chat.send_message(next_question_prompt)
+    ctx = _turn_context(claimed, session_id, answer, timeRemaining, scheduledInterviewId, idempotency_key)
+    if ctx["session_doc"].get("budget"):
+        budget_stage, _ = token_budget.plan_turn(
+            ctx["session_doc"]["budget"], ctx["session_doc"], ctx["chat"], ctx["turn_prompt"], ctx["model_answer"]
+        )
+        _apply_budget_stage(ctx, budget_stage)
+    if _plan_local_turn(ctx):
+        ctx["prefetched"] = _take_prefetch(session_id, ctx["session_doc"], ctx["model_answer"], scheduledInterviewId)
+    ctx["started_at"] = time.perf_counter()
+    return ctx
+
 
-    next_q = response.text.strip()
-    print("Next Question Tokens", response.usage_metadata.total_token_count)
+async def _prepare_turn_async(session_id, answer, timeRemaining, scheduledInterviewId, hot=None,
+                              turn_index=None, idempotency_key=None):
+    """
+    _prepare_turn for the async turns. MongoDB steps run on the blocking
+    pool; the Gemini-bound steps (duplicate wait, compaction, budget
+    count_tokens, answer classifier, prefetch wait) are awaited, so a
+    turn holds a pool thread only for its MongoDB round trips.
+    """
+    claimed = await run_blocking(_claim_turn_session, session_id, hot, turn_index, idempotency_key)
+    if claimed and "duplicate" in claimed:
+        question = await _await_turn_async(session_id, claimed["duplicate"], idempotency_key)
+        _drop_session_state(session_id, hot)
+        return {"replay": question, "turn": claimed["duplicate"]} if question else None
+    if not claimed or "replay" in claimed:
+        return claimed
+    
+    if history_compaction.needs_compaction(claimed["session_doc"]):
+        claimed["session_doc"], claimed["chat"] = await _compact_session_async(
+            session_id, claimed["session_doc"], scheduledInterviewId
+        )
+    if hot is not None:
+        hot.update(session=claimed["session_doc"], chat=claimed["chat"])
     
-    # Increase Tokens count with next question tokens
+    ctx = await run_blocking(_turn_context, claimed, session_id, answer, timeRemaining, scheduledInterviewId,
+                             idempotency_key)
+    if ctx["session_doc"].get("budget"):
+        budget_stage, _ = await token_budget.plan_turn_async(
+            ctx["session_doc"]["budget"], ctx["session_doc"], ctx["chat"], ctx["turn_prompt"], ctx["model_answer"]
+        )
+        await run_blocking(_apply_budget_stage, ctx, budget_stage)
+    if await run_blocking(_plan_local_turn, ctx):
+        ctx["prefetched"] = await _take_prefetch_async(session_id, ctx["session_doc"], ctx["model_answer"],
+                                                       scheduledInterviewId)
+    ctx["started_at"] = time.perf_counter()
+    return ctx
+
+
+def _session_route(session_doc, task):
+    """The route the session resolved for `task` at creation (None for sessions created before routing)."""
+    return (session_doc.get("model_routes") or {}).get(task)
+
+
+def _route_config(session_doc, task):
+    return model_router.generation_config(_session_route(session_doc, task))
+
+
+def _summary_model(session_doc):
+    """(model, route) for the stateless evaluation calls of a session."""
+    summary_route = _session_route(session_doc, "summary")
+    return (model_router.get_model(summary_route) if summary_route else model), summary_route
+
+
+def _guard_tags(ctx):
+    """Ledger tags for a hedged turn's losing request."""
+    return {"scheduled_interview_id": ctx["scheduledInterviewId"], "session_id": ctx["session_id"]}
+
+
+def _local_reply(ctx):
+    """
+    Serve a question that is already known (question bank, prefetched
+    branch or the budget closing message) without a model call: the
+    exchange is appended to the chat history so later live turns see it.
+    Returns (reply, usage_fields).
+    """
+    if ctx["budget_reply"]:
+        reply = ctx["budget_reply"]
+        usage_fields = {"prompt_tokens": 0, "cached_tokens": 0, "output_tokens": 0, "total_tokens": 0, "source": "budget"}
+    elif ctx["bank_question"]:
+        reply = ctx["bank_question"]["text"]
+        usage_fields = {"prompt_tokens": 0, "cached_tokens": 0, "output_tokens": 0, "total_tokens": 0, "source": "question_bank"}
+    else:
+        reply = ctx["prefetched"]["question"]
+        usage_fields = {**ctx["prefetched"]["usage"], "source": "prefetch", "branch": ctx["prefetched"]["branch"]}
+    ctx["chat"].history = list(ctx["chat"].history) + [
+        {"role": "user", "parts": [ctx["turn_prompt"]]},
+        {"role": "model", "parts": [reply]}
+    ]
+    return reply, usage_fields
+
+
+def _start_prefetch(session_id, session_doc, chat, time_remaining, scheduledInterviewId):
+    """Prefetch the follow-ups of the question just shown, if the session uses branch prefetch."""
+    settings = session_doc.get("prefetch")
+    if not settings or session_doc.get("turn_scoring"):
+        return
+    if (session_doc.get("budget") or {}).get("stage", token_budget.NORMAL) != token_budget.NORMAL:
+        return
     try:
-        scheduled_interviews_collection.update_one(
-            {"_id": ObjectId(scheduledInterviewId)},
-            {"$inc": {"tokens": response.usage_metadata.total_token_count}})
+        if time_remaining is not None and float(time_remaining) < settings["min_time_remaining"]:
+            stale = branch_prefetch.discard(session_id)
+        else:
+            stale = branch_prefetch.start(
+                session_id,
+                session_doc.get("turn_count", 0),
+                _session_model(session_doc.get("prompt_cache_key")),
+                chat.history,
+                record_late=_record_late_prefetch(session_id, scheduledInterviewId)
+            )
     except Exception as e:
-        print(e)
-        print("Failed to update tokens in scheduledInterviewsCollection")
+        print(f"Branch prefetch could not start for session {session_id}: {e}")
+        return
+    # Branches of an unused prefetch still cost tokens
+    for usage in stale:
+        _record_tokens(scheduledInterviewId, {"call": "prefetch", **usage}, session_id=session_id)
+
+
+def _has_prefetch(session_id, session_doc, scheduledInterviewId):
+    """True when this turn's follow-ups are being prefetched for the session."""
+    if session_doc.get("turn_scoring"):
+        # Sessions created before scoring disabled prefetch: the real answer must be scored live
+        _discard_prefetch(session_id, scheduledInterviewId)
+        return False
+    return branch_prefetch.pending_turn(session_id) == session_doc.get("turn_count", 0)
+
+
+def _take_prefetch(session_id, session_doc, answer, scheduledInterviewId):
+    """Classify the answer and return the matching prefetched branch, or None."""
+    if not _has_prefetch(session_id, session_doc, scheduledInterviewId):
+        return None
+    settings = session_doc["prefetch"]
+    branch, classifier_usage = branch_prefetch.classify(settings, session_doc["questions"][-1], answer, model)
+    question, usage = branch_prefetch.take(session_id, session_doc.get("turn_count", 0), branch, settings["max_wait_seconds"])
+    return _prefetched(session_id, branch, question, usage, classifier_usage, scheduledInterviewId)
+
+
+async def _take_prefetch_async(session_id, session_doc, answer, scheduledInterviewId):
+    """_take_prefetch with the classifier and the branch awaited."""
+    if not _has_prefetch(session_id, session_doc, scheduledInterviewId):
+        return None
+    settings = session_doc["prefetch"]
+    branch, classifier_usage = await branch_prefetch.classify_async(settings, session_doc["questions"][-1], answer, model)
+    question, usage = await branch_prefetch.take_async(session_id, session_doc.get("turn_count", 0), branch,
+                                                       settings["max_wait_seconds"])
+    return _prefetched(session_id, branch, question, usage, classifier_usage, scheduledInterviewId)
+
+
+def _prefetched(session_id, branch, question, usage, classifier_usage, scheduledInterviewId):
+    """The served branch as a turn's "prefetched" entry, or None (spent branches are still recorded)."""
+    if not question:
+        # The branches that ran were still spent
+        if usage["total_tokens"]:
+            _record_tokens(scheduledInterviewId, {"call": "prefetch", **usage}, session_id=session_id)
+        if classifier_usage:
+            _record_tokens(scheduledInterviewId, {"call": "answer_classifier", **classifier_usage}, session_id=session_id)
+        return None
+
+    for field in usage:
+        usage[field] += (classifier_usage or {}).get(field) or 0
+    print(f"🔮 Serving prefetched {branch} branch")
+    return {"question": question, "usage": usage, "branch": branch}
+
+
+def _commit_turn(ctx, reply, usage_fields, ttft_ms=None):
+    """
+    Persist a completed turn exactly once: token counters, the turn-log
+    entry, answer/question and usage record. Returns the next question.
+    """
+    session_id, session_doc, turn = ctx["session_id"], ctx["session_doc"], ctx["turn"]
+    
+    reply = reply.strip()
+    next_q, score = reply, None
+    if session_doc.get("turn_scoring"):
+        next_q, score = turn_scoring.split_reply(reply)
+    usage = {
+        "call": "next_question",
+        "turn": turn,
+        "model": (_session_route(session_doc, "next_question") or {}).get("model"),
+        **usage_fields,
+        "latency_ms": round((time.perf_counter() - ctx["started_at"]) * 1000),
+        "ttft_ms": ttft_ms,
+        "answer_tokens_saved": ctx["answer_tokens_saved"],
+        "time_remaining": ctx["time_remaining"],
+        "at": datetime.utcnow()
+    }
+    print("Next Question Tokens", usage["total_tokens"], "| Cached", usage["cached_tokens"])
+    
     print(f"\n🎤 Next Question Generated:\n{next_q}")
     
-    # Store the new question and update MongoDB
-    session_doc["questions"].append(next_q)
-    session_doc["qa_pairs"].append({"question": next_q, "answer": None})
-    session_doc["chat_history"] = pickle.dumps(chat.history)  # Update chat history
+    tokens_saved = history_compaction.tokens_saved_per_call(session_doc)
+    counters = {"turn_count": 1, "version": 1}
+    if tokens_saved:
+        counters["compaction.tokens_saved"] = tokens_saved
     
-    # Update session in MongoDB
-    interview_sessions_collection.update_one(
-        {"_id": session_id},
-        {"$set": {
-            "answers": session_doc["answers"],
-            "questions": session_doc["questions"],
-            "qa_pairs": session_doc["qa_pairs"],
-            "chat_history": session_doc["chat_history"]
-        }}
+    # The model's own reply (score trailer included) is replayed verbatim
+    entry = _log_entry(turn, [
+        _message("user", ctx["turn_prompt"]),
+        _message("model", reply)
+    ])
+    if score:
+        entry["score"] = score
+    
+    update = {
+        "$push": {
+            "turn_log": entry,
+            "answers": ctx["answer"],
+            "questions": next_q,
+            "turn_keys": ctx["idempotency_key"],
+            "usage": usage
+        },
+        "$inc": counters,
+        "$unset": {"inflight": ""}
+    }
+    update["$set"] = {}
+    if ctx["bank_state"] is not None:
+        update["$set"]["question_bank"] = ctx["bank_state"]
+    if ctx["budget_stage"] is not None:
+        update["$set"]["budget.stage"] = ctx["budget_stage"]
+    if not update["$set"]:
+        del update["$set"]
+    
+    # Append only this turn's messages to the session in MongoDB; only the
+    # holder of the turn's claim, at the version it claimed, may write
+    result = interview_sessions_collection.update_one(
+        {"_id": session_id, "version": session_doc["version"], "inflight.claim": ctx["claim_id"]},
+        update
     )
+    if not result.matched_count:
+        _drop_session_state(session_id)
+        raise TurnConflictError(f"Turn {turn} of session {session_id} was written by another request")
+    
+    # Increase Tokens count with next question tokens (only once the turn is stored)
+    _record_tokens(ctx["scheduledInterviewId"], usage, tokens_saved=tokens_saved, session_id=session_id)
+    
+    if tokens_saved:
+        session_doc["compaction"]["tokens_saved"] += tokens_saved
+    if ctx["bank_state"] is not None:
+        session_doc["question_bank"] = ctx["bank_state"]
+    if ctx["budget_stage"] is not None:
+        session_doc["budget"]["stage"] = ctx["budget_stage"]
+
+    session_doc["answers"].append(ctx["answer"])
+    session_doc["questions"].append(next_q)
+    session_doc.setdefault("turn_keys", []).append(ctx["idempotency_key"])
+    session_doc.setdefault("usage", []).append(usage)
+    session_doc["turn_count"] = turn
+    session_doc["version"] += 1
+    session_cache.put(session_id, session_doc["version"], {"session": session_doc, "chat": ctx["chat"]})
+    
+    _start_prefetch(session_id, session_doc, ctx["chat"], ctx["time_remaining"], ctx["scheduledInterviewId"])
+    return next_q
+
+
+def next_question(session_id, answer, timeRemaining, scheduledInterviewId, turn_index=None, idempotency_key=None):
+    print("\n" + "="*50)
+    print("🔄 PROCESSING NEXT QUESTION")
+    print("="*50)
+    print(f"Session ID: {session_id}")
+    print(f"Candidate Answer: {answer}")
+    
+    ctx = _prepare_turn(session_id, answer, timeRemaining, scheduledInterviewId,
+                        turn_index=turn_index, idempotency_key=idempotency_key)
+    if not ctx:
+        return "Session expired or invalid. Please restart the interview."
+    if "replay" in ctx:
+        return ctx["replay"]
+
+    try:
+        if ctx["bank_question"] or ctx["prefetched"] or ctx["budget_reply"]:
+            next_q = _commit_turn(ctx, *_local_reply(ctx))
+        else:
+            print(f"\n📝 Sending prompt to AI with candidate's answer...")
+            response = llm_guard.send(ctx["chat"], ctx["turn_prompt"], "next_question", tags=_guard_tags(ctx),
+                                      generation_config=_route_config(ctx["session_doc"], "next_question"))
+            next_q = _commit_turn(ctx, response.text, prompt_cache.usage_from_response(response))
+    except TurnConflictError:
+        raise
+    except Exception:
+        _release_turn(ctx)
+        _drop_session_state(session_id)
+        raise
     
     print("="*50 + "\n")
     return next_q
 
-def finish_interview(session_id, scheduledInterviewId):
+
+def next_question_stream(session_id, answer, timeRemaining, scheduledInterviewId, hot=None,
+                         turn_index=None, idempotency_key=None):
+    """
+    Streaming variant of next_question. Yields event dicts:
+      {"type": "delta", "text": ...}            as Gemini produces tokens
+      {"type": "done", "question": ..., ...}    once the turn is persisted
+      {"type": "error", "error": ...}
+    The turn is committed exactly once, even if the client disconnects
+    mid-stream (the rest of the reply is drained server-side). A duplicate
+    of an answered turn yields the stored question; a conflicting request
+    yields an error event with "code": 409.
+    `hot`, `turn_index` and `idempotency_key` are passed through to _prepare_turn.
+    """
     print("\n" + "="*50)
-    print("🏁 ENDING INTERVIEW SESSION")
+    print("🔄 STREAMING NEXT QUESTION")
     print("="*50)
     print(f"Session ID: {session_id}")
     
-    # Retrieve session from MongoDB
-    session_doc = interview_sessions_collection.find_one({"_id": session_id})
+    try:
+        ctx = _prepare_turn(session_id, answer, timeRemaining, scheduledInterviewId, hot=hot,
+                            turn_index=turn_index, idempotency_key=idempotency_key)
+    except TurnConflictError as e:
+        yield {"type": "error", "error": str(e), "code": 409}
+        return
+    if not ctx:
+        yield {"type": "error", "error": "Session expired or invalid. Please restart the interview."}
+        return
+    if "replay" in ctx:
+        yield {"type": "delta", "text": ctx["replay"]}
+        yield {"type": "done", "question": ctx["replay"], "turn": ctx["turn"], "ttft_ms": None, "replayed": True}
+        return
+
+    if ctx["bank_question"] or ctx["prefetched"] or ctx["budget_reply"]:
+        try:
+            next_q = _commit_turn(ctx, *_local_reply(ctx))
+        except TurnConflictError as e:
+            _drop_session_state(session_id, hot)
+            yield {"type": "error", "error": str(e), "code": 409}
+            return
+        yield {"type": "delta", "text": next_q}
+        yield {"type": "done", "question": next_q, "turn": ctx["turn"], "ttft_ms": None}
+        return
+
+    ttft_ms = None
+    # Score trailers are never streamed to the candidate
+    trailer_filter = turn_scoring.ScoreTrailerFilter() if ctx["session_doc"].get("turn_scoring") else None
+    try:
+        response = llm_guard.send(ctx["chat"], ctx["turn_prompt"], "next_question", stream=True,
+                                  generation_config=_route_config(ctx["session_doc"], "next_question"))
+        chunks = iter(response)
+        for chunk in chunks:
+            if ttft_ms is None:
+                ttft_ms = round((time.perf_counter() - ctx["started_at"]) * 1000)
+                print(f"⚡ Time to first token: {ttft_ms} ms (turn {ctx['turn']})")
+            text = trailer_filter.feed(chunk.text) if trailer_filter else chunk.text
+            if text:
+                yield {"type": "delta", "text": text}
+        tail = trailer_filter.flush() if trailer_filter else ""
+        if tail:
+            yield {"type": "delta", "text": tail}
+    except GeneratorExit:
+        # Client went away mid-stream: finish the reply so the turn is still recorded once
+        try:
+            for _ in chunks:
+                pass
+            _commit_turn(ctx, response.text, prompt_cache.usage_from_response(response), ttft_ms=ttft_ms)
+        except Exception as e:
+            print(f"Streaming turn for session {session_id} was not completed: {e}")
+            _release_turn(ctx)
+            _drop_session_state(session_id, hot)
+        raise
+    except Exception as e:
+        print(f"❌ Streaming failed for session {session_id}: {e}")
+        _release_turn(ctx)
+        _drop_session_state(session_id, hot)  # the cached chat may hold a broken reply
+        yield {"type": "error", "error": "Failed to generate the next question. Please try again.",
+               **({"code": 503} if isinstance(e, llm_guard.LLMUnavailableError) else {})}
+        return
+
+    try:
+        next_q = _commit_turn(ctx, response.text, prompt_cache.usage_from_response(response), ttft_ms=ttft_ms)
+    except TurnConflictError as e:
+        _drop_session_state(session_id, hot)
+        yield {"type": "error", "error": str(e), "code": 409}
+        return
+    yield {"type": "done", "question": next_q, "turn": ctx["turn"], "ttft_ms": ttft_ms}
     
-    if not session_doc:
-        print("❌ Session not found in MongoDB!")
-        return {
-            "score": 0,
-            "strengths": ["No valid session found"],
-            "improvements": ["Please restart the interview"],
-            "error": "Session not found",
-            "qa_pairs": [],
-            "raw_result": None
+    print("="*50 + "\n")
+
+# ─── Async turns (ASGI) ──────────────────────────────────────────────────────
+#
+# Same turns as next_question / next_question_stream for the ASGI entry
+# point: every Gemini call (and every wait on one) is awaited with the
+# async client, and the claim / commit steps (short pymongo calls shared
+# with the sync path) run on the async runtime's thread pool.
+
+async def next_question_async(session_id, answer, timeRemaining, scheduledInterviewId,
+                              turn_index=None, idempotency_key=None):
+    ctx = await _prepare_turn_async(session_id, answer, timeRemaining, scheduledInterviewId,
+                                    turn_index=turn_index, idempotency_key=idempotency_key)
+    if not ctx:
+        return "Session expired or invalid. Please restart the interview."
+    if "replay" in ctx:
+        return ctx["replay"]
+
+    try:
+        if ctx["bank_question"] or ctx["prefetched"] or ctx["budget_reply"]:
+            return await run_blocking(_commit_turn, ctx, *_local_reply(ctx))
+        response = await llm_guard.send_async(ctx["chat"], ctx["turn_prompt"], "next_question",
+                                              generation_config=_route_config(ctx["session_doc"], "next_question"))
+        return await run_blocking(_commit_turn, ctx, response.text, prompt_cache.usage_from_response(response))
+    except TurnConflictError:
+        raise
+    except Exception:
+        await run_blocking(_release_turn, ctx)
+        _drop_session_state(session_id)
+        raise
+
+
+async def _finish_stream_async(ctx, response, chunks, ttft_ms, hot=None):
+    """Drain a reply whose client went away and commit the turn, or release it."""
+    try:
+        if response is None:
+            raise RuntimeError("the request was cancelled before the model replied")
+        async for _ in chunks:
+            pass
+        await run_blocking(_commit_turn, ctx, response.text, prompt_cache.usage_from_response(response), ttft_ms=ttft_ms)
+    except Exception as e:
+        print(f"Streaming turn for session {ctx['session_id']} was not completed: {e}")
+        await run_blocking(_release_turn, ctx)
+        _drop_session_state(ctx["session_id"], hot)
+
+
+async def next_question_stream_async(session_id, answer, timeRemaining, scheduledInterviewId, hot=None,
+                                     turn_index=None, idempotency_key=None):
+    """Async generator with the events and guarantees of next_question_stream."""
+    try:
+        ctx = await _prepare_turn_async(session_id, answer, timeRemaining, scheduledInterviewId, hot=hot,
+                                        turn_index=turn_index, idempotency_key=idempotency_key)
+    except TurnConflictError as e:
+        yield {"type": "error", "error": str(e), "code": 409}
+        return
+    if not ctx:
+        yield {"type": "error", "error": "Session expired or invalid. Please restart the interview."}
+        return
+    if "replay" in ctx:
+        yield {"type": "delta", "text": ctx["replay"]}
+        yield {"type": "done", "question": ctx["replay"], "turn": ctx["turn"], "ttft_ms": None, "replayed": True}
+        return
+
+    if ctx["bank_question"] or ctx["prefetched"] or ctx["budget_reply"]:
+        try:
+            next_q = await run_blocking(_commit_turn, ctx, *_local_reply(ctx))
+        except TurnConflictError as e:
+            _drop_session_state(session_id, hot)
+            yield {"type": "error", "error": str(e), "code": 409}
+            return
+        yield {"type": "delta", "text": next_q}
+        yield {"type": "done", "question": next_q, "turn": ctx["turn"], "ttft_ms": None}
+        return
+
+    ttft_ms, response, chunks = None, None, None
+    trailer_filter = turn_scoring.ScoreTrailerFilter() if ctx["session_doc"].get("turn_scoring") else None
+    try:
+        response = await llm_guard.send_async(ctx["chat"], ctx["turn_prompt"], "next_question", stream=True,
+                                              generation_config=_route_config(ctx["session_doc"], "next_question"))
+        chunks = response.__aiter__()
+        async for chunk in chunks:
+            if ttft_ms is None:
+                ttft_ms = round((time.perf_counter() - ctx["started_at"]) * 1000)
+                print(f"⚡ Time to first token: {ttft_ms} ms (turn {ctx['turn']}, async)")
+            text = trailer_filter.feed(chunk.text) if trailer_filter else chunk.text
+            if text:
+                yield {"type": "delta", "text": text}
+        tail = trailer_filter.flush() if trailer_filter else ""
+        if tail:
+            yield {"type": "delta", "text": tail}
+    except GeneratorExit:
+        # Client went away mid-stream: finish the turn in the background so it is recorded once
+        spawn(_finish_stream_async(ctx, response, chunks, ttft_ms, hot))
+        raise
+    except asyncio.CancelledError:
+        # Cancelled while awaiting the model: the reply cannot be resumed, so free the turn
+        spawn(_finish_stream_async(ctx, None, None, ttft_ms, hot))
+        raise
+    except Exception as e:
+        print(f"❌ Streaming failed for session {session_id}: {e}")
+        await run_blocking(_release_turn, ctx)
+        _drop_session_state(session_id, hot)
+        yield {"type": "error", "error": "Failed to generate the next question. Please try again.",
+               **({"code": 503} if isinstance(e, llm_guard.LLMUnavailableError) else {})}
+        return
+
+    try:
+        next_q = await run_blocking(_commit_turn, ctx, response.text, prompt_cache.usage_from_response(response),
+                                    ttft_ms=ttft_ms)
+    except TurnConflictError as e:
+        _drop_session_state(session_id, hot)
+        yield {"type": "error", "error": str(e), "code": 409}
+        return
+    yield {"type": "done", "question": next_q, "turn": ctx["turn"], "ttft_ms": ttft_ms}
+
+
+def close_session(session_id, scheduledInterviewId=None):
+    """
+    Stop accepting turns for a session whose evaluation has been queued.
+    The document is kept (with a later expiry) until the evaluation has
+    been saved. Returns False if the session does not exist.
+    """
+    result = interview_sessions_collection.update_one(
+        {"_id": session_id},
+        {
+            "$set": {"closed": True, "expires_at": datetime.utcnow() + timedelta(hours=24)},
+            "$inc": {"version": 1}
         }
+    )
+    session_cache.invalidate(session_id)
+    _discard_prefetch(session_id, scheduledInterviewId)
+    return result.matched_count > 0
+
+
+def delete_session(session_id, scheduledInterviewId=None):
+    """Remove a session once its evaluation is stored."""
+    interview_sessions_collection.delete_one({"_id": session_id})
+    session_cache.invalidate(session_id)
+    _discard_prefetch(session_id, scheduledInterviewId)
+
+
+def _parse_json_reply(result):
+    """Parse a JSON model reply, tolerating markdown code fences."""
+    cleaned_result = result.strip()
+    if cleaned_result.startswith("```json"):
+        cleaned_result = cleaned_result[7:]  # Remove ```json
+    elif cleaned_result.startswith("```"):
+        cleaned_result = cleaned_result[3:]  # Remove ```
     
-    # Deserialize chat history and recreate chat object
-    chat_history = pickle.loads(session_doc["chat_history"])
-    chat = model.start_chat(history=chat_history)
+    if cleaned_result.endswith("```"):
+        cleaned_result = cleaned_result[:-3]  # Remove trailing ```
     
-    violation_count = len(session_doc.get("violations", []) or [])
+    return json.loads(cleaned_result.strip())
+
+
+def _chat_evaluation(session_id, session_doc, chat, violation_count):
+    """
+    Full-history evaluation: the summary prompt is sent into the interview
+    chat. Returns (evaluation, raw_result, usage_records).
+    """
+    if session_doc.get("compaction"):
+        # The evaluation must see every turn, not the running summary
+        full_doc = interview_sessions_collection.find_one({"_id": session_id})
+        chat = _rebuild_chat(_load_history(full_doc, apply_compaction=False), full_doc.get("prompt_cache_key"))
 
     # Get summary prompt from database
     summary_prompt = PromptService.get_summary_prompt(violation_count=violation_count)
     
     print(f"\n Sending Summary Prompt to AI:\n{summary_prompt}")
-    response = chat.send_message(summary_prompt)
+    started = time.perf_counter()
+    # The chat keeps the interview model; the summary route's generation settings apply
+    response = llm_guard.send(chat, summary_prompt, "summary",
+                              generation_config=_route_config(session_doc, "summary"))
     result = response.text
+    usage = {
+        "call": "summary",
+        "model": (_session_route(session_doc, "next_question") or {}).get("model"),
+        "turn": session_doc.get("turn_count", 0),
+        **prompt_cache.usage_from_response(response),
+        "latency_ms": _elapsed_ms(started)
+    }
 
-    # Increase Tokens count with summary tokens
-    try:
-        scheduled_interviews_collection.update_one(
-            {"_id": ObjectId(scheduledInterviewId)},
-            {"$inc": {"tokens": response.usage_metadata.total_token_count}})
-    except Exception as e:
-        print(e)
-        print("Failed to update tokens in scheduledInterviewsCollection")
-
-    print("Summary Tokens", response.usage_metadata.total_token_count)
     print(f"\n AI Evaluation Result:\n{result}")
 
     # Try to parse JSON, fallback to default if parsing fails
-    import json
     try:
-        print("JSON Result:", result)
-        
-        # Strip markdown code block markers if present
-        cleaned_result = result.strip()
-        if cleaned_result.startswith("```json"):
-            cleaned_result = cleaned_result[7:]  # Remove ```json
-        elif cleaned_result.startswith("```"):
-            cleaned_result = cleaned_result[3:]  # Remove ```
-        
-        if cleaned_result.endswith("```"):
-            cleaned_result = cleaned_result[:-3]  # Remove trailing ```
-        
-        cleaned_result = cleaned_result.strip()
-        print("Cleaned JSON:", cleaned_result)
-        
-        evaluation = json.loads(cleaned_result)
+        evaluation = _parse_json_reply(result)
     except Exception as e:
         print(f"Error parsing JSON: {e}")
         evaluation = {
@@ -234,16 +1374,392 @@ def finish_interview(session_id, scheduledInterviewId):
             "improvement_guide": "Good",
             "interview_verdict": "Average"
         }
+    return evaluation, result, [usage]
+
+
+def _format_transcript(qa_pairs):
+    """Compact Q/A transcript for stateless evaluation (the open question is left out)."""
+    return "\n\n".join(
+        f"Q{i}: {pair['question']}\nA{i}: {answer_normalizer.normalize(pair['answer'])[0]}"
+        for i, pair in enumerate(qa_pairs, start=1) if pair["answer"] is not None
+    )
+
+
+def _transcript_evaluation(session_doc, violation_count):
+    """
+    Stateless evaluation: one generate_content call with a small evaluator
+    prompt over the candidate profile and a compact Q/A transcript, instead
+    of replaying the interview chat (system prompt and per-turn
+    instructions included). Returns (evaluation, raw_result, usage_records),
+    or (None, None, []) when the prompt set has no transcript evaluator.
+    """
+    try:
+        prompt = PromptService.get_transcript_evaluation_prompt(
+            candidate_profile=session_doc.get("candidate_profile") or "Not recorded.",
+            transcript=_format_transcript(_build_qa_pairs(session_doc)),
+            violation_count=violation_count
+        )
+    except ValueError:
+        return None, None, []
+
+    started = time.perf_counter()
+    summary_model, summary_route = _summary_model(session_doc)
+    response = llm_guard.generate(summary_model, prompt, "summary", tags={"session_id": session_doc["_id"]},
+                                  generation_config=model_router.generation_config(summary_route))
+    result = response.text
+    usage = {
+        "call": "summary",
+        "model": (summary_route or {}).get("model"),
+        "mode": "transcript",
+        "turn": session_doc.get("turn_count", 0),
+        **prompt_cache.usage_from_response(response),
+        "latency_ms": _elapsed_ms(started)
+    }
+
+    # What replaying the chat would have cost: the last turn's prompt already
+    # held the whole history, plus that turn's reply
+    usage_log = session_doc.get("usage") or []
+    if usage_log:
+        last = usage_log[-1]
+        usage["replay_prompt_tokens"] = (last.get("prompt_tokens") or 0) + (last.get("output_tokens") or 0)
+        print(f"Summary prompt tokens: {usage['prompt_tokens']} (chat replay ≈ {usage['replay_prompt_tokens']})")
+
+    print(f"\n AI Evaluation Result:\n{result}")
+    try:
+        evaluation = _parse_json_reply(result)
+    except Exception as e:
+        print(f"Error parsing JSON: {e}")
+        return None, None, [usage]
+    return evaluation, result, [usage]
+
+
+def _scored_evaluation(session_id, session_doc, violation_count):
+    """
+    Turn-scoring evaluation: aggregate the per-turn scores stored on the
+    turn log, then optionally run a short synthesis call over the compact
+    notes. Returns (None, None, []) when no turn was scored.
+    """
+    head = interview_sessions_collection.find_one({"_id": session_id}, {"turn_log.turn": 1, "turn_log.score": 1}) or {}
+    turn_scores = [
+        {"turn": entry["turn"], **entry["score"]}
+        for entry in head.get("turn_log", []) if entry.get("score")
+    ]
+    if not turn_scores:
+        print("No per-turn scores recorded, falling back to the full evaluation")
+        return None, None, []
+
+    evaluation = turn_scoring.aggregate(turn_scores, violation_count)
+    print(f"\n📊 Aggregated {len(turn_scores)} turn scores: {evaluation['dimension_scores']}")
+
+    result = json.dumps({k: evaluation[k] for k in ("score", "dimension_scores")})
+    usage_records = []
+    if session_doc["turn_scoring"].get("synthesis"):
+        try:
+            prompt = PromptService.get_score_synthesis_prompt(
+                turn_notes=turn_scoring.format_notes(turn_scores, session_doc.get("questions", [])),
+                violation_count=violation_count
+            )
+            started = time.perf_counter()
+            summary_model, summary_route = _summary_model(session_doc)
+            response = llm_guard.generate(summary_model, prompt, "score_synthesis", tags={"session_id": session_id},
+                                          generation_config=model_router.generation_config(summary_route))
+            result = response.text
+            usage_records.append({
+                "call": "score_synthesis",
+                "model": (summary_route or {}).get("model"),
+                "turn": session_doc.get("turn_count", 0),
+                **prompt_cache.usage_from_response(response),
+                "latency_ms": _elapsed_ms(started)
+            })
+            synthesis = _parse_json_reply(result)
+            for field in ("strengths", "improvements", "improvement_guide"):
+                if synthesis.get(field):
+                    evaluation[field] = synthesis[field]
+        except Exception as e:
+            print(f"Score synthesis failed, keeping the aggregated report: {e}")
+
+    return evaluation, result, usage_records
+
+
+def finish_interview(session_id, scheduledInterviewId, delete=True):
+    """
+    Run the final evaluation of a session. With `delete=False` the session
+    is kept, so a retried evaluation job can run it again.
+    """
+    print("\n" + "="*50)
+    print("🏁 ENDING INTERVIEW SESSION")
+    print("="*50)
+    print(f"Session ID: {session_id}")
+    
+    # Retrieve session (worker cache, else MongoDB)
+    session_doc, chat = _get_session(session_id)
+    
+    if not session_doc:
+        print("❌ Session not found in MongoDB!")
+        return {
+            "score": 0,
+            "strengths": ["No valid session found"],
+            "improvements": ["Please restart the interview"],
+            "error": "Session not found",
+            "qa_pairs": [],
+            "raw_result": None
+        }
+    
+    # Proctoring events are counted outside the turn flow (services/proctoring)
+    violation_count = proctoring.violation_count(session_id)
+
+    evaluation, usage_records = None, []
+    if session_doc.get("turn_scoring"):
+        evaluation, result, usage_records = _scored_evaluation(session_id, session_doc, violation_count)
+    if evaluation is None:
+        evaluation, result, transcript_usage = _transcript_evaluation(session_doc, violation_count)
+        usage_records += transcript_usage
+    if evaluation is None:
+        evaluation, result, chat_usage = _chat_evaluation(session_id, session_doc, chat, violation_count)
+        usage_records += chat_usage
+
+    # Increase Tokens count with summary tokens
+    for usage in usage_records:
+        _record_tokens(scheduledInterviewId, usage, session_id=session_id)
+        print(f"{usage['call']} Tokens", usage["total_tokens"], "| Cached", usage["cached_tokens"])
     
     # Add Q&A pairs to the evaluation
-    evaluation["qa_pairs"] = session_doc["qa_pairs"]
+    evaluation["qa_pairs"] = _build_qa_pairs(session_doc)
     evaluation["raw_result"] = result
+    evaluation["token_usage"] = _usage_summary(session_doc.get("usage", []) + usage_records)
+    evaluation["token_usage"]["compaction_tokens_saved"] = (session_doc.get("compaction") or {}).get("tokens_saved", 0)
+    evaluation["token_usage"]["summary_tokens_saved"] = sum(
+        max(0, u["replay_prompt_tokens"] - (u["prompt_tokens"] or 0)) for u in usage_records if "replay_prompt_tokens" in u
+    )
+    # Tokens removed from answers, once as sent and including every later call that replayed them
+    turn_count = session_doc.get("turn_count", 0)
+    answer_savings = [(u["turn"], u["answer_tokens_saved"]) for u in session_doc.get("usage", []) if u.get("answer_tokens_saved")]
+    evaluation["token_usage"]["answer_tokens_saved"] = sum(saved for _, saved in answer_savings)
+    evaluation["token_usage"]["answer_tokens_saved_with_replay"] = sum(
+        saved * (turn_count - turn + 1) for turn, saved in answer_savings
+    )
     
     # Delete session from MongoDB after completion
-    interview_sessions_collection.delete_one({"_id": session_id})
-    
-    print(f"\n✅ Session removed from MongoDB")
+    if delete:
+        delete_session(session_id, scheduledInterviewId)
+        print(f"\n✅ Session removed from MongoDB")
     print(f"📋 Final Evaluation: {evaluation}")
     print("="*50 + "\n")
     
     return evaluation
+
+
+# ─── Advisory sessions ───────────────────────────────────────────────────────
+#
+# Business-strategist advisory sessions run on the same persistent session
+# documents as interviews ("mode": "advisory"): turn log, worker cache and
+# cached system-instruction prefix. Replies are streamed; the final
+# BUSINESS ADVISORY NOTE is stored in `advisory_notes`, so opening it again
+# costs no tokens and outlives the session.
+
+ADVISORY_NOTE_MARKER = "BUSINESS ADVISORY NOTE"
+ADVISORY_SESSION_TTL = timedelta(hours=24)
+
+
+def create_advisory_session(user_id):
+    """Start a business-strategist session. Returns (session_id, first_message)."""
+    session_id = str(uuid.uuid4())
+    system_instruction = PromptService.get_business_strategist_prompt()
+    opening_message = PromptService.get_prompt_settings("business_strategist_prompt").get(
+        "opening_message", "Start the interview with a brief greeting and first question."
+    )
+    prompt_cache_key = prompt_cache.prefix_key(system_instruction)
+    chat = prompt_cache.get_model(prompt_cache_key, system_instruction).start_chat(history=[])
+
+    started = time.perf_counter()
+    response = llm_guard.send(chat, opening_message, "advisory")
+    first_message = response.text.strip()
+    usage = {
+        "call": "advisory",
+        "turn": 0,
+        **prompt_cache.usage_from_response(response),
+        "latency_ms": _elapsed_ms(started)
+    }
+    token_ledger.record("advisory", usage, organization_id=user_id, session_id=session_id)
+
+    session_data = {
+        "_id": session_id,
+        "mode": "advisory",
+        "user_id": user_id,
+        "turn_log": [_log_entry(0, [
+            _message("user", opening_message),
+            _message("model", first_message)
+        ])],
+        "turn_count": 0,
+        "version": 0,
+        "prompt_cache_key": prompt_cache_key,
+        "answers": [],
+        "questions": [first_message],
+        "usage": [usage],
+        "created_at": datetime.utcnow(),
+        "expires_at": datetime.utcnow() + ADVISORY_SESSION_TTL
+    }
+    interview_sessions_collection.insert_one(session_data)
+    session_data.pop("turn_log")
+    session_cache.put(session_id, 0, {"session": session_data, "chat": chat})
+    print(f"💼 Advisory session {session_id} started")
+    return session_id, first_message
+
+
+def _advisory_session(session_id, user_id):
+    session_doc, chat = _get_session(session_id)
+    if not session_doc or session_doc.get("mode") != "advisory" or session_doc.get("user_id") != user_id:
+        return None, None
+    return session_doc, chat
+
+
+def _claim_advisory_turn(session_id, user_id):
+    """
+    Load the session and claim its next exchange, the same way interview
+    turns are claimed, so only one reply at a time reaches the session's
+    chat. Returns (session_doc, chat, claim_id); (None, None, None) if the
+    session does not exist. Raises TurnConflictError while another reply
+    is in flight.
+    """
+    for attempt in range(2):
+        session_doc, chat = _advisory_session(session_id, user_id)
+        if not session_doc:
+            return None, None, None
+        claim_id = _claim_turn(session_id, session_doc["version"], session_doc.get("turn_count", 0) + 1, None)
+        if claim_id:
+            return session_doc, chat, claim_id
+        head = interview_sessions_collection.find_one({"_id": session_id}, {"inflight": 1}) or {}
+        if head.get("inflight"):
+            raise TurnConflictError("Another reply is still being written for this session")
+        # Our copy of the session is behind MongoDB: reload once and claim again
+        _drop_session_state(session_id)
+    raise TurnConflictError(f"Advisory session {session_id} changed while claiming the reply")
+
+
+def _save_advisory_note(session_doc, reply):
+    note = reply[reply.find(ADVISORY_NOTE_MARKER):]
+    advisory_notes_collection.replace_one(
+        {"_id": session_doc["_id"]},
+        {
+            "_id": session_doc["_id"],
+            "user_id": session_doc["user_id"],
+            "note": note,
+            "created_at": datetime.utcnow()
+        },
+        upsert=True
+    )
+    print(f"📝 Advisory note saved for session {session_doc['_id']} ({len(note)} chars)")
+
+
+def _commit_advisory_turn(session_doc, chat, claim_id, message, reply, usage):
+    """Append one advisory exchange; returns True if the reply contained the advisory note."""
+    session_id, turn = session_doc["_id"], session_doc.get("turn_count", 0) + 1
+    usage = {"call": "advisory", "turn": turn, **usage}
+    result = interview_sessions_collection.update_one(
+        {"_id": session_id, "version": session_doc["version"], "inflight.claim": claim_id},
+        {
+            "$push": {
+                "turn_log": _log_entry(turn, [_message("user", message), _message("model", reply)]),
+                "answers": message,
+                "questions": reply,
+                "usage": usage
+            },
+            "$inc": {"turn_count": 1, "version": 1},
+            "$unset": {"inflight": ""}
+        }
+    )
+    if not result.matched_count:
+        _drop_session_state(session_id)
+        raise TurnConflictError(f"Advisory session {session_id} changed during the reply")
+    token_ledger.record("advisory", usage, organization_id=session_doc["user_id"], session_id=session_id)
+
+    session_doc["turn_count"] = turn
+    session_doc["version"] += 1
+    session_doc["answers"].append(message)
+    session_doc["questions"].append(reply)
+    session_doc["usage"].append(usage)
+    session_cache.put(session_id, session_doc["version"], {"session": session_doc, "chat": chat})
+
+    if ADVISORY_NOTE_MARKER in reply:
+        _save_advisory_note(session_doc, reply)
+        return True
+    return False
+
+
+def advisory_reply_stream(session_id, user_id, message):
+    """
+    Stream the strategist's reply to a user message. Yields event dicts:
+      {"type": "delta", "text": ...}
+      {"type": "done", "reply": ..., "turn": ..., "note": bool}
+      {"type": "error", "error": ...}
+    The exchange is committed exactly once, even if the client disconnects
+    mid-stream. Replies to one session are serialized: while one is in
+    flight, another gets {"type": "error", "code": 409}.
+    """
+    try:
+        session_doc, chat, claim_id = _claim_advisory_turn(session_id, user_id)
+    except TurnConflictError as e:
+        yield {"type": "error", "error": str(e), "code": 409}
+        return
+    if not session_doc:
+        yield {"type": "error", "error": "Session expired or invalid. Please start a new session."}
+        return
+    claim = {"session_id": session_id, "claim_id": claim_id}
+
+    started = time.perf_counter()
+    ttft_ms = None
+
+    def commit(response):
+        usage = {
+            **prompt_cache.usage_from_response(response),
+            "latency_ms": _elapsed_ms(started),
+            "ttft_ms": ttft_ms
+        }
+        return _commit_advisory_turn(session_doc, chat, claim_id, message, response.text.strip(), usage)
+
+    try:
+        response = llm_guard.send(chat, message, "advisory", stream=True)
+        chunks = iter(response)
+        for chunk in chunks:
+            if ttft_ms is None:
+                ttft_ms = _elapsed_ms(started)
+            if chunk.text:
+                yield {"type": "delta", "text": chunk.text}
+    except GeneratorExit:
+        # Client went away mid-stream: finish the reply so the note is still saved once
+        try:
+            for _ in chunks:
+                pass
+            commit(response)
+        except Exception as e:
+            print(f"Advisory reply for session {session_id} was not completed: {e}")
+            _release_turn(claim)
+            _drop_session_state(session_id)
+        raise
+    except Exception as e:
+        print(f"❌ Advisory streaming failed for session {session_id}: {e}")
+        _release_turn(claim)
+        _drop_session_state(session_id)
+        yield {"type": "error", "error": "Failed to generate a reply. Please try again."}
+        return
+
+    try:
+        has_note = commit(response)
+    except TurnConflictError as e:
+        yield {"type": "error", "error": str(e), "code": 409}
+        return
+    yield {"type": "done", "reply": response.text.strip(), "turn": session_doc["turn_count"], "note": has_note}
+
+
+def advisory_reply(session_id, user_id, message):
+    """Non-streaming advisory turn: returns the final event of advisory_reply_stream."""
+    event = None
+    for event in advisory_reply_stream(session_id, user_id, message):
+        if event["type"] == "error":
+            return event
+    return event
+
+
+def get_advisory_note(session_id, user_id):
+    """The stored BUSINESS ADVISORY NOTE of a session, or None."""
+    return advisory_notes_collection.find_one({"_id": session_id, "user_id": user_id})
@@ -0,0 +1,145 @@
+"""
+Answer Normalizer Module
+========================
+Compacts candidate answers before they are sent to the model.
+
+Answers typed through SpeechToTextInput are raw transcripts: filler
+words, stutters ("the the"), phrases repeated by interim recognition
+results and very long monologues. Every answer is sent once and then
+replayed on every later turn, so each token removed here is saved many
+times over.
+
+Stages (all local, no model calls):
+  1. whitespace collapse
+  2. filler removal: standalone disfluencies only (um, uh, er, hmm),
+     lowercase or capitalised at a sentence start ("Um,"); all-caps
+     words like "ER" or "UM" are acronyms and phrases like "you know" or
+     "I mean" carry meaning too often
+  3. repetition collapse: repeated phrases of 2..MAX_PHRASE_WORDS words,
+     single-word stutters of STUTTER_WORDS only ("the the", but never
+     "had had" or "10 10"), and a sentence of MIN_SENTENCE_WORDS or more
+     said twice in a row
+  4. token-aware cap: answers above ANSWER_MAX_TOKENS keep their head
+     and tail and drop the middle
+
+Token counts are estimated locally (characters / CHARS_PER_TOKEN); the
+estimate only decides the cap and the reported savings.
+
+The original answer is stored untouched (answers / qa_pairs); only the
+model sees the compact form.
+"""
+
+import re
+
+from config import ANSWER_NORMALIZATION, ANSWER_MAX_TOKENS
+
+CHARS_PER_TOKEN = 4
+
+# Share of the capped answer kept from its beginning; the rest comes from its end
+HEAD_SHARE = 0.6
+
+MAX_PHRASE_WORDS = 6
+
+# Words whose immediate repeat is always a stutter
+STUTTER_WORDS = {"i", "the", "a", "an", "and", "so", "we", "my", "but"}
+
+# Shorter sentences said twice in a row ("No. No.") are usually emphasis
+MIN_SENTENCE_WORDS = 3
+
+TRIM_MARKER = "[…]"
+
+# Case-sensitive on purpose: only the first letter may be upper case
+_FILLERS = re.compile(
+    r"(?:(?<=^)|(?<=[\s,.;!?]))"
+    r"(?:[Uu]u*h+m*|[Uu]u*m+|[Ee]e*r+m*|[Hh]h*m+)"
+    r"(?=$|[\s,.;!?])[,]?"
+)
+_WHITESPACE = re.compile(r"\s+")
+_SPACE_BEFORE_PUNCT = re.compile(r"\s+([,.;!?])")
+_REPEATED_PUNCT = re.compile(r"([,.;!?])(?:\s*[,])+")
+_SENTENCES = re.compile(r"(?<=[.!?])\s+")
+
+
+def estimate_tokens(text):
+    return (len(text or "") + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _collapse_phrases(words):
+    """
+    Drop immediate repeats of 2..MAX_PHRASE_WORDS-word phrases ("I think
+    I think" -> "I think") and single-word stutters of STUTTER_WORDS.
+    """
+    def key(word):
+        return word.lower().strip(",.;!?")
+
+    out = []
+    for word in words:
+        out.append(word)
+        for size in range(1, MAX_PHRASE_WORDS + 1):
+            if len(out) < 2 * size:
+                break
+            if size == 1 and key(out[-1]) not in STUTTER_WORDS:
+                continue
+            tail = [key(w) for w in out[-size:]]
+            if tail == [key(w) for w in out[-2 * size:-size]]:
+                del out[-size:]
+                break
+    return out
+
+
+def _collapse_sentences(text):
+    """Drop a sentence of MIN_SENTENCE_WORDS or more that repeats the one just before it."""
+    previous = None
+    kept = []
+    for sentence in _SENTENCES.split(text):
+        normalized = re.sub(r"[^\w\s]", "", sentence.lower()).strip()
+        if normalized == previous and len(normalized.split()) >= MIN_SENTENCE_WORDS:
+            continue
+        previous = normalized
+        kept.append(sentence)
+    return " ".join(kept)
+
+
+def _cap(text, max_tokens):
+    """Keep the head and tail of an answer that exceeds max_tokens."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    budget = max_tokens * CHARS_PER_TOKEN
+    head = text[:int(budget * HEAD_SHARE)]
+    tail = text[len(text) - int(budget * (1 - HEAD_SHARE)):]
+    # Cut on word boundaries
+    head = head[:head.rfind(" ")] if " " in head else head
+    tail = tail[tail.find(" ") + 1:] if " " in tail else tail
+    return f"{head} {TRIM_MARKER} {tail}"
+
+
+def normalize(answer, max_tokens=None):
+    """
+    Return (compact_answer, stats) where stats holds the estimated
+    original/compact token counts and tokens_saved. With normalization
+    disabled the answer is returned as-is.
+    """
+    original = answer or ""
+    original_tokens = estimate_tokens(original)
+    if not ANSWER_NORMALIZATION:
+        return original, {"original_tokens": original_tokens, "compact_tokens": original_tokens, "tokens_saved": 0}
+
+    text = _WHITESPACE.sub(" ", original).strip()
+    text = _FILLERS.sub("", text)
+    text = " ".join(_collapse_phrases(text.split()))
+    text = _collapse_sentences(text)
+    text = _SPACE_BEFORE_PUNCT.sub(r"\1", text)
+    text = _REPEATED_PUNCT.sub(r"\1", text)
+    text = _WHITESPACE.sub(" ", text).strip(" ,")
+    text = _cap(text, max_tokens or ANSWER_MAX_TOKENS)
+
+    if not text:
+        # Nothing but fillers: keep the original rather than send an empty answer
+        text = _WHITESPACE.sub(" ", original).strip()
+
+    compact_tokens = estimate_tokens(text)
+    return text, {
+        "original_tokens": original_tokens,
+        "compact_tokens": compact_tokens,
+        "tokens_saved": max(0, original_tokens - compact_tokens)
+    }
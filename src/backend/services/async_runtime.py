@@ -0,0 +1,45 @@
+"""
+Async Runtime Module
+====================
+Shared helpers for the ASGI serving mode (asgi.py).
+
+Async routes wait on Gemini with the async client, so a turn that is
+waiting on the model holds no thread: the opening, the turn itself and
+the Gemini-bound steps before it (compaction, budget count_tokens, the
+answer classifier, waits on a prefetched branch or a duplicate request)
+are all awaited.
+
+MongoDB is still reached through pymongo, which has no asyncio API: the
+steps around the model calls (claiming and committing a turn, loading
+prompts and sessions, parsing a resume) are short blocking pymongo /
+file work shared with the sync engine, and run on a bounded thread pool
+of ASYNC_BLOCKING_THREADS threads so the event loop never blocks on
+them. A thread is held for one round trip at a time, never across a
+model call, so the pool is sized for concurrent MongoDB round trips
+(roughly the MongoDB connection pool), not for concurrent interviews.
+"""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from config import ASYNC_BLOCKING_THREADS
+
+_executor = ThreadPoolExecutor(max_workers=ASYNC_BLOCKING_THREADS, thread_name_prefix="async-blocking")
+
+# Background tasks are referenced here until they finish (asyncio keeps only weak references)
+_background = set()
+
+
+async def run_blocking(fn, *args, **kwargs):
+    """Run a blocking call on the shared pool and await its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(fn, *args, **kwargs))
+
+
+def spawn(coro):
+    """Run a coroutine to completion even if the request that started it is cancelled."""
+    task = asyncio.ensure_future(coro)
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+    return task
@@ -0,0 +1,244 @@
+"""
+Branch Prefetch Module
+======================
+Speculative generation of the next interview question while the
+candidate is still answering.
+
+The interviewer rules pick the next question by answer quality (weak ->
+simpler, average -> deeper follow-up, strong -> harder). As soon as a
+question is shown, the three possible follow-ups are generated in
+parallel from the current chat history. When the answer arrives it is
+classified (local heuristic, or a one-word Gemini call) and the matching
+branch is served, so the candidate waits for the classification instead
+of a full generation. If the branch is still in flight the turn waits
+for it, which is never slower than starting a live call at that point.
+
+Sessions with turn scoring do not prefetch: a branch is written for a
+hypothetical answer, so its score trailer would grade an answer the
+model never saw. Any trailer a branch still carries is stripped.
+
+The async turns (ASGI) use classify_async / take_async, which await the
+classifier call and the in-flight branch without holding a thread.
+
+Prefetches live in worker memory and are most effective on the interview
+WebSocket, where a session stays on one worker. A turn that lands on
+another worker, or runs out of time, uses the live path.
+
+Settings live on the `branch_prefetch_prompt` prompt document:
+
+  enabled             prefetch for new sessions
+  classifier          "heuristic" (local) or "model" (one-word Gemini call)
+  min_time_remaining  seconds left below which no prefetch is started
+  max_wait_seconds    how long a turn waits for an in-flight branch
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from services.prompt_service import PromptService
+from services.prompt_cache import usage_from_response
+from services.question_bank import answer_signal
+from services.turn_scoring import split_reply
+from services import llm_guard
+from services.async_runtime import run_blocking
+
+PREFETCH_PROMPT = "branch_prefetch_prompt"
+
+BRANCHES = ("weak", "average", "strong")
+
+DEFAULT_SETTINGS = {
+    "enabled": False,
+    "classifier": "heuristic",
+    "min_time_remaining": 90,
+    "max_wait_seconds": 30,
+}
+
+# Each prefetch occupies one thread per branch
+_executor = ThreadPoolExecutor(max_workers=24, thread_name_prefix="branch-prefetch")
+_pending = {}
+_lock = threading.Lock()
+
+
+def load_settings():
+    """Prefetch settings of the active prompt set, or None when disabled."""
+    try:
+        settings = {**DEFAULT_SETTINGS, **PromptService.get_prompt_settings(PREFETCH_PROMPT)}
+    except Exception as e:
+        print(f"Could not load branch prefetch settings: {e}")
+        return None
+    return settings if settings["enabled"] else None
+
+
+def _generate_branch(session_model, history, branch):
+    started = time.perf_counter()
+    response = llm_guard.generate(
+        session_model,
+        history + [{"role": "user", "parts": [PromptService.get_branch_prefetch_prompt(quality=branch)]}],
+        "prefetch"
+    )
+    usage = {**usage_from_response(response), "latency_ms": round((time.perf_counter() - started) * 1000)}
+    # A score trailer here would grade the hypothetical answer, not the candidate's
+    question, _ = split_reply(response.text)
+    return question, usage
+
+
+def start(session_id, turn, session_model, history, record_late=None):
+    """
+    Start generating the three follow-ups for the question just shown at
+    `turn`. Any older prefetch of the session is discarded; its usage is
+    returned so the caller can still account for it. `record_late(usage)`
+    receives the usage of branches still running when this prefetch is
+    dropped, once they finish.
+    """
+    history = list(history)
+    futures = {branch: _executor.submit(_generate_branch, session_model, history, branch) for branch in BRANCHES}
+    with _lock:
+        previous = _pending.pop(session_id, None)
+        _pending[session_id] = (turn, futures, record_late)
+    print(f"🔮 Prefetching {len(futures)} follow-ups for session {session_id} (turn {turn})")
+    return _collect_usage(previous)
+
+
+def pending_turn(session_id):
+    """Turn whose follow-ups are being prefetched for a session, or None."""
+    with _lock:
+        entry = _pending.get(session_id)
+    return entry[0] if entry else None
+
+
+def _collect_usage(entry):
+    """
+    Usage of the branches of a prefetch that finished; unstarted ones are
+    cancelled and running ones go to the prefetch's record_late when done.
+    """
+    if not entry:
+        return []
+    _, futures, record_late = entry
+    usage = []
+    for future in futures.values():
+        if future.cancel():
+            continue
+        if not future.done():
+            if record_late:
+                future.add_done_callback(lambda done: _record_late(done, record_late))
+        elif not future.exception():
+            usage.append(future.result()[1])
+    return usage
+
+
+def _record_late(future, record_late):
+    if future.exception():
+        return
+    try:
+        record_late(future.result()[1])
+    except Exception as e:
+        print(f"Could not record the usage of a discarded prefetch branch: {e}")
+
+
+def discard(session_id):
+    """
+    Drop a session's prefetch; returns the usage of branches that already
+    ran (branches still running are recorded when they finish).
+    """
+    with _lock:
+        entry = _pending.pop(session_id, None)
+    return _collect_usage(entry)
+
+
+def _classified(response, started):
+    """(branch, usage) of a classifier reply, or None if it named no branch."""
+    label = response.text.strip().lower()
+    branch = next((b for b in BRANCHES if b in label), None)
+    if branch:
+        return branch, {**usage_from_response(response), "latency_ms": round((time.perf_counter() - started) * 1000)}
+    return None
+
+
+def classify(settings, question, answer, classifier_model):
+    """Return (branch, usage or None) for an answer."""
+    if settings["classifier"] == "model":
+        try:
+            started = time.perf_counter()
+            response = llm_guard.generate(
+                classifier_model,
+                PromptService.get_answer_quality_prompt(question=question, answer=answer),
+                "answer_classifier"
+            )
+            classified = _classified(response, started)
+            if classified:
+                return classified
+        except Exception as e:
+            print(f"Answer classification failed, using heuristic: {e}")
+    return answer_signal(answer), None
+
+
+async def classify_async(settings, question, answer, classifier_model):
+    """classify() for the event loop; the prompt is read on the blocking pool."""
+    if settings["classifier"] == "model":
+        try:
+            started = time.perf_counter()
+            prompt = await run_blocking(PromptService.get_answer_quality_prompt, question=question, answer=answer)
+            response = await llm_guard.generate_async(classifier_model, prompt, "answer_classifier")
+            classified = _classified(response, started)
+            if classified:
+                return classified
+        except Exception as e:
+            print(f"Answer classification failed, using heuristic: {e}")
+    return answer_signal(answer), None
+
+
+def _sum_usage(usage_records):
+    total = {"prompt_tokens": 0, "cached_tokens": 0, "output_tokens": 0, "total_tokens": 0}
+    for usage in usage_records:
+        for field in total:
+            total[field] += usage.get(field) or 0
+    return total
+
+
+def take(session_id, turn, branch, wait_seconds):
+    """
+    Return (question, usage) for `turn`: the prefetched `branch`, or None
+    when there is no usable prefetch (missing, stale, failed or not ready
+    in time). `usage` sums every branch that ran, since all of them were
+    spent on this turn either way; unstarted branches are cancelled as in
+    discard().
+    """
+    with _lock:
+        entry = _pending.pop(session_id, None)
+    if not entry:
+        return None, _sum_usage([])
+    prefetched_turn, futures, _ = entry
+
+    question = None
+    if prefetched_turn == turn:
+        try:
+            question, _ = futures[branch].result(timeout=wait_seconds)
+        except TimeoutError:
+            print(f"Prefetched {branch} branch not ready after {wait_seconds}s, generating live")
+        except Exception as e:
+            print(f"Prefetched {branch} branch failed, generating live: {e}")
+
+    return question, _sum_usage(_collect_usage(entry))
+
+
+async def take_async(session_id, turn, branch, wait_seconds):
+    """take() for the event loop: the branch is awaited, not waited on by a thread."""
+    with _lock:
+        entry = _pending.pop(session_id, None)
+    if not entry:
+        return None, _sum_usage([])
+    prefetched_turn, futures, _ = entry
+
+    question = None
+    if prefetched_turn == turn:
+        try:
+            # shield: a timeout must not cancel the branch, its usage is still collected
+            question, _ = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(futures[branch])), wait_seconds)
+        except asyncio.TimeoutError:
+            print(f"Prefetched {branch} branch not ready after {wait_seconds}s, generating live")
+        except Exception as e:
+            print(f"Prefetched {branch} branch failed, generating live: {e}")
+
+    return question, _sum_usage(_collect_usage(entry))
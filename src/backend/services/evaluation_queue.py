@@ -0,0 +1,245 @@
+"""
+Evaluation Queue Module
+=======================
+Background evaluation of finished interviews.
+
+`end-interview` closes the session and enqueues a job in the
+`evaluation_jobs` collection; a worker thread in every gunicorn worker
+claims jobs with an atomic find-and-modify and runs the summary call off
+the request path.
+
+Jobs are safe to retry:
+  - a claimed job holds a lease; if its worker dies the lease expires and
+    another worker picks the job up again. Every claim gets a new lease
+    id and all job writes are conditional on it, so a worker whose lease
+    expired stops instead of overwriting the job that took it over
+  - the evaluation is stored on the job as soon as it exists, so a retry
+    after that point never calls the model again
+  - the result is upserted into `interview_results` by session id (unique)
+    and the session is only deleted once everything is saved
+
+Failed attempts are retried with exponential backoff up to MAX_ATTEMPTS.
+"""
+
+import os
+import socket
+import threading
+import uuid
+from datetime import datetime, timedelta
+
+from bson.objectid import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from config import evaluation_jobs_collection, interview_results_collection, scheduled_interviews_collection
+from services.ai_engine_db import finish_interview, delete_session
+
+MAX_ATTEMPTS = 4
+LEASE = timedelta(minutes=10)
+RETRY_BACKOFF_SECONDS = 30
+POLL_SECONDS = 5
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+_wakeup = threading.Event()
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def enqueue_evaluation(session_id, candidate_id, scheduledInterviewId=None, credentialId=None, delay_seconds=0):
+    """
+    Queue the evaluation of a closed session, runnable after `delay_seconds`.
+    Enqueuing the same session twice returns the existing job id.
+    """
+    now = datetime.utcnow()
+    job = {
+        "session_id": session_id,
+        "candidateId": candidate_id,
+        "scheduledInterviewId": scheduledInterviewId,
+        "credentialId": credentialId,
+        "status": "queued",
+        "attempts": 0,
+        "available_at": now + timedelta(seconds=delay_seconds),
+        "created_at": now,
+        "updated_at": now
+    }
+    try:
+        job_id = evaluation_jobs_collection.insert_one(job).inserted_id
+    except DuplicateKeyError:
+        return str(evaluation_jobs_collection.find_one({"session_id": session_id}, {"_id": 1})["_id"])
+
+    if scheduledInterviewId:
+        try:
+            scheduled_interviews_collection.update_one(
+                {"_id": ObjectId(scheduledInterviewId)},
+                {"$set": {"completed": True, "completedAt": now, "evaluationStatus": "queued"}}
+            )
+        except Exception as e:
+            print(f"Error marking interview as completed: {e}")
+
+    print(f"📥 Queued evaluation job {job_id} for session {session_id}")
+    _wakeup.set()
+    return str(job_id)
+
+
+def get_job(job_id, candidate_id=None):
+    """Return an evaluation job (optionally only if it belongs to `candidate_id`), or None."""
+    try:
+        query = {"_id": ObjectId(job_id)}
+    except Exception:
+        return None
+    if candidate_id is not None:
+        query["candidateId"] = candidate_id
+    return evaluation_jobs_collection.find_one(query)
+
+
+def _claim_job():
+    """Atomically take the oldest runnable job: queued and due, or running with an expired lease."""
+    now = datetime.utcnow()
+    return evaluation_jobs_collection.find_one_and_update(
+        {"$or": [
+            {"status": "queued", "available_at": {"$lte": now}},
+            {"status": "running", "lease_expires_at": {"$lte": now}}
+        ]},
+        {
+            "$set": {"status": "running", "lease_expires_at": now + LEASE, "lease": uuid.uuid4().hex,
+                     "worker": WORKER_ID, "updated_at": now},
+            "$inc": {"attempts": 1}
+        },
+        sort=[("created_at", 1)],
+        return_document=ReturnDocument.AFTER
+    )
+
+
+class LeaseLostError(Exception):
+    """The job's lease expired and another worker claimed it."""
+
+
+def _owned(job):
+    """Filter matching the job only while this claim still holds its lease."""
+    return {"_id": job["_id"], "lease": job["lease"]}
+
+
+def _update_owned(job, update):
+    if not evaluation_jobs_collection.update_one(_owned(job), update).matched_count:
+        raise LeaseLostError(f"Evaluation job {job['_id']} was taken over by another worker")
+
+
+def _save_result(job, evaluation):
+    """Upsert the evaluation into interview_results; a retried job finds the existing document."""
+    result_doc = {
+        "sessionId": job["session_id"],
+        "candidateId": job["candidateId"],
+        "credentialId": job.get("credentialId"),
+        "scheduledInterviewId": job.get("scheduledInterviewId"),
+        "score": evaluation.get("score", 0),
+        "strengths": evaluation.get("strengths", []),
+        "improvements": evaluation.get("improvements", []),
+        "interview_verdict": evaluation.get("interview_verdict", "Average"),
+        "improvement_guide": evaluation.get("improvement_guide", "Average"),
+        "qa_pairs": evaluation.get("qa_pairs", []),
+        "raw_result": evaluation.get("raw_result", ""),
+        "token_usage": evaluation.get("token_usage"),
+        "dimension_scores": evaluation.get("dimension_scores"),
+        "turn_scores": evaluation.get("turn_scores"),
+        "completed_at": job["created_at"],
+        "evaluated_at": datetime.utcnow(),
+        "published": False
+    }
+    try:
+        result = interview_results_collection.find_one_and_update(
+            {"sessionId": job["session_id"]},
+            {"$setOnInsert": result_doc},
+            upsert=True,
+            projection={"_id": 1},
+            return_document=ReturnDocument.AFTER
+        )
+    except DuplicateKeyError:
+        # Another worker's upsert inserted it first
+        result = interview_results_collection.find_one({"sessionId": job["session_id"]}, {"_id": 1})
+    print(f"Interview results saved for candidate: {job['candidateId']}")
+    return result["_id"]
+
+
+def _set_evaluation_status(job, status):
+    if not job.get("scheduledInterviewId"):
+        return
+    try:
+        scheduled_interviews_collection.update_one(
+            {"_id": ObjectId(job["scheduledInterviewId"])},
+            {"$set": {"evaluationStatus": status}}
+        )
+    except Exception as e:
+        print(f"Error updating evaluation status: {e}")
+
+
+def _run_job(job):
+    evaluation = job.get("evaluation")
+    if evaluation is None:
+        evaluation = finish_interview(job["session_id"], job.get("scheduledInterviewId"), delete=False)
+        if evaluation.get("error") == "Session not found":
+            raise LookupError(f"Session {job['session_id']} no longer exists")
+        _update_owned(job, {"$set": {"evaluation": evaluation}})
+
+    result_id = _save_result(job, evaluation)
+    _set_evaluation_status(job, "done")
+    delete_session(job["session_id"], job.get("scheduledInterviewId"))
+
+    _update_owned(job, {
+        "$set": {"status": "done", "result_id": result_id, "updated_at": datetime.utcnow()},
+        "$unset": {"lease_expires_at": "", "lease": ""}
+    })
+    print(f"✅ Evaluation job {job['_id']} done (attempt {job['attempts']})")
+
+
+def _fail_job(job, error):
+    if isinstance(error, LeaseLostError):
+        print(f"⚠️ {error}; leaving it to that worker")
+        return
+    permanent = isinstance(error, LookupError) or job["attempts"] >= MAX_ATTEMPTS
+    update = {"error": str(error), "updated_at": datetime.utcnow()}
+    if permanent:
+        update["status"] = "failed"
+        _set_evaluation_status(job, "failed")
+        print(f"❌ Evaluation job {job['_id']} failed permanently: {error}")
+    else:
+        delay = RETRY_BACKOFF_SECONDS * 2 ** (job["attempts"] - 1)
+        update["status"] = "queued"
+        update["available_at"] = datetime.utcnow() + timedelta(seconds=delay)
+        print(f"⚠️ Evaluation job {job['_id']} failed (attempt {job['attempts']}), retrying in {delay}s: {error}")
+    result = evaluation_jobs_collection.update_one(_owned(job), {"$set": update, "$unset": {"lease_expires_at": "", "lease": ""}})
+    if not result.matched_count:
+        print(f"⚠️ Evaluation job {job['_id']} was taken over by another worker; failure not recorded")
+
+
+def _worker_loop():
+    while True:
+        try:
+            job = _claim_job()
+        except Exception as e:
+            print(f"Evaluation worker could not claim a job: {e}")
+            job = None
+
+        if job is None:
+            _wakeup.wait(POLL_SECONDS)
+            _wakeup.clear()
+            continue
+
+        if job["attempts"] > MAX_ATTEMPTS:
+            _fail_job(job, RuntimeError("Lease expired too many times"))
+            continue
+
+        try:
+            _run_job(job)
+        except Exception as e:
+            _fail_job(job, e)
+
+
+def start_worker():
+    """Start this process's evaluation worker thread (once)."""
+    global _worker
+    with _worker_lock:
+        if _worker is None:
+            _worker = threading.Thread(target=_worker_loop, name="evaluation-worker", daemon=True)
+            _worker.start()
+            print(f"🧵 Evaluation worker started ({WORKER_ID})")
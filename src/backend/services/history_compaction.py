@@ -0,0 +1,172 @@
+"""
+History Compaction Module
+=========================
+Rolling compaction for long interview chats.
+
+Past a configurable turn or prompt-token threshold, older Q&A turns are
+folded into a short running summary and only the last N turns are
+replayed verbatim. The full turn log, questions and answers stay in
+MongoDB, so the final report still sees every answer.
+
+Settings live on the `history_compaction_prompt` prompt document, so
+each prompt set can enable and tune compaction independently:
+
+  enabled           turn compaction on/off
+  turn_threshold    compact when more uncompacted turns than this are replayed
+  token_threshold   ... or when the last call's prompt exceeded this many tokens
+  keep_last_turns   turns always replayed verbatim
+
+`compact_async` is the same fold for the async turns (ASGI).
+"""
+
+import time
+
+from services.prompt_service import PromptService
+from services.prompt_cache import usage_from_response
+from services import llm_guard
+from services.answer_normalizer import normalize as normalize_answer
+from services.async_runtime import run_blocking
+
+COMPACTION_PROMPT = "history_compaction_prompt"
+
+DEFAULT_SETTINGS = {
+    "enabled": False,
+    "turn_threshold": 12,
+    "token_threshold": 12000,
+    "keep_last_turns": 4,
+}
+
+
+def load_settings():
+    """Compaction settings of the active prompt set, or None when disabled."""
+    try:
+        settings = {**DEFAULT_SETTINGS, **PromptService.get_prompt_settings(COMPACTION_PROMPT)}
+    except Exception as e:
+        print(f"Could not load compaction settings: {e}")
+        return None
+    return settings if settings["enabled"] else None
+
+
+def needs_compaction(session_doc) -> bool:
+    """True when the session has more replayed history than its thresholds allow."""
+    settings = session_doc.get("compaction_settings")
+    if not settings:
+        return False
+
+    upto_turn = (session_doc.get("compaction") or {}).get("upto_turn", 0)
+    replayed_turns = session_doc.get("turn_count", 0) - upto_turn
+    if replayed_turns <= settings["keep_last_turns"]:
+        return False  # nothing old enough to fold
+
+    usage_log = session_doc.get("usage") or []
+    last_prompt_tokens = usage_log[-1].get("prompt_tokens") or 0 if usage_log else 0
+    return replayed_turns > settings["turn_threshold"] or last_prompt_tokens > settings["token_threshold"]
+
+
+def _count_tokens(model, text) -> int:
+    try:
+        return llm_guard.count_tokens(model, text, "compaction_count").total_tokens
+    except Exception:
+        return len(text) // 4
+
+
+async def _count_tokens_async(model, text) -> int:
+    try:
+        return (await llm_guard.count_tokens_async(model, text, "compaction_count")).total_tokens
+    except Exception:
+        return len(text) // 4
+
+
+def _fold(session_doc):
+    """(from_turn, upto_turn, transcript, summarisation prompt) of the turns to fold."""
+    settings = session_doc["compaction_settings"]
+    previous = session_doc.get("compaction") or {}
+    from_turn = previous.get("upto_turn", 0) + 1
+    upto_turn = session_doc["turn_count"] - settings["keep_last_turns"]
+
+    # Turn t answers questions[t-1]
+    questions, answers = session_doc["questions"], session_doc["answers"]
+    transcript = "\n\n".join(
+        f"Q{t}: {questions[t - 1]}\nA{t}: {normalize_answer(answers[t - 1])[0]}" for t in range(from_turn, upto_turn + 1)
+    )
+
+    prompt = PromptService.get_compaction_prompt(
+        previous_summary=previous.get("summary") or "None yet.",
+        transcript=transcript
+    )
+    return from_turn, upto_turn, transcript, prompt
+
+
+def _usage(session_doc, response, started):
+    return {
+        "call": "compaction",
+        "turn": session_doc["turn_count"],
+        **usage_from_response(response),
+        "latency_ms": round((time.perf_counter() - started) * 1000)
+    }
+
+
+def _compaction(session_doc, from_turn, upto_turn, summary, folded_tokens, summary_tokens):
+    previous = session_doc.get("compaction") or {}
+    compaction = {
+        "summary": summary,
+        "upto_turn": upto_turn,
+        # Raw tokens of every folded turn vs. the summary that replaces them
+        "folded_tokens": previous.get("folded_tokens", 0) + folded_tokens,
+        "summary_tokens": summary_tokens,
+        "tokens_saved": previous.get("tokens_saved", 0),
+    }
+    print(f"🗜️ Compacted turns {from_turn}-{upto_turn} into a {summary_tokens}-token summary")
+    return compaction
+
+
+def compact(session_doc, model):
+    """
+    Fold every turn older than the last `keep_last_turns` into the running
+    summary. Returns (compaction, usage): the new `compaction` record for
+    the session document and the token usage of the summarisation call.
+    """
+    from_turn, upto_turn, transcript, prompt = _fold(session_doc)
+    started = time.perf_counter()
+    response = llm_guard.generate(model, prompt, "compaction")
+    summary = response.text.strip()
+    usage = _usage(session_doc, response, started)
+    compaction = _compaction(
+        session_doc, from_turn, upto_turn, summary,
+        _count_tokens(model, transcript),
+        usage["output_tokens"] or _count_tokens(model, summary)
+    )
+    return compaction, usage
+
+
+async def compact_async(session_doc, model):
+    """compact() for the event loop; the prompt is read on the blocking pool."""
+    from_turn, upto_turn, transcript, prompt = await run_blocking(_fold, session_doc)
+    started = time.perf_counter()
+    response = await llm_guard.generate_async(model, prompt, "compaction")
+    summary = response.text.strip()
+    usage = _usage(session_doc, response, started)
+    compaction = _compaction(
+        session_doc, from_turn, upto_turn, summary,
+        await _count_tokens_async(model, transcript),
+        usage["output_tokens"] or await _count_tokens_async(model, summary)
+    )
+    return compaction, usage
+
+
+def summary_message(session_doc) -> str:
+    """User message that stands in for the folded turns when the chat is rebuilt."""
+    compaction = session_doc["compaction"]
+    upto_turn = compaction["upto_turn"]
+    return (
+        f"INTERVIEW SO FAR (summary of answers 1-{upto_turn}):\n{compaction['summary']}\n\n"
+        f"Last question asked before the turns that follow:\n{session_doc['questions'][upto_turn]}"
+    )
+
+
+def tokens_saved_per_call(session_doc) -> int:
+    """Input tokens each call saves by replaying the summary instead of the folded turns."""
+    compaction = session_doc.get("compaction")
+    if not compaction:
+        return 0
+    return max(0, compaction["folded_tokens"] - compaction["summary_tokens"])
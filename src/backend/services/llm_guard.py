@@ -0,0 +1,430 @@
+"""
+LLM Guard Module
+================
+Deadlines, hedged requests and a circuit breaker around Gemini calls.
+
+Every guarded call:
+  - carries a deadline (request_options timeout): LLM_TIMEOUT_SECONDS,
+    or LLM_STREAM_TIMEOUT_SECONDS for streamed replies, so a stuck
+    upstream call fails instead of holding a worker
+  - is refused at once with LLMUnavailableError while the circuit is open
+  - adds its latency and outcome to per-feature rolling windows
+    (p50/p95/p99 via `stats()`)
+
+Hedging (features listed in LLM_HEDGE_FEATURES): when a call is still
+running after the feature's LLM_HEDGE_PERCENTILE latency, a duplicate is
+sent and the first reply wins. The losing call's tokens are still
+recorded in the token ledger as "<feature>_hedge". Chat turns are hedged
+by sending the history explicitly (two stateless requests) and appending
+the winner to the chat, so the chat never sees both replies. Streams are
+never hedged.
+
+Streamed replies record their outcome when the caller has drained them
+(success) or a chunk fails (failure), not when the stream opens; their
+latency is the time to open, which includes the first chunk. A stream its
+caller stops reading has no outcome and frees a half-open probe.
+
+Circuit breaker (one for the Gemini upstream): over the last
+LLM_BREAKER_WINDOW calls, if at least LLM_BREAKER_MIN_CALLS ran and the
+error share or the share slower than LLM_BREAKER_SLOW_SECONDS exceeds
+its threshold, the circuit opens for LLM_BREAKER_COOLDOWN_SECONDS. After
+the cooldown one probe call is let through (half-open): success closes
+the circuit, failure opens it again, and a probe whose caller is
+cancelled (async) frees the slot for the next probe.
+
+count_tokens calls are guarded too (deadline and breaker, never hedged):
+they go to the same upstream.
+"""
+
+import asyncio
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from config import (
+    LLM_TIMEOUT_SECONDS,
+    LLM_STREAM_TIMEOUT_SECONDS,
+    LLM_HEDGE_FEATURES,
+    LLM_HEDGE_PERCENTILE,
+    LLM_BREAKER_WINDOW,
+    LLM_BREAKER_MIN_CALLS,
+    LLM_BREAKER_ERROR_RATE,
+    LLM_BREAKER_SLOW_SECONDS,
+    LLM_BREAKER_SLOW_RATE,
+    LLM_BREAKER_COOLDOWN_SECONDS
+)
+from services import token_ledger
+from services.prompt_cache import usage_from_response
+
+# Latency samples kept per feature for percentiles and hedge delays
+LATENCY_SAMPLES = 500
+
+# Samples a feature needs before its percentile is trusted as a hedge delay
+MIN_HEDGE_SAMPLES = 20
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="llm-hedge")
+
+
+class LLMUnavailableError(Exception):
+    """The call was refused (circuit open) or did not finish before its deadline."""
+
+
+class _Stream:
+    """
+    A streamed SDK response (sync or async) that records its outcome once
+    iteration ends. Any other attribute (text, usage_metadata, ...) is the
+    response's own.
+    """
+
+    def __init__(self, response, feature, timeout, latency_s):
+        self._response = response
+        self._feature = feature
+        self._timeout = timeout
+        self._latency_s = latency_s
+        self._recorded = False
+
+    def __getattr__(self, name):
+        return getattr(self._response, name)
+
+    def _record(self, failed):
+        if self._recorded:
+            return
+        self._recorded = True
+        _breaker.record(failed, None if failed else self._latency_s)
+        _observe(self._feature, None if failed else self._latency_s, failed=failed)
+
+    def _fail(self, error):
+        self._record(True)
+        return _timeout_error(self._feature, self._timeout, error) or error
+
+    def _stop(self, finished):
+        if finished:
+            self._record(False)
+        elif not self._recorded:
+            # Closed or cancelled by its caller: not an upstream outcome
+            _breaker.abandon()
+
+    def __iter__(self):
+        finished = False
+        try:
+            for chunk in self._response:
+                yield chunk
+            finished = True
+        except Exception as e:
+            raise self._fail(e)
+        finally:
+            self._stop(finished)
+
+    async def __aiter__(self):
+        finished = False
+        try:
+            async for chunk in self._response:
+                yield chunk
+            finished = True
+        except Exception as e:
+            raise self._fail(e)
+        finally:
+            self._stop(finished)
+
+
+class _Breaker:
+    def __init__(self):
+        self.state = CLOSED
+        self.opened_at = None
+        self.outcomes = deque(maxlen=LLM_BREAKER_WINDOW)  # (failed, slow)
+        self.probing = False
+        self.opened = 0
+        self.rejected = 0
+        self.lock = threading.Lock()
+
+    def allow(self):
+        with self.lock:
+            if self.state == OPEN:
+                if time.monotonic() - self.opened_at < LLM_BREAKER_COOLDOWN_SECONDS:
+                    self.rejected += 1
+                    return False
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN:
+                if self.probing:
+                    self.rejected += 1
+                    return False
+                self.probing = True
+            return True
+
+    def abandon(self):
+        """A call ended without an outcome (its caller was cancelled): free a half-open probe."""
+        with self.lock:
+            if self.state == HALF_OPEN:
+                self.probing = False
+
+    def record(self, failed, latency_s):
+        with self.lock:
+            if self.state == HALF_OPEN:
+                self.probing = False
+                if failed:
+                    self._open("half-open probe failed")
+                else:
+                    self.state = CLOSED
+                    self.outcomes.clear()
+                    print("🟢 LLM circuit closed")
+                return
+            self.outcomes.append((failed, latency_s is not None and latency_s > LLM_BREAKER_SLOW_SECONDS))
+            if self.state == CLOSED and len(self.outcomes) >= LLM_BREAKER_MIN_CALLS:
+                errors = sum(1 for failed, _ in self.outcomes if failed) / len(self.outcomes)
+                slow = sum(1 for _, slow in self.outcomes if slow) / len(self.outcomes)
+                if errors > LLM_BREAKER_ERROR_RATE:
+                    self._open(f"error rate {errors:.0%}")
+                elif slow > LLM_BREAKER_SLOW_RATE:
+                    self._open(f"slow-call rate {slow:.0%}")
+
+    def _open(self, reason):
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self.opened += 1
+        self.outcomes.clear()
+        print(f"🔴 LLM circuit open for {LLM_BREAKER_COOLDOWN_SECONDS}s: {reason}")
+
+    def stats(self):
+        with self.lock:
+            return {"state": self.state, "opened": self.opened, "rejected": self.rejected}
+
+
+_breaker = _Breaker()
+_latencies = {}
+_counters = {}
+_lock = threading.Lock()
+
+
+def _observe(feature, latency_s, failed, hedged=False, hedge_won=False):
+    with _lock:
+        if feature not in _latencies:
+            _latencies[feature] = deque(maxlen=LATENCY_SAMPLES)
+            _counters[feature] = {"calls": 0, "errors": 0, "hedged": 0, "hedge_wins": 0}
+        counters = _counters[feature]
+        counters["calls"] += 1
+        counters["errors"] += int(failed)
+        counters["hedged"] += int(hedged)
+        counters["hedge_wins"] += int(hedge_won)
+        if not failed:
+            _latencies[feature].append(latency_s)
+
+
+def _percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+def _hedge_delay(feature):
+    """Seconds after which a duplicate is sent, or None if the feature is not hedged (yet)."""
+    if feature not in LLM_HEDGE_FEATURES or not LLM_HEDGE_PERCENTILE:
+        return None
+    with _lock:
+        samples = list(_latencies.get(feature) or ())
+    if len(samples) < MIN_HEDGE_SAMPLES:
+        return None
+    return _percentile(samples, LLM_HEDGE_PERCENTILE)
+
+
+def _check_open(feature):
+    if not _breaker.allow():
+        with _lock:
+            counters = _counters.get(feature)
+            if counters:
+                counters["errors"] += 1
+        raise LLMUnavailableError(f"Gemini circuit is open; {feature} call refused")
+
+
+def _timeout_error(feature, timeout, error):
+    # google.api_core raises DeadlineExceeded; the transport may surface its own timeout types
+    name = type(error).__name__
+    if name in ("DeadlineExceeded", "TimeoutError", "ReadTimeout") or isinstance(error, TimeoutError):
+        return LLMUnavailableError(f"{feature} call exceeded its {timeout}s deadline")
+    return None
+
+
+def _call(fn, feature, timeout, stream=False):
+    """
+    Run one guarded request (fn receives request_options) and record its
+    outcome; a stream's success is recorded once it has been drained.
+    """
+    started = time.perf_counter()
+    try:
+        response = fn({"timeout": timeout})
+    except Exception as e:
+        _breaker.record(True, None)
+        _observe(feature, None, failed=True)
+        raise _timeout_error(feature, timeout, e) or e
+    latency = time.perf_counter() - started
+    if stream:
+        return _Stream(response, feature, timeout, latency)
+    _breaker.record(False, latency)
+    _observe(feature, latency, failed=False)
+    return response
+
+
+def _hedged(fn, feature, timeout, delay, tags):
+    """First reply of a request and, after `delay`, its duplicate."""
+    deadline = time.monotonic() + timeout
+    started = time.perf_counter()
+    primary = _executor.submit(fn, {"timeout": timeout})
+    done, _ = wait([primary], timeout=delay)
+    if done:
+        futures = [primary]
+    else:
+        remaining = max(1.0, deadline - time.monotonic())
+        futures = [primary, _executor.submit(fn, {"timeout": remaining})]
+        print(f"🪞 Hedging {feature} call after {delay:.1f}s")
+
+    pending = set(futures)
+    error = None
+    while pending:
+        done, pending = wait(pending, timeout=max(0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+        if not done:
+            break
+        for future in done:
+            if future.exception() is not None:
+                error = future.exception()
+                continue
+            latency = time.perf_counter() - started
+            _breaker.record(False, latency)
+            _observe(feature, latency, failed=False, hedged=len(futures) > 1, hedge_won=future is not primary)
+            for loser in (pending | done) - {future}:
+                loser.add_done_callback(lambda f: _record_loser(f, feature, tags))
+            return future.result()
+
+    _breaker.record(True, None)
+    _observe(feature, None, failed=True, hedged=len(futures) > 1)
+    if error is None:
+        raise LLMUnavailableError(f"{feature} call exceeded its {timeout}s deadline")
+    raise _timeout_error(feature, timeout, error) or error
+
+
+def _record_loser(future, feature, tags):
+    """Tokens of the slower hedged request were spent too."""
+    if future.exception() is None:
+        token_ledger.record(f"{feature}_hedge", usage_from_response(future.result()), **(tags or {}))
+
+
+def generate(model, contents, feature, tags=None, timeout=None, **kwargs):
+    """
+    Guarded model.generate_content. `tags` (organization_id,
+    scheduled_interview_id, session_id, screening_job_id) label the
+    ledger record of a losing hedged request.
+    """
+    _check_open(feature)
+    timeout = timeout or LLM_TIMEOUT_SECONDS
+
+    def request(options):
+        return model.generate_content(contents, request_options=options, **kwargs)
+
+    delay = _hedge_delay(feature)
+    if delay is None:
+        return _call(request, feature, timeout)
+    return _hedged(request, feature, timeout, delay, tags)
+
+
+def send(chat, content, feature, tags=None, stream=False, timeout=None, generation_config=None):
+    """
+    Guarded chat.send_message. Hedged chat turns send the history with
+    two stateless requests and append the winning reply to the chat.
+    """
+    _check_open(feature)
+    if stream:
+        timeout = timeout or LLM_STREAM_TIMEOUT_SECONDS
+        return _call(
+            lambda options: chat.send_message(content, stream=True, generation_config=generation_config,
+                                              request_options=options),
+            feature, timeout, stream=True
+        )
+
+    timeout = timeout or LLM_TIMEOUT_SECONDS
+    delay = _hedge_delay(feature)
+    if delay is None:
+        return _call(
+            lambda options: chat.send_message(content, generation_config=generation_config, request_options=options),
+            feature, timeout
+        )
+
+    contents = list(chat.history) + [{"role": "user", "parts": [content]}]
+    response = _hedged(
+        lambda options: chat.model.generate_content(contents, generation_config=generation_config,
+                                                    request_options=options),
+        feature, timeout, delay, tags
+    )
+    chat.history = contents + [response.candidates[0].content]
+    return response
+
+
+def count_tokens(model, contents, feature, timeout=None):
+    """Guarded model.count_tokens (deadline and breaker; never hedged)."""
+    _check_open(feature)
+    return _call(
+        lambda options: model.count_tokens(contents, request_options=options),
+        feature, timeout or LLM_TIMEOUT_SECONDS
+    )
+
+
+async def _call_async(make_request, feature, timeout, stream=False):
+    _check_open(feature)
+    started = time.perf_counter()
+    try:
+        response = await asyncio.wait_for(make_request({"timeout": timeout}), timeout)
+    except asyncio.CancelledError:
+        # Not an upstream outcome, but a half-open probe must not stay claimed forever
+        _breaker.abandon()
+        raise
+    except Exception as e:
+        _breaker.record(True, None)
+        _observe(feature, None, failed=True)
+        raise _timeout_error(feature, timeout, e) or e
+    latency = time.perf_counter() - started
+    if stream:
+        return _Stream(response, feature, timeout, latency)
+    _breaker.record(False, latency)
+    _observe(feature, latency, failed=False)
+    return response
+
+
+async def generate_async(model, contents, feature, timeout=None, **kwargs):
+    """Guarded generate_content_async (deadline and breaker; async calls are not hedged)."""
+    return await _call_async(
+        lambda options: model.generate_content_async(contents, request_options=options, **kwargs),
+        feature, timeout or LLM_TIMEOUT_SECONDS
+    )
+
+
+async def count_tokens_async(model, contents, feature, timeout=None):
+    """Guarded model.count_tokens_async (deadline and breaker)."""
+    return await _call_async(
+        lambda options: model.count_tokens_async(contents, request_options=options),
+        feature, timeout or LLM_TIMEOUT_SECONDS
+    )
+
+
+async def send_async(chat, content, feature, stream=False, timeout=None, generation_config=None):
+    """Guarded chat.send_message_async (deadline and breaker)."""
+    return await _call_async(
+        lambda options: chat.send_message_async(content, stream=stream, generation_config=generation_config,
+                                                request_options=options),
+        feature, timeout or (LLM_STREAM_TIMEOUT_SECONDS if stream else LLM_TIMEOUT_SECONDS), stream=stream
+    )
+
+
+def stats():
+    """Circuit state plus per-feature call counters and p50/p95/p99 latency (ms)."""
+    with _lock:
+        features = {feature: (list(_latencies[feature]), dict(_counters[feature])) for feature in _counters}
+    report = {}
+    for feature, (samples, counters) in features.items():
+        report[feature] = {
+            **counters,
+            **{
+                f"p{p}_ms": round(_percentile(samples, p) * 1000) if samples else None
+                for p in (50, 95, 99)
+            }
+        }
+    return {"circuit": _breaker.stats(), "features": report}
@@ -0,0 +1,215 @@
+"""
+Model Router Module
+===================
+Routes each Gemini task to a model tier and generation config.
+
+Tasks:
+  first_question   greeting and first interview question
+  next_question    interview turns (the session chat's model)
+  summary          end-of-interview evaluation and score synthesis
+  normalize        resume field extraction
+  evaluate         resume scoring against the job
+  question_bank    offline question pool generation
+
+The routing table lives on the `model_routing` prompt document:
+
+  enabled   route tasks (otherwise every task uses DEFAULT_MODEL as before)
+  routes    {task: {"model", "temperature", "max_output_tokens", "top_p",
+                    "top_k", "thinking_budget"}}
+  plans     {plan: {task: {...}}}  overrides for organisations whose
+            document has that `plan`
+  prices    {model: {"input", "cached", "output"}}  USD per million tokens,
+            used by `report()`
+
+Interview sessions resolve their routes once at creation and keep them
+on the session document, so a table change never switches the model of
+a running interview. `thinking_budget` is applied only when the
+installed SDK's GenerationConfig has a thinking_config field.
+
+`report()` rolls the token ledger up per task and model: calls, tokens,
+average latency and cost.
+"""
+
+import threading
+import time
+
+import google.generativeai as genai
+from bson.objectid import ObjectId
+from google.generativeai import protos
+
+from config import organizations_collection, scheduled_interviews_collection, llm_usage_collection
+from services.prompt_service import PromptService
+
+ROUTING_PROMPT = "model_routing"
+
+DEFAULT_MODEL = "gemini-2.5-flash"
+
+TASKS = ("first_question", "next_question", "summary", "normalize", "evaluate", "question_bank")
+
+DEFAULT_ROUTES = {
+    "first_question": {"model": "gemini-2.5-flash-lite", "temperature": 0.7, "max_output_tokens": 512},
+    "next_question": {"model": "gemini-2.5-flash"},
+    "summary": {"model": "gemini-2.5-flash", "temperature": 0.2},
+    "normalize": {"model": "gemini-2.5-flash-lite", "temperature": 0, "thinking_budget": 0},
+    "evaluate": {"model": "gemini-2.5-flash", "temperature": 0.2},
+    "question_bank": {"model": "gemini-2.5-flash"},
+}
+
+# Ledger feature -> routed task (for report())
+FEATURE_TASKS = {
+    "first_question": "first_question",
+    "opening_pregeneration": "first_question",
+    "next_question": "next_question",
+    "summary": "summary",
+    "score_synthesis": "summary",
+    "resume_normalize": "normalize",
+    "resume_evaluate": "evaluate",
+    "question_bank": "question_bank",
+}
+
+GENERATION_FIELDS = ("temperature", "max_output_tokens", "top_p", "top_k")
+
+SUPPORTS_THINKING = "thinking_config" in protos.GenerationConfig.meta.fields
+
+# Routing table and organisation plans are re-read at most this often
+SETTINGS_TTL_SECONDS = 60
+PLAN_TTL_SECONDS = 300
+
+_settings = {"value": None, "expires": 0}
+_plans = {}
+_models = {}
+_lock = threading.Lock()
+
+
+def load_settings():
+    """Routing settings of the active prompt set (cached briefly); None when routing is disabled."""
+    now = time.monotonic()
+    with _lock:
+        if _settings["expires"] > now:
+            return _settings["value"]
+    try:
+        settings = PromptService.get_prompt_settings(ROUTING_PROMPT)
+    except Exception as e:
+        print(f"Could not load model routing settings: {e}")
+        settings = {}
+    value = settings if settings.get("enabled") else None
+    with _lock:
+        _settings.update(value=value, expires=now + SETTINGS_TTL_SECONDS)
+    return value
+
+
+def organization_plan(organization_id):
+    """The organisation's `plan` (cached per process), or None."""
+    if not organization_id:
+        return None
+    now = time.monotonic()
+    with _lock:
+        cached = _plans.get(organization_id)
+        if cached and cached[1] > now:
+            return cached[0]
+    try:
+        org = organizations_collection.find_one({"_id": ObjectId(organization_id)}, {"plan": 1})
+        plan = (org or {}).get("plan")
+    except Exception as e:
+        print(f"Could not read the plan of organisation {organization_id}: {e}")
+        plan = None
+    with _lock:
+        _plans[organization_id] = (plan, now + PLAN_TTL_SECONDS)
+    return plan
+
+
+def organization_of(scheduled_interview_id):
+    """Organisation of a scheduled interview, or None."""
+    if not scheduled_interview_id:
+        return None
+    try:
+        scheduled = scheduled_interviews_collection.find_one(
+            {"_id": ObjectId(scheduled_interview_id)}, {"organizationId": 1}
+        )
+    except Exception:
+        return None
+    return (scheduled or {}).get("organizationId")
+
+
+def route(task, organization_id=None):
+    """{"task", "model", **generation settings} for a task, with the organisation's plan applied."""
+    settings = load_settings()
+    if not settings:
+        return {"task": task, "model": DEFAULT_MODEL}
+
+    routes = {**DEFAULT_ROUTES, **(settings.get("routes") or {})}
+    resolved = {"model": DEFAULT_MODEL, **(routes.get(task) or {})}
+    plan = organization_plan(organization_id)
+    if plan:
+        resolved.update(((settings.get("plans") or {}).get(plan) or {}).get(task) or {})
+    return {"task": task, **resolved}
+
+
+def generation_config(task_route):
+    """SDK generation_config for a route, or None when it sets nothing."""
+    if not task_route:
+        return None
+    config = {field: task_route[field] for field in GENERATION_FIELDS if task_route.get(field) is not None}
+    if task_route.get("thinking_budget") is not None and SUPPORTS_THINKING:
+        config["thinking_config"] = {"thinking_budget": task_route["thinking_budget"]}
+    return config or None
+
+
+def get_model(task_route):
+    """Plain (no system instruction) model for a route, built once per model name."""
+    name = task_route["model"]
+    with _lock:
+        if name not in _models:
+            _models[name] = genai.GenerativeModel(name)
+        return _models[name]
+
+
+# ─── Reporting ───────────────────────────────────────────────────────────────
+
+def cost(model_name, prompt_tokens, cached_tokens, output_tokens, prices):
+    """USD cost of a call (or sum of calls) at the table's prices; None for unpriced models."""
+    price = prices.get((model_name or "").replace("models/", ""))
+    if not price:
+        return None
+    uncached = max(0, prompt_tokens - cached_tokens)
+    return round((
+        uncached * price.get("input", 0)
+        + cached_tokens * price.get("cached", price.get("input", 0))
+        + output_tokens * price.get("output", 0)
+    ) / 1_000_000, 6)
+
+
+def report(since=None, organization_id=None):
+    """Per task and model: calls, tokens, average latency and cost from the token ledger."""
+    match = {}
+    if since:
+        match["at"] = {"$gte": since}
+    if organization_id:
+        match["meta.organization_id"] = organization_id
+    pipeline = [
+        {"$match": match},
+        {"$group": {
+            "_id": {"feature": "$meta.feature", "model": "$meta.model"},
+            "calls": {"$sum": 1},
+            "prompt_tokens": {"$sum": "$prompt_tokens"},
+            "cached_tokens": {"$sum": "$cached_tokens"},
+            "output_tokens": {"$sum": "$output_tokens"},
+            "total_tokens": {"$sum": "$total_tokens"},
+            "avg_latency_ms": {"$avg": "$latency_ms"}
+        }},
+        {"$sort": {"total_tokens": -1}}
+    ]
+    prices = (load_settings() or {}).get("prices") or {}
+    rows = []
+    for row in llm_usage_collection.aggregate(pipeline):
+        key = row.pop("_id")
+        feature = key.get("feature") or "unknown"
+        rows.append({
+            "task": FEATURE_TASKS.get(feature, feature),
+            "feature": feature,
+            "model": key.get("model"),
+            **row,
+            "avg_latency_ms": round(row["avg_latency_ms"]) if row["avg_latency_ms"] is not None else None,
+            "cost_usd": cost(key.get("model"), row["prompt_tokens"], row["cached_tokens"], row["output_tokens"], prices)
+        })
+    return {"routes": {task: route(task) for task in TASKS}, "usage": rows}
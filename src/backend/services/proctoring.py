@@ -0,0 +1,271 @@
+"""
+Proctoring Module
+=================
+Server-side ingestion of proctoring events (tab switches, loud audio,
+...) sent by the candidate's browser.
+
+Events arrive in batches (WebSocket "violation" frames or POST
+/interview/proctoring/events). `ingest()` only accepts them for a
+session created by the same candidate (one projected find_one on the
+session), then appends them to an in-process buffer. A flusher thread
+writes the buffer every PROCTORING_FLUSH_SECONDS, or as soon as it holds
+PROCTORING_BATCH_SIZE events:
+
+  - one insert_many into the `proctoring_events` time-series collection
+    (meta: session_id, scheduled_interview_id, type); after a partial
+    failure only the events that were not inserted go back to the buffer
+  - one bulk_write of $inc updates on the interview sessions:
+    `violation_count` and `violation_counts.<type>`
+
+Every worker buffers its own events. So the count is complete when the
+evaluator reads it:
+  - events for a session that is already closed are written at once
+    instead of buffered;
+  - evaluation jobs become due SETTLE_SECONDS after the session closes,
+    by which time every worker has flushed what it accepted before.
+The evaluator then reads the counter with a single projected find_one
+(`violation_count`) instead of loading an event array.
+"""
+
+import atexit
+import threading
+from datetime import datetime, timezone
+from collections import defaultdict
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from config import (
+    PROCTORING_FLUSH_SECONDS,
+    PROCTORING_BATCH_SIZE,
+    interview_sessions_collection,
+    proctoring_events_collection
+)
+
+# Events accepted per batch; the rest of an oversized batch is dropped
+MAX_EVENTS_PER_BATCH = 500
+
+# Events kept when MongoDB is unreachable; older ones are dropped first
+MAX_BUFFERED = 200000
+
+# Evaluations wait this long after a session closes, so that every worker
+# has flushed the events it accepted before (one flush interval + slack)
+SETTLE_SECONDS = PROCTORING_FLUSH_SECONDS + 5
+
+# insert_many error code of an event that is already stored
+DUPLICATE_KEY = 11000
+
+# Optional client fields stored with an event (strings truncated)
+DETAIL_FIELDS = ("level", "message", "detail")
+MAX_DETAIL_CHARS = 200
+
+_buffer = []
+_lock = threading.Lock()
+_flush_lock = threading.Lock()
+_wakeup = threading.Event()
+_flusher = None
+_stats = {"received": 0, "flushed": 0, "flushes": 0, "failed_flushes": 0, "dropped": 0}
+
+
+def _client_time(value):
+    """Browser timestamp (ms since epoch or ISO 8601) as naive UTC, or None."""
+    try:
+        if isinstance(value, (int, float)):
+            return datetime.utcfromtimestamp(value / 1000)
+        if isinstance(value, str):
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+            if parsed.tzinfo:
+                parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+            return parsed
+    except (OverflowError, OSError, ValueError):
+        pass
+    return None
+
+
+def _event(session_id, scheduled_interview_id, raw, received_at):
+    if not isinstance(raw, dict):
+        raw = {"type": raw}
+    event_type = str(raw.get("type") or raw.get("event") or "unknown")[:64]
+    # Client clocks are kept as reported, but never ahead of the server
+    occurred_at = _client_time(raw.get("time") or raw.get("timestamp"))
+    occurred_at = min(occurred_at, received_at) if occurred_at else received_at
+    detail = {k: raw[k] for k in DETAIL_FIELDS if k in raw and raw[k] is not None}
+    return {
+        "at": occurred_at,
+        "meta": {
+            "session_id": session_id,
+            "scheduled_interview_id": str(scheduled_interview_id) if scheduled_interview_id else None,
+            "type": event_type
+        },
+        "received_at": received_at,
+        **{k: str(v)[:MAX_DETAIL_CHARS] if isinstance(v, str) else v for k, v in detail.items()
+           if isinstance(v, (str, int, float, bool))}
+    }
+
+
+def _owned_session(session_id, candidate_id):
+    """The session's {"closed"} state if `candidate_id` created it, else None."""
+    doc = interview_sessions_collection.find_one({"_id": session_id}, {"candidate_id": 1, "closed": 1})
+    # Sessions created before owners were recorded expire within hours
+    if not doc or doc.get("candidate_id", candidate_id) != candidate_id:
+        return None
+    return doc
+
+
+def _buffer_events(events):
+    with _lock:
+        _buffer.extend(events)
+        if len(_buffer) > MAX_BUFFERED:
+            _stats["dropped"] += len(_buffer) - MAX_BUFFERED
+            del _buffer[:len(_buffer) - MAX_BUFFERED]
+        return len(_buffer) >= PROCTORING_BATCH_SIZE
+
+
+def ingest(session_id, candidate_id, events, scheduled_interview_id=None):
+    """
+    Accept a batch of events for a session of `candidate_id`. Returns the
+    number accepted, or None if the session does not exist or belongs to
+    someone else. Events of an open session are buffered; those of a
+    closed session (its evaluation may be reading the count) are written
+    before returning.
+    """
+    if not session_id or not events:
+        return 0
+    session = _owned_session(session_id, candidate_id)
+    if session is None:
+        return None
+    received_at = datetime.utcnow()
+    batch = [_event(session_id, scheduled_interview_id, raw, received_at) for raw in events[:MAX_EVENTS_PER_BATCH] if raw]
+    with _lock:
+        _stats["received"] += len(batch)
+        _stats["dropped"] += max(0, len(events) - MAX_EVENTS_PER_BATCH)
+
+    if session.get("closed") and batch:
+        _write_batch(batch)
+        return len(batch)
+
+    full = _buffer_events(batch)
+    _start_flusher()
+    if full:
+        _wakeup.set()
+    return len(batch)
+
+
+def _counter_updates(events):
+    """One $inc per session in the batch."""
+    counters = defaultdict(lambda: defaultdict(int))
+    for e in events:
+        session_counters = counters[e["meta"]["session_id"]]
+        session_counters["violation_count"] += 1
+        # "." and "$" are not allowed in field names
+        field = e["meta"]["type"].replace(".", "_").replace("$", "_")
+        session_counters[f"violation_counts.{field}"] += 1
+    return [UpdateOne({"_id": session_id}, {"$inc": dict(c)}) for session_id, c in counters.items()]
+
+
+def _write(events):
+    """
+    Store a batch and count the stored events. Returns the events that
+    were not inserted (all of them if the insert failed outright).
+    """
+    try:
+        proctoring_events_collection.insert_many(events, ordered=False)
+        failed = []
+    except BulkWriteError as e:
+        # ordered=False: every event not listed in writeErrors was inserted
+        errors = e.details.get("writeErrors") or []
+        failed_indexes = {err["index"] for err in errors if err.get("code") != DUPLICATE_KEY}
+        failed = [events[i] for i in sorted(failed_indexes)]
+        print(f"Proctoring flush partly failed ({len(failed)} of {len(events)} events kept): {errors[:1]}")
+    except Exception as e:
+        print(f"Proctoring flush failed ({len(events)} events kept): {e}")
+        failed = events
+    for event in failed:
+        event.pop("_id", None)
+
+    failed_ids = {id(e) for e in failed}
+    stored = [e for e in events if id(e) not in failed_ids]
+    if stored:
+        try:
+            interview_sessions_collection.bulk_write(_counter_updates(stored), ordered=False)
+        except Exception as e:
+            print(f"Proctoring counters update failed: {e}")
+    return failed
+
+
+def _write_batch(events):
+    """Write events now; what could not be inserted goes back to the buffer. Returns the number stored."""
+    failed = _write(events)
+    with _lock:
+        if failed:
+            _buffer[:0] = failed
+            _stats["failed_flushes"] += 1
+        _stats["flushed"] += len(events) - len(failed)
+        _stats["flushes"] += 1
+    if failed:
+        _start_flusher()
+    return len(events) - len(failed)
+
+
+def _flush(select):
+    """Write buffered events chosen by `select(event)`; events that were not inserted go back to the buffer."""
+    with _flush_lock:
+        with _lock:
+            events = [e for e in _buffer if select(e)]
+            if not events:
+                return 0
+            _buffer[:] = [e for e in _buffer if not select(e)]
+        return _write_batch(events)
+
+
+def flush():
+    """Write every buffered event."""
+    return _flush(lambda e: True)
+
+
+def flush_session(session_id):
+    """Write this worker's buffered events of one session (other workers flush within SETTLE_SECONDS)."""
+    return _flush(lambda e: e["meta"]["session_id"] == session_id)
+
+
+def _flush_loop():
+    while True:
+        _wakeup.wait(PROCTORING_FLUSH_SECONDS)
+        _wakeup.clear()
+        flush()
+
+
+def _start_flusher():
+    global _flusher
+    if _flusher is not None:
+        return
+    with _lock:
+        if _flusher is None:
+            _flusher = threading.Thread(target=_flush_loop, name="proctoring", daemon=True)
+            _flusher.start()
+            atexit.register(flush)
+
+
+def violation_count(session_id):
+    """
+    Number of proctoring events stored for a session. Sessions created
+    before server-side ingestion kept an inline `violations` array.
+    """
+    doc = interview_sessions_collection.find_one({"_id": session_id}, {"violation_count": 1}) or {}
+    if "violation_count" in doc:
+        return doc["violation_count"]
+    legacy = interview_sessions_collection.find_one({"_id": session_id}, {"violations": 1}) or {}
+    return len(legacy.get("violations") or [])
+
+
+def session_events(session_id, limit=1000):
+    """A session's stored events, oldest first."""
+    cursor = proctoring_events_collection.find(
+        {"meta.session_id": session_id}, {"_id": 0}
+    ).sort("at", 1).limit(limit)
+    return list(cursor)
+
+
+def stats():
+    with _lock:
+        return {**_stats, "buffered": len(_buffer)}
@@ -0,0 +1,136 @@
+"""
+Prompt Cache Module
+===================
+Gemini context caching for the invariant part of the interview system
+instruction.
+
+The prefix (everything in the system prompt template before the first
+candidate-specific placeholder, plus the static next-question rules) is
+identical for every interview, so it is uploaded once as cached content
+and used as the model's system instruction. Candidate-specific fields
+follow it in the chat history.
+
+If explicit caching is unavailable (prefix below the model's minimum
+cacheable size, quota, API error), the model is built with the prefix as
+a plain system instruction. The prefix still comes first in every
+request, so Gemini's implicit prefix caching can hit.
+
+Cache records are shared across workers through the `prompt_caches`
+collection; each worker also keeps the built model objects in memory.
+Cached content belongs to one model, so the key covers the model name
+(see services/model_router for which model a task uses).
+"""
+
+import hashlib
+import threading
+from datetime import datetime, timedelta
+
+import google.generativeai as genai
+from google.generativeai import caching
+
+from config import prompt_caches_collection
+
+MODEL_NAME = "models/gemini-2.5-flash"
+
+# Lifetime of an explicit cache, and how long before expiry it is replaced
+CACHE_TTL = timedelta(hours=6)
+REFRESH_MARGIN = timedelta(minutes=10)
+
+_models = {}
+_lock = threading.Lock()
+
+
+def _model_path(model_name: str = None) -> str:
+    model_name = model_name or MODEL_NAME
+    return model_name if model_name.startswith("models/") else f"models/{model_name}"
+
+
+def prefix_key(prefix: str, model_name: str = None) -> str:
+    """Stable key for a prompt prefix (model + content hash)."""
+    return hashlib.sha256(f"{_model_path(model_name)}\n{prefix}".encode("utf-8")).hexdigest()[:32]
+
+
+def _create_cache(key: str, prefix: str, model_name: str = None) -> dict:
+    """Upload the prefix as cached content; fall back to an uncached record on failure."""
+    record = {
+        "_id": key,
+        "model": _model_path(model_name),
+        "prefix": prefix,
+        "created_at": datetime.utcnow()
+    }
+    try:
+        cached = caching.CachedContent.create(
+            model=record["model"],
+            display_name=f"interview-prefix-{key[:12]}",
+            system_instruction=prefix,
+            ttl=CACHE_TTL
+        )
+        record["cache_name"] = cached.name
+        record["expires_at"] = datetime.utcnow() + CACHE_TTL
+        print(f"🧊 Created Gemini context cache {cached.name} for prompt prefix {key[:12]}")
+    except Exception as e:
+        # Typically "cached content is too small"; don't retry until the prefix changes
+        record["cache_name"] = None
+        record["expires_at"] = None
+        record["error"] = str(e)
+        print(f"Context caching unavailable for prompt prefix {key[:12]}, using implicit caching: {e}")
+
+    prompt_caches_collection.replace_one({"_id": key}, record, upsert=True)
+    return record
+
+
+def _is_fresh(record: dict) -> bool:
+    if not record.get("cache_name"):
+        return True  # uncacheable prefix; nothing to refresh
+    return record["expires_at"] - REFRESH_MARGIN > datetime.utcnow()
+
+
+def _build_model(record: dict):
+    if record.get("cache_name"):
+        try:
+            return genai.GenerativeModel.from_cached_content(record["cache_name"])
+        except Exception as e:
+            print(f"Failed to load context cache {record['cache_name']}: {e}")
+    return genai.GenerativeModel(record.get("model", MODEL_NAME), system_instruction=record["prefix"])
+
+
+def _resolve(key: str, prefix: str = None, model_name: str = None):
+    """Return (model, expires_at) for a prefix key, creating or refreshing the cache as needed."""
+    record = prompt_caches_collection.find_one({"_id": key})
+    if record is None or not _is_fresh(record):
+        if prefix is None:
+            if record is None:
+                raise KeyError(f"Unknown prompt prefix: {key}")
+            prefix = record["prefix"]
+        record = _create_cache(key, prefix, model_name or (record or {}).get("model"))
+
+    return _build_model(record), record.get("expires_at")
+
+
+def get_model(key: str, prefix: str = None, model_name: str = None):
+    """
+    Return a GenerativeModel whose system instruction is the prefix
+    identified by `key`. `prefix` and `model_name` (the name `key` was made
+    with) are only needed the first time a key is seen.
+    """
+    with _lock:
+        entry = _models.get(key)
+        if entry:
+            model, expires_at = entry
+            if expires_at is None or expires_at - REFRESH_MARGIN > datetime.utcnow():
+                return model
+
+        model, expires_at = _resolve(key, prefix, model_name)
+        _models[key] = (model, expires_at)
+        return model
+
+
+def usage_from_response(response) -> dict:
+    """Extract token counts (including cached prefix tokens) from a Gemini response."""
+    usage = response.usage_metadata
+    return {
+        "prompt_tokens": usage.prompt_token_count,
+        "cached_tokens": usage.cached_content_token_count,
+        "output_tokens": usage.candidates_token_count,
+        "total_tokens": usage.total_token_count
+    }
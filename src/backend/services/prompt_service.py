@@ -1,4 +1,6 @@
 import os
+import json
+from string import Formatter
 from dotenv import load_dotenv
 from config import db,prompts_collection
 
@@ -50,6 +52,34 @@ class PromptService:
             duration=duration
         )
     
+    @staticmethod
+    def get_system_prompt_parts(**fields):
+        """
+        Split the formatted system prompt into (static_prefix, candidate_profile).
+
+        The static prefix is the template up to the paragraph holding the
+        first placeholder: identical for every interview and therefore cacheable.
+        The candidate profile is the rest of the template with fields filled in.
+        """
+        prompt_text = PromptService.get_prompt("system_prompt")
+
+        # Raw offset of the first placeholder ({{ and }} in literals are escapes)
+        first_field = len(prompt_text)
+        offset = 0
+        for literal, field_name, _, _ in Formatter().parse(prompt_text):
+            offset += len(literal) + literal.count("{") + literal.count("}")
+            if field_name is not None:
+                first_field = offset
+                break
+
+        split_at = first_field
+        if first_field < len(prompt_text):
+            paragraph_start = prompt_text.rfind("\n\n", 0, first_field)
+            split_at = paragraph_start + 2 if paragraph_start != -1 else 0
+        static_prefix = prompt_text[:split_at].format()
+        candidate_profile = prompt_text[split_at:].format(**fields)
+        return static_prefix, candidate_profile
+
     @staticmethod
     def get_next_question_prompt(answer, time_remaining):
         """Get formatted prompt for generating next question"""
@@ -59,6 +89,28 @@ class PromptService:
             time_remaining=time_remaining
         )
     
+    @staticmethod
+    def get_next_question_rules():
+        """
+        Get the static next-question rules for the system instruction.
+        Returns None when the prompt set has no `next_question_rules`
+        (sessions then fall back to the full per-turn prompt).
+        """
+        try:
+            return PromptService.get_prompt("next_question_rules").format()
+        except ValueError:
+            return None
+
+    @staticmethod
+    def get_turn_scoring_rules():
+        """Static rules asking for a score trailer after every answer (see turn_scoring)"""
+        return PromptService.get_prompt("turn_scoring_rules").format()
+
+    @staticmethod
+    def format_turn_payload(answer, time_remaining):
+        """Compact per-turn message used when the rules live in the system instruction"""
+        return json.dumps({"answer": answer, "time_remaining": time_remaining}, ensure_ascii=False)
+    
     @staticmethod
     def get_summary_prompt(violation_count):
         print(violation_count)
@@ -67,6 +119,78 @@ class PromptService:
         # Use replace instead of format to avoid conflicts with JSON braces
         return prompt_text.replace("{violation_count}", str(violation_count))
     
+    @staticmethod
+    def get_transcript_evaluation_prompt(candidate_profile, transcript, violation_count):
+        """Get formatted stateless evaluator prompt over a compact interview transcript"""
+        prompt_text = PromptService.get_prompt("transcript_evaluation_prompt")
+        return prompt_text.format(
+            candidate_profile=candidate_profile,
+            transcript=transcript,
+            violation_count=violation_count
+        )
+    
+    @staticmethod
+    def get_score_synthesis_prompt(turn_notes, violation_count):
+        """Get formatted prompt for the short synthesis over per-turn score notes"""
+        prompt_text = PromptService.get_prompt("score_synthesis_prompt")
+        return prompt_text.format(
+            turn_notes=turn_notes,
+            violation_count=violation_count
+        )
+    
+    @staticmethod
+    def get_question_bank_prompt(position, interview_type, nature_of_position, count):
+        """Get formatted prompt for batch-generating a question pool"""
+        prompt_text = PromptService.get_prompt("question_bank_prompt")
+        return prompt_text.format(
+            position=position,
+            interview_type=interview_type,
+            nature_of_position=nature_of_position,
+            count=count
+        )
+    
+    @staticmethod
+    def get_branch_prefetch_prompt(quality):
+        """Get prompt asking for the follow-up to an assumed weak/average/strong answer"""
+        prompt_text = PromptService.get_prompt("branch_prefetch_prompt")
+        return prompt_text.format(quality=quality)
+    
+    @staticmethod
+    def get_answer_quality_prompt(question, answer):
+        """Get one-word answer classification prompt (weak / average / strong)"""
+        prompt_text = PromptService.get_prompt("answer_quality_prompt")
+        return prompt_text.format(question=question, answer=answer)
+    
+    @staticmethod
+    def get_budget_wrap_up_prompt():
+        """Instruction for the final question when the interview's token budget runs low"""
+        return PromptService.get_prompt("budget_wrap_up_prompt").format()
+    
+    @staticmethod
+    def get_budget_closing_prompt():
+        """Instruction to close the interview after the budget wrap-up question"""
+        return PromptService.get_prompt("budget_closing_prompt").format()
+    
+    @staticmethod
+    def get_business_strategist_prompt():
+        """System instruction for business-strategist advisory sessions"""
+        return PromptService.get_prompt("business_strategist_prompt").format()
+    
+    @staticmethod
+    def get_compaction_prompt(previous_summary, transcript):
+        """Get formatted prompt for folding older interview turns into a running summary"""
+        prompt_text = PromptService.get_prompt("history_compaction_prompt")
+        return prompt_text.format(
+            previous_summary=previous_summary,
+            transcript=transcript
+        )
+    
+    @staticmethod
+    def get_prompt_settings(name):
+        """Settings stored alongside a prompt (e.g. thresholds); empty if none"""
+        prompt = prompts_collection.find_one({"name": name, "active": True}, {"settings": 1})
+        return (prompt or {}).get("settings") or {}
+    
     @staticmethod
     def get_first_question_prompt():
         """Get prompt for first question generation"""
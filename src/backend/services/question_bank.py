@@ -0,0 +1,338 @@
+"""
+Question Bank Module
+====================
+Offline question pools per position, interview type and nature of
+position, with an adaptive selector that serves most turns locally.
+
+Pools are batch-generated with Gemini (one call per pool, on the
+model_router `question_bank` route) and stored in the `question_bank`
+collection; admins can vet, edit or remove single questions. Backfilling
+every missing pool runs in a background thread tracked by a
+`question_bank_jobs` document (start_backfill / backfill_status). Each question carries a difficulty (1 easy, 2 medium, 3 hard)
+and a topic.
+
+During an interview the selector follows the same adaptive rules as the
+interviewer prompt:
+  weak answer     -> easier bank question
+  average answer  -> live Gemini follow-up (at most `max_followups_in_row`)
+  strong answer   -> harder bank question
+Answer quality comes from a local heuristic. Near the end of the
+interview (`min_time_remaining`), or when the pool runs dry, turns go
+back to the live model, which also handles the wrap-up.
+
+Settings live on the `question_bank_prompt` prompt document:
+
+  enabled               use the bank for new sessions when a pool exists
+  require_vetting       only serve questions an admin has vetted
+  min_pool_size         usable questions a pool needs before it is used
+  max_followups_in_row  live follow-ups before returning to the bank
+  min_time_remaining    seconds left below which every turn is live
+"""
+
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from config import question_bank_collection, question_bank_jobs_collection, scheduled_interviews_collection
+from services.prompt_service import PromptService
+from services.prompt_cache import usage_from_response
+from services import token_ledger
+from services import llm_guard
+from services import model_router
+
+BANK_PROMPT = "question_bank_prompt"
+
+DEFAULT_SETTINGS = {
+    "enabled": False,
+    "require_vetting": False,
+    "min_pool_size": 10,
+    "max_followups_in_row": 1,
+    "min_time_remaining": 90,
+}
+
+EASY, MEDIUM, HARD = 1, 2, 3
+
+DIFFICULTY_STEP = {"weak": -1, "average": 0, "strong": 1}
+
+# A backfill still "running" after this long died with its worker; a new one may start
+BACKFILL_STALE_AFTER = timedelta(hours=1)
+
+# Phrases that suggest an answer is backed by examples or reasoning
+EVIDENCE_MARKERS = ("for example", "for instance", "e.g.", "because", "such as", "in my", "we ", "result", "%")
+
+
+def load_settings():
+    """Question-bank settings of the active prompt set, or None when disabled."""
+    try:
+        settings = {**DEFAULT_SETTINGS, **PromptService.get_prompt_settings(BANK_PROMPT)}
+    except Exception as e:
+        print(f"Could not load question bank settings: {e}")
+        return None
+    return settings if settings["enabled"] else None
+
+
+def pool_key(position, interview_type, nature_of_position):
+    """Normalised pool id for a position / interview type / nature of position."""
+    parts = (position, interview_type, nature_of_position)
+    return "|".join(re.sub(r"\s+", " ", str(p or "")).strip().lower() for p in parts)
+
+
+def _usable(question, settings):
+    return question.get("vetted") or not settings["require_vetting"]
+
+
+# ─── Pool generation and maintenance ─────────────────────────────────────────
+
+def _parse_questions(text):
+    start, end = text.find("["), text.rfind("]")
+    if start == -1 or end < start:
+        raise ValueError("No JSON array in question bank reply")
+    questions = []
+    for item in json.loads(text[start:end + 1]):
+        question = str(item.get("question") or "").strip()
+        if not question:
+            continue
+        try:
+            difficulty = min(HARD, max(EASY, int(item.get("difficulty", MEDIUM))))
+        except (TypeError, ValueError):
+            difficulty = MEDIUM
+        questions.append({
+            "id": uuid.uuid4().hex[:10],
+            "text": question,
+            "difficulty": difficulty,
+            "topic": str(item.get("topic") or "general").strip().lower(),
+            "vetted": False
+        })
+    return questions
+
+
+def generate_pool(position, interview_type, nature_of_position="", count=30):
+    """
+    Generate `count` questions for a pool with one Gemini call and merge
+    them into the stored pool (duplicates by text are skipped).
+    Returns the updated pool document.
+    """
+    key = pool_key(position, interview_type, nature_of_position)
+    prompt = PromptService.get_question_bank_prompt(
+        position=position,
+        interview_type=interview_type,
+        nature_of_position=nature_of_position or "Not specified",
+        count=count
+    )
+    task_route = model_router.route("question_bank")
+    started = time.perf_counter()
+    response = llm_guard.generate(model_router.get_model(task_route), prompt, "question_bank",
+                                  generation_config=model_router.generation_config(task_route))
+    latency_ms = round((time.perf_counter() - started) * 1000)
+    generated = _parse_questions(response.text)
+
+    pool = question_bank_collection.find_one({"_id": key}) or {"questions": []}
+    known = {q["text"].lower() for q in pool["questions"]}
+    new_questions = [q for q in generated if q["text"].lower() not in known]
+
+    usage = {"call": "question_bank", "model": task_route["model"], **usage_from_response(response),
+             "at": datetime.utcnow()}
+    question_bank_collection.update_one(
+        {"_id": key},
+        {
+            "$setOnInsert": {
+                "position": position,
+                "interviewType": interview_type,
+                "natureOfPosition": nature_of_position,
+                "created_at": datetime.utcnow()
+            },
+            "$push": {"questions": {"$each": new_questions}, "usage": usage},
+            "$set": {"updated_at": datetime.utcnow()}
+        },
+        upsert=True
+    )
+    token_ledger.record("question_bank", usage, model=task_route["model"], latency_ms=latency_ms)
+    print(f"📚 Added {len(new_questions)} questions to pool '{key}' ({usage['total_tokens']} tokens)")
+    return question_bank_collection.find_one({"_id": key})
+
+
+def generate_missing_pools(min_interviews=5, count=30, job_id=None):
+    """
+    Batch-generate pools for every position / interview type / nature of
+    position scheduled at least `min_interviews` times that has no pool yet.
+    Progress goes to the `job_id` backfill document when given.
+    Returns the keys that were generated.
+    """
+    combos = scheduled_interviews_collection.aggregate([
+        {"$group": {
+            "_id": {"position": "$position", "interviewType": "$interviewType", "natureOfPosition": "$natureOfPosition"},
+            "count": {"$sum": 1}
+        }},
+        {"$match": {"count": {"$gte": min_interviews}}}
+    ])
+    existing = set(question_bank_collection.distinct("_id"))
+
+    generated = []
+    for combo in combos:
+        fields = combo["_id"]
+        key = pool_key(fields.get("position"), fields.get("interviewType"), fields.get("natureOfPosition"))
+        if key in existing or not fields.get("position"):
+            continue
+        try:
+            generate_pool(fields.get("position"), fields.get("interviewType"), fields.get("natureOfPosition") or "", count)
+            existing.add(key)
+            generated.append(key)
+            progress = {"$push": {"generated": key}}
+        except Exception as e:
+            print(f"Question pool generation failed for '{key}': {e}")
+            progress = {"$push": {"failed": {"key": key, "error": str(e)}}}
+        if job_id:
+            question_bank_jobs_collection.update_one({"_id": job_id}, progress)
+    return generated
+
+
+def start_backfill(min_interviews=5, count=30, requested_by=None):
+    """
+    Run generate_missing_pools in a background thread (admin requests don't
+    wait on Gemini). Returns the id of the backfill job; a backfill that is
+    already running is returned instead of starting a second one.
+    """
+    running = question_bank_jobs_collection.find_one({
+        "status": "running",
+        "started_at": {"$gt": datetime.utcnow() - BACKFILL_STALE_AFTER}
+    }, {"_id": 1})
+    if running:
+        return running["_id"]
+
+    job_id = str(uuid.uuid4())
+    question_bank_jobs_collection.insert_one({
+        "_id": job_id,
+        "status": "running",
+        "minInterviews": min_interviews,
+        "count": count,
+        "requested_by": requested_by,
+        "generated": [],
+        "failed": [],
+        "started_at": datetime.utcnow()
+    })
+    threading.Thread(
+        target=_run_backfill,
+        args=(job_id, min_interviews, count),
+        name="question-bank-backfill",
+        daemon=True
+    ).start()
+    return job_id
+
+
+def _run_backfill(job_id, min_interviews, count):
+    try:
+        generated = generate_missing_pools(min_interviews, count, job_id=job_id)
+        update = {"status": "done"}
+        print(f"📚 Question bank backfill {job_id} generated {len(generated)} pools")
+    except Exception as e:
+        print(f"Question bank backfill {job_id} failed: {e}")
+        update = {"status": "failed", "error": str(e)}
+    question_bank_jobs_collection.update_one({"_id": job_id}, {"$set": {**update, "finished_at": datetime.utcnow()}})
+
+
+def backfill_status(job_id):
+    """The backfill job document, or None."""
+    return question_bank_jobs_collection.find_one({"_id": job_id})
+
+
+def update_question(key, question_id, fields):
+    """Vet, edit or re-tag one question. Returns False if it does not exist."""
+    allowed = {f"questions.$.{name}": value for name, value in fields.items() if name in ("text", "difficulty", "topic", "vetted")}
+    if not allowed:
+        return False
+    result = question_bank_collection.update_one({"_id": key, "questions.id": question_id}, {"$set": allowed})
+    return result.matched_count > 0
+
+
+def remove_question(key, question_id):
+    result = question_bank_collection.update_one({"_id": key}, {"$pull": {"questions": {"id": question_id}}})
+    return result.modified_count > 0
+
+
+# ─── Adaptive selection ──────────────────────────────────────────────────────
+
+def session_state(config):
+    """
+    Initial selector state for a new session, or None when the bank is
+    disabled or has no usable pool for this interview.
+    """
+    settings = load_settings()
+    if not settings:
+        return None
+    key = pool_key(config.get("role"), config.get("interviewType"), config.get("natureOfRole"))
+    pool = question_bank_collection.find_one({"_id": key}, {"questions": 1})
+    if not pool or sum(_usable(q, settings) for q in pool["questions"]) < settings["min_pool_size"]:
+        return None
+    return {
+        "pool": key,
+        "settings": settings,
+        "difficulty": MEDIUM,
+        "asked": [],
+        "topics": [],
+        "followups_in_row": 0
+    }
+
+
+def answer_signal(answer):
+    """Local answer-quality estimate: "weak", "average" or "strong"."""
+    text = (answer or "").lower()
+    words = len(text.split())
+    if words < 15:
+        return "weak"
+    evidence = sum(marker in text for marker in EVIDENCE_MARKERS) + bool(re.search(r"\d", text))
+    if words >= 60 and evidence >= 2:
+        return "strong"
+    return "average"
+
+
+def _pick(pool, state, target):
+    settings = state["settings"]
+    asked = set(state["asked"])
+    candidates = [q for q in pool["questions"] if q["id"] not in asked and _usable(q, settings)]
+    if not candidates:
+        return None
+    covered = set(state["topics"])
+
+    def rank(q):
+        return (abs(q["difficulty"] - target), q["topic"] in covered)
+
+    best = min(rank(q) for q in candidates)
+    return random.choice([q for q in candidates if rank(q) == best])
+
+
+def plan_turn(state, answer, time_remaining):
+    """
+    Decide how the next question is produced. Returns (question, new_state):
+    a bank question dict, or None for a live Gemini turn.
+    """
+    settings = state["settings"]
+    signal = answer_signal(answer)
+    live_state = {**state, "followups_in_row": state["followups_in_row"] + 1}
+
+    try:
+        if time_remaining is not None and float(time_remaining) < settings["min_time_remaining"]:
+            return None, live_state
+    except (TypeError, ValueError):
+        pass
+
+    if signal == "average" and state["followups_in_row"] < settings["max_followups_in_row"]:
+        return None, live_state
+
+    pool = question_bank_collection.find_one({"_id": state["pool"]}, {"questions": 1})
+    target = min(HARD, max(EASY, state["difficulty"] + DIFFICULTY_STEP[signal]))
+    question = _pick(pool, state, target) if pool else None
+    if question is None:
+        return None, live_state
+
+    print(f"📚 Bank question ({signal} answer → difficulty {question['difficulty']}, topic {question['topic']})")
+    return question, {
+        **state,
+        "difficulty": question["difficulty"],
+        "asked": state["asked"] + [question["id"]],
+        "topics": state["topics"] + [question["topic"]],
+        "followups_in_row": 0
+    }
@@ -17,11 +17,15 @@ Gemini output schema:
 """
 
 import json
+import time
 import google.generativeai as genai
 from config import GEMINI_API_KEY
+from services import token_ledger
+from services import llm_guard
+from services import model_router
+from services.prompt_cache import usage_from_response
 
 genai.configure(api_key=GEMINI_API_KEY)
-_model = genai.GenerativeModel("gemini-2.5-flash")
 
 EVALUATION_PROMPT = """You are a strict, objective resume evaluator for HR screening.
 
@@ -88,15 +92,37 @@ VALID_AI_PROB = {"Low", "Medium", "High"}
 VALID_VERDICT = {"Shortlist", "Borderline", "Reject"}
 
 
-def evaluate_resume(job_criteria: dict, normalized_resume: dict, scoring_scale: int = 10) -> dict:
+def evaluate_resume(job_criteria: dict, normalized_resume: dict, scoring_scale: int = 10, usage_tags: dict = None) -> dict:
     """
     Evaluate a single normalized resume against job criteria using Gemini.
     Returns a validated evaluation dict.
     Raises ValueError if Gemini returns invalid or unparseable data.
+    `usage_tags` (organization_id, screening_job_id) label the call in the token ledger.
     """
+    prompt = _evaluation_prompt(job_criteria, normalized_resume, scoring_scale)
+
+    task_route = model_router.route("evaluate", (usage_tags or {}).get("organization_id"))
+    started = time.perf_counter()
+    response = llm_guard.generate(model_router.get_model(task_route), prompt, "resume_evaluate", tags=usage_tags,
+                                  generation_config=model_router.generation_config(task_route))
+    return _parse_response(response, started, scoring_scale, task_route, usage_tags)
+
+
+async def evaluate_resume_async(job_criteria: dict, normalized_resume: dict, scoring_scale: int = 10, usage_tags: dict = None) -> dict:
+    """evaluate_resume on the async Gemini client (used by the ASGI entry point)."""
+    prompt = _evaluation_prompt(job_criteria, normalized_resume, scoring_scale)
+
+    task_route = model_router.route("evaluate", (usage_tags or {}).get("organization_id"))
+    started = time.perf_counter()
+    response = await llm_guard.generate_async(model_router.get_model(task_route), prompt, "resume_evaluate",
+                                              generation_config=model_router.generation_config(task_route))
+    return _parse_response(response, started, scoring_scale, task_route, usage_tags)
+
+
+def _evaluation_prompt(job_criteria: dict, normalized_resume: dict, scoring_scale: int) -> str:
     mandatory_skills_str = ", ".join(job_criteria.get("mandatorySkills", []))
 
-    prompt = EVALUATION_PROMPT.format(
+    return EVALUATION_PROMPT.format(
         scoring_scale=scoring_scale,
         job_title=job_criteria.get("jobTitle", ""),
         job_description=job_criteria.get("jobDescription", ""),
@@ -111,7 +137,16 @@ def evaluate_resume(job_criteria: dict, normalized_resume: dict, scoring_scale:
         projects=normalized_resume.get("projects", ""),
     )
 
-    response = _model.generate_content(prompt)
+
+def _parse_response(response, started, scoring_scale, task_route, usage_tags):
+    """Record the call in the token ledger and validate its JSON output."""
+    token_ledger.record(
+        "resume_evaluate",
+        usage_from_response(response),
+        model=task_route["model"],
+        latency_ms=round((time.perf_counter() - started) * 1000),
+        **(usage_tags or {})
+    )
     raw_output = response.text.strip()
     print(raw_output)
 
@@ -15,11 +15,15 @@ Output schema:
 """
 
 import json
+import time
 import google.generativeai as genai
 from config import GEMINI_API_KEY
+from services import token_ledger
+from services import llm_guard
+from services import model_router
+from services.prompt_cache import usage_from_response
 
 genai.configure(api_key=GEMINI_API_KEY)
-_model = genai.GenerativeModel("gemini-2.5-flash")
 
 NORMALIZATION_PROMPT = """You are a resume data extractor.
 
@@ -49,15 +53,42 @@ RESUME TEXT:
 REQUIRED_FIELDS = ["candidate_name", "education", "experience", "skills", "projects"]
 
 
-def normalize_resume(resume_text: str) -> dict:
+def normalize_resume(resume_text: str, usage_tags: dict = None) -> dict:
     """
     Send resume text to Gemini for structured extraction.
     Returns a validated dict with the normalized fields.
     Raises ValueError if Gemini returns invalid data.
+    `usage_tags` (organization_id, screening_job_id) label the call in the token ledger.
     """
     prompt = NORMALIZATION_PROMPT.replace("{resume_text}", resume_text)
 
-    response = _model.generate_content(prompt)
+    task_route = model_router.route("normalize", (usage_tags or {}).get("organization_id"))
+    started = time.perf_counter()
+    response = llm_guard.generate(model_router.get_model(task_route), prompt, "resume_normalize", tags=usage_tags,
+                                  generation_config=model_router.generation_config(task_route))
+    return _parse_response(response, started, task_route, usage_tags)
+
+
+async def normalize_resume_async(resume_text: str, usage_tags: dict = None) -> dict:
+    """normalize_resume on the async Gemini client (used by the ASGI entry point)."""
+    prompt = NORMALIZATION_PROMPT.replace("{resume_text}", resume_text)
+
+    task_route = model_router.route("normalize", (usage_tags or {}).get("organization_id"))
+    started = time.perf_counter()
+    response = await llm_guard.generate_async(model_router.get_model(task_route), prompt, "resume_normalize",
+                                              generation_config=model_router.generation_config(task_route))
+    return _parse_response(response, started, task_route, usage_tags)
+
+
+def _parse_response(response, started, task_route, usage_tags):
+    """Record the call in the token ledger and validate its JSON output."""
+    token_ledger.record(
+        "resume_normalize",
+        usage_from_response(response),
+        model=task_route["model"],
+        latency_ms=round((time.perf_counter() - started) * 1000),
+        **(usage_tags or {})
+    )
 
     raw_output = response.text.strip()
     print(raw_output)
@@ -11,16 +11,19 @@ Features:
 - Rate limiting between Gemini calls
 - Progress tracking written to DB
 - Raw resume text discarded after normalization
+- Async variant (run_analysis_async) for the ASGI entry point
 """
 
+import asyncio
 import time
 from datetime import datetime
 from bson import ObjectId
 
 from config import screening_jobs_collection, screening_resumes_collection
 from services.resume_parser import parse_resume
-from services.resume_normalizer import normalize_resume
-from services.resume_evaluator import evaluate_resume
+from services.resume_normalizer import normalize_resume, normalize_resume_async
+from services.resume_evaluator import evaluate_resume, evaluate_resume_async
+from services.async_runtime import run_blocking
 
 # Seconds to wait between consecutive Gemini calls (rate limiting)
 GEMINI_CALL_DELAY = 1.0
@@ -39,6 +42,79 @@ def run_analysis(job_id: str, user_id: str) -> dict:
             "results": [ ... per-resume result dicts ... ]
         }
     """
+    job_criteria, scoring_scale, resumes = _start_job(job_id, user_id)
+    usage_tags = {"organization_id": user_id, "screening_job_id": job_id}
+    results = []
+
+    for idx, resume_doc in enumerate(resumes):
+        # Update progress in DB
+        screening_jobs_collection.update_one(
+            {"_id": ObjectId(job_id)},
+            {"$set": {"progress.current": idx}}
+        )
+
+        try:
+            # ── Step 1: Parse ──
+            raw_text = parse_resume(resume_doc.get("path", ""))
+
+            # ── Step 2: Normalize (Gemini call #1) ──
+            normalized = normalize_resume(raw_text, usage_tags)
+
+            # Discard raw text immediately – only keep structured data
+            raw_text = None
+
+            time.sleep(GEMINI_CALL_DELAY)  # rate limit
+
+            # ── Step 3: Evaluate (Gemini call #2) ──
+            evaluation = evaluate_resume(job_criteria, normalized, scoring_scale, usage_tags)
+
+            time.sleep(GEMINI_CALL_DELAY)  # rate limit
+
+            results.append(_save_analysis(resume_doc, job_criteria, normalized, evaluation))
+        except Exception as e:
+            results.append(_save_failure(resume_doc, e))
+
+    return _finish_job(job_id, results)
+
+
+async def run_analysis_async(job_id: str, user_id: str) -> dict:
+    """
+    run_analysis for the ASGI entry point: the Gemini calls use the async
+    client and the rate-limit pauses are asyncio sleeps, so a job waiting
+    on the model does not hold a thread. Parsing and the short MongoDB
+    writes run in the async engine's thread pool.
+    """
+    job_criteria, scoring_scale, resumes = await run_blocking(_start_job, job_id, user_id)
+    usage_tags = {"organization_id": user_id, "screening_job_id": job_id}
+    results = []
+
+    for idx, resume_doc in enumerate(resumes):
+        await run_blocking(
+            screening_jobs_collection.update_one,
+            {"_id": ObjectId(job_id)},
+            {"$set": {"progress.current": idx}}
+        )
+
+        try:
+            raw_text = await run_blocking(parse_resume, resume_doc.get("path", ""))
+            normalized = await normalize_resume_async(raw_text, usage_tags)
+            raw_text = None
+            await asyncio.sleep(GEMINI_CALL_DELAY)  # rate limit
+
+            evaluation = await evaluate_resume_async(job_criteria, normalized, scoring_scale, usage_tags)
+            await asyncio.sleep(GEMINI_CALL_DELAY)  # rate limit
+
+            results.append(await run_blocking(_save_analysis, resume_doc, job_criteria, normalized, evaluation))
+        except Exception as e:
+            results.append(await run_blocking(_save_failure, resume_doc, e))
+
+    return await run_blocking(_finish_job, job_id, results)
+
+
+# ─── Job bookkeeping (NO AI) ─────────────────────────────────────────────────
+
+def _start_job(job_id: str, user_id: str):
+    """Load the job and its uploaded resumes and mark it as analyzing. Returns (job_criteria, scoring_scale, resumes)."""
     job = screening_jobs_collection.find_one({
         "_id": ObjectId(job_id),
         "userId": user_id
@@ -67,111 +143,92 @@ def run_analysis(job_id: str, user_id: str) -> dict:
     if not resumes:
         raise ValueError("No uploaded resumes found for this job")
 
-    total = len(resumes)
-    completed = 0
-    failed = 0
-    results = []
-
     # Mark job as analyzing
     screening_jobs_collection.update_one(
         {"_id": ObjectId(job_id)},
         {"$set": {
             "status": "analyzing",
-            "progress": {"current": 0, "total": total},
+            "progress": {"current": 0, "total": len(resumes)},
             "analyzingStartedAt": datetime.utcnow().isoformat()
         }}
     )
+    return job_criteria, scoring_scale, resumes
+
+
+def _save_analysis(resume_doc: dict, job_criteria: dict, normalized: dict, evaluation: dict) -> dict:
+    """Store a completed analysis on the resume and return its result entry."""
+    filename = resume_doc.get("originalName", "unknown")
+
+    # Build the analysis result
+    analysis = {
+        "candidateName": evaluation.get("candidate_name", normalized.get("candidate_name", filename)),
+        "score": evaluation.get("final_score", 0),
+        "experienceMatch": evaluation.get("experience_match", ""),
+        "skillsMatchPercent": evaluation.get("skills_match_percent", 0),
+        "roleFit": evaluation.get("role_fit", ""),
+        "aiContentProbability": evaluation.get("ai_content_probability", ""),
+        "verdict": evaluation.get("verdict", ""),
+        "matchedSkills": _extract_matched_skills(
+            job_criteria.get("mandatorySkills", []),
+            normalized.get("skills", "")
+        ),
+        "missingSkills": _extract_missing_skills(
+            job_criteria.get("mandatorySkills", []),
+            normalized.get("skills", "")
+        ),
+        "summary": _build_summary(evaluation, normalized),
+        "normalizedData": {
+            "education": normalized.get("education", ""),
+            "experience": normalized.get("experience", ""),
+            "skills": normalized.get("skills", ""),
+            "projects": normalized.get("projects", ""),
+        },
+        "status": "completed"
+    }
 
-    for idx, resume_doc in enumerate(resumes):
-        resume_id = str(resume_doc["_id"])
-        file_path = resume_doc.get("path", "")
-        filename = resume_doc.get("originalName", "unknown")
-
-        # Update progress in DB
-        screening_jobs_collection.update_one(
-            {"_id": ObjectId(job_id)},
-            {"$set": {"progress.current": idx}}
-        )
-
-        try:
-            # ── Step 1: Parse ──
-            raw_text = parse_resume(file_path)
-
-            # ── Step 2: Normalize (Gemini call #1) ──
-            normalized = normalize_resume(raw_text)
-
-            # Discard raw text immediately – only keep structured data
-            raw_text = None
-
-            time.sleep(GEMINI_CALL_DELAY)  # rate limit
+    # Save to DB
+    screening_resumes_collection.update_one(
+        {"_id": resume_doc["_id"]},
+        {"$set": {
+            "analysis": analysis,
+            "status": "analyzed",
+            "analyzedAt": datetime.utcnow().isoformat()
+        }}
+    )
 
-            # ── Step 3: Evaluate (Gemini call #2) ──
-            evaluation = evaluate_resume(job_criteria, normalized, scoring_scale)
+    return {
+        "resumeId": str(resume_doc["_id"]),
+        "filename": filename,
+        **analysis
+    }
 
-            time.sleep(GEMINI_CALL_DELAY)  # rate limit
 
-            # Build the analysis result
-            analysis = {
-                "candidateName": evaluation.get("candidate_name", normalized.get("candidate_name", filename)),
-                "score": evaluation.get("final_score", 0),
-                "experienceMatch": evaluation.get("experience_match", ""),
-                "skillsMatchPercent": evaluation.get("skills_match_percent", 0),
-                "roleFit": evaluation.get("role_fit", ""),
-                "aiContentProbability": evaluation.get("ai_content_probability", ""),
-                "verdict": evaluation.get("verdict", ""),
-                "matchedSkills": _extract_matched_skills(
-                    job_criteria.get("mandatorySkills", []),
-                    normalized.get("skills", "")
-                ),
-                "missingSkills": _extract_missing_skills(
-                    job_criteria.get("mandatorySkills", []),
-                    normalized.get("skills", "")
-                ),
-                "summary": _build_summary(evaluation, normalized),
-                "normalizedData": {
-                    "education": normalized.get("education", ""),
-                    "experience": normalized.get("experience", ""),
-                    "skills": normalized.get("skills", ""),
-                    "projects": normalized.get("projects", ""),
-                },
-                "status": "completed"
-            }
+def _save_failure(resume_doc: dict, error: Exception) -> dict:
+    """Mark a resume as failed (one failure never stops the job) and return its result entry."""
+    resume_id = str(resume_doc["_id"])
+    filename = resume_doc.get("originalName", "unknown")
+    print(f"[Orchestrator] Error processing resume {resume_id} ({filename}): {error}")
+    screening_resumes_collection.update_one(
+        {"_id": resume_doc["_id"]},
+        {"$set": {
+            "status": "failed",
+            "error": str(error),
+            "failedAt": datetime.utcnow().isoformat()
+        }}
+    )
+    return {
+        "resumeId": resume_id,
+        "filename": filename,
+        "status": "failed",
+        "error": str(error)
+    }
 
-            # Save to DB
-            screening_resumes_collection.update_one(
-                {"_id": resume_doc["_id"]},
-                {"$set": {
-                    "analysis": analysis,
-                    "status": "analyzed",
-                    "analyzedAt": datetime.utcnow().isoformat()
-                }}
-            )
-
-            results.append({
-                "resumeId": resume_id,
-                "filename": filename,
-                **analysis
-            })
-            completed += 1
 
-        except Exception as e:
-            print(f"[Orchestrator] Error processing resume {resume_id} ({filename}): {e}")
-            error_entry = {
-                "resumeId": resume_id,
-                "filename": filename,
-                "status": "failed",
-                "error": str(e)
-            }
-            screening_resumes_collection.update_one(
-                {"_id": resume_doc["_id"]},
-                {"$set": {
-                    "status": "failed",
-                    "error": str(e),
-                    "failedAt": datetime.utcnow().isoformat()
-                }}
-            )
-            results.append(error_entry)
-            failed += 1
+def _finish_job(job_id: str, results: list) -> dict:
+    """Finalize the job status and build the run_analysis result."""
+    total = len(results)
+    failed = sum(1 for r in results if r["status"] == "failed")
+    completed = total - failed
 
     # ── Finalize job status ──
     final_status = "completed" if failed == 0 else ("partial" if completed > 0 else "failed")
@@ -0,0 +1,94 @@
+"""
+Session Cache Module
+====================
+Per-worker LRU + TTL cache for rebuilt interview chat objects.
+
+Each entry remembers the session `version` it was built from. Callers
+confirm freshness against MongoDB with a cheap projected read of the
+version field and fall back to a full load when another worker has
+advanced the session.
+
+Counters (hits, misses, stale, evictions, expirations) are exposed
+through `stats()` so the cache size and TTL can be tuned.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class SessionCache:
+    """Thread-safe LRU cache with a per-entry time-to-live."""
+
+    def __init__(self, max_size: int = 256, ttl_seconds: int = 900):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {
+            "hits": 0,
+            "misses": 0,
+            "stale": 0,
+            "evictions": 0,
+            "expirations": 0,
+        }
+
+    def get(self, key, current_version=None):
+        """
+        Return the cached value for `key`, or None.
+
+        `current_version` (a value, or a callable evaluated only when an
+        entry exists) is compared with the version the entry was built
+        from; a mismatch counts as stale and drops the entry.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._counters["misses"] += 1
+                return None
+
+            if entry[2] < time.monotonic():
+                del self._entries[key]
+                self._counters["expirations"] += 1
+                self._counters["misses"] += 1
+                return None
+
+        cached_version, value, _ = entry
+        if current_version is not None:
+            version = current_version() if callable(current_version) else current_version
+            if version != cached_version:
+                with self._lock:
+                    if self._entries.get(key) is entry:
+                        del self._entries[key]
+                    self._counters["stale"] += 1
+                    self._counters["misses"] += 1
+                return None
+
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            self._counters["hits"] += 1
+        return value
+
+    def put(self, key, version, value):
+        with self._lock:
+            self._entries[key] = (version, value, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._counters["evictions"] += 1
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._counters["hits"] + self._counters["misses"]
+            return {
+                **self._counters,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hit_rate": round(self._counters["hits"] / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,144 @@
+"""
+Session Codec Module
+====================
+Compact, versioned encoding for interview chat history.
+
+Replaces pickled google.generativeai protobuf objects with plain
+role/text records packed with msgpack. Payloads above a size threshold
+are zstd-compressed when the `zstandard` package is available.
+
+Blob layout:
+  byte 0    schema version (SCHEMA_VERSION)
+  byte 1    flags (FLAG_ZSTD when the body is compressed)
+  byte 2..  msgpack body: [[role_code, text], ...]
+
+Blobs written with an older schema version remain decodable; pickled
+histories from before the codec are converted by `decode_legacy_pickle`.
+"""
+
+import pickle
+import msgpack
+
+try:
+    import zstandard
+except ImportError:  # compression is optional
+    zstandard = None
+
+SCHEMA_VERSION = 1
+
+FLAG_NONE = 0
+FLAG_ZSTD = 1
+
+# Bodies smaller than this are stored uncompressed (zstd framing would cost more than it saves)
+COMPRESS_THRESHOLD = 1024
+ZSTD_LEVEL = 3
+
+ROLE_CODES = {"user": 0, "model": 1}
+CODE_ROLES = {code: role for role, code in ROLE_CODES.items()}
+
+_compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL) if zstandard else None
+_decompressor = zstandard.ZstdDecompressor() if zstandard else None
+
+
+def encode_messages(messages: list) -> bytes:
+    """
+    Encode a list of {"role": ..., "text": ...} messages into a codec blob.
+    """
+    records = [[ROLE_CODES[m["role"]], m["text"]] for m in messages]
+    body = msgpack.packb(records, use_bin_type=True)
+
+    flags = FLAG_NONE
+    if _compressor is not None and len(body) >= COMPRESS_THRESHOLD:
+        compressed = _compressor.compress(body)
+        if len(compressed) < len(body):
+            body = compressed
+            flags = FLAG_ZSTD
+
+    return bytes([SCHEMA_VERSION, flags]) + body
+
+
+def decode_messages(blob: bytes) -> list:
+    """
+    Decode a codec blob back into a list of {"role": ..., "text": ...} messages.
+    Raises ValueError for unknown schema versions or unsupported compression.
+    """
+    blob = bytes(blob)
+    if len(blob) < 2:
+        raise ValueError("Session blob is truncated")
+
+    version, flags = blob[0], blob[1]
+    if version > SCHEMA_VERSION:
+        raise ValueError(f"Unsupported session schema version: {version}")
+
+    body = blob[2:]
+    if flags & FLAG_ZSTD:
+        if _decompressor is None:
+            raise ValueError("Session blob is zstd-compressed but zstandard is not installed")
+        body = _decompressor.decompress(body)
+
+    records = msgpack.unpackb(body, raw=False)
+    return [{"role": CODE_ROLES[code], "text": text} for code, text in records]
+
+
+def decode_legacy_pickle(data: bytes) -> list:
+    """
+    Convert a pickled `chat.history` (sessions stored before the codec)
+    into role/text messages. Only ever called on blobs this service wrote
+    itself; new sessions never store pickles.
+    """
+    history = pickle.loads(data)
+    return [{"role": msg.role, "text": msg.parts[0].text} for msg in history]
+
+
+# ─── Session document migration ──────────────────────────────────────────────
+
+def _group_by_turn(tagged_messages: list) -> list:
+    """Pack (turn, message) pairs into one encoded turn-log entry per turn."""
+    entries = []
+    for turn, message in tagged_messages:
+        if entries and entries[-1][0] == turn:
+            entries[-1][1].append(message)
+        else:
+            entries.append((turn, [message]))
+    return [{"turn": turn, "data": encode_messages(messages)} for turn, messages in entries]
+
+
+def migrate_session_doc(session_doc: dict):
+    """
+    Bring an interview_sessions document up to the current codec format.
+
+    Handles pickled `chat_history` sessions and plain role/text turn logs,
+    and adds the turn-claim fields (`version`, `turn_keys`, `usage`) that
+    sessions written before idempotent turns lack; without `version` the
+    conditional claim never matches and every turn is a conflict.
+    Returns the fields to $set on the document, or None if it is already current.
+    """
+    fields = {}
+    if "chat_history" in session_doc:
+        tagged = []
+        turn = 0
+        for message in decode_legacy_pickle(session_doc["chat_history"]):
+            tagged.append((turn, message))
+            if message["role"] == "model":
+                turn += 1
+    elif any("data" not in entry for entry in session_doc.get("turn_log", [])):
+        tagged = [
+            (entry["turn"], {"role": entry["role"], "text": entry["text"]})
+            for entry in session_doc["turn_log"]
+        ]
+    else:
+        tagged = None
+
+    if tagged is not None:
+        turn_log = _group_by_turn(tagged)
+        fields["turn_log"] = turn_log
+        fields["turn_count"] = turn_log[-1]["turn"] if turn_log else 0
+
+    if "version" not in session_doc:
+        fields["version"] = 0
+    if "turn_keys" not in session_doc:
+        # One key slot per answered turn, so keys of later turns land at their index
+        fields["turn_keys"] = [None] * fields.get("turn_count", session_doc.get("turn_count", 0))
+    if "usage" not in session_doc:
+        fields["usage"] = []
+    return fields or None
@@ -0,0 +1,336 @@
+"""
+Session Store Module
+====================
+Bounded, pluggable storage for chat-based engine sessions.
+
+A session is a plain state dict. Keys starting with "_" are transient:
+they live only in worker memory (e.g. "_chat", the live ChatSession) and
+are never persisted. The chat itself is persisted as "history", a list
+of {"role", "text"} messages packed with the session codec, and rebuilt
+with `chat_from_history` when a worker does not hold it.
+
+Backends:
+  memory  LRU + TTL per worker (SessionCache); bounded, not shared
+  mongo   one document per session in `engine_sessions` (TTL-expired);
+          shared by all workers
+  hybrid  memory in front of mongo with write-behind: puts return at
+          once and a snapshot of each dirty session is flushed in the
+          background, at most SESSION_STORE_WRITE_BEHIND_SECONDS later.
+          A worker that holds a session checks the stored version on
+          every get, so a session advanced by another worker is reloaded.
+
+Every state carries a "version" that `put` increments. Stored writes are
+conditional on the version they were based on: a write whose base was
+overtaken by another worker raises SessionConflictError (mongo) or is
+dropped together with the stale memory copy (hybrid), so a newer session
+is never overwritten. Stores register themselves by name; `stats()`
+reports size, hits/misses, evictions, writes, conflicts and pending
+write-behind per store.
+
+The store backs ai_engine.py. ai_engine_db (interview and advisory
+sessions, including ai_engine_business_analyst) keeps its turn-log
+documents and versioned SessionCache; that cache is registered here too
+so all session memory is reported in one place.
+"""
+
+import atexit
+import copy
+import threading
+import time
+from datetime import datetime, timedelta
+
+from pymongo.errors import DuplicateKeyError
+
+from config import (
+    SESSION_CACHE_SIZE,
+    SESSION_CACHE_TTL_SECONDS,
+    SESSION_STORE_BACKEND,
+    SESSION_STORE_WRITE_BEHIND_SECONDS,
+    engine_sessions_collection
+)
+from services.session_cache import SessionCache
+from services.session_codec import encode_messages, decode_messages
+
+# Stored sessions expire this long after their last write
+SESSION_TTL = timedelta(hours=2)
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+class SessionConflictError(Exception):
+    """The stored session was advanced by another worker since this state was read."""
+
+
+def _persistent(state):
+    """A detached snapshot of the persisted fields; later changes to `state` do not reach it."""
+    doc = copy.deepcopy({k: v for k, v in state.items() if not k.startswith("_") and k != "history"})
+    if "history" in state:
+        doc["history"] = encode_messages(state["history"])
+    return doc
+
+
+def _restore(doc):
+    state = {k: v for k, v in doc.items() if k not in ("_id", "namespace", "expires_at")}
+    if "history" in state:
+        state["history"] = decode_messages(state["history"])
+    return state
+
+
+class MemorySessionStore:
+    """Per-worker LRU + TTL store."""
+
+    def __init__(self, namespace, max_size=SESSION_CACHE_SIZE, ttl_seconds=SESSION_CACHE_TTL_SECONDS):
+        self.namespace = namespace
+        self.cache = SessionCache(max_size=max_size, ttl_seconds=ttl_seconds)
+
+    def get(self, session_id, current_version=None):
+        return self.cache.get(session_id, current_version=current_version)
+
+    def put(self, session_id, state):
+        state["version"] = state.get("version", 0) + 1
+        self.cache.put(session_id, state["version"], state)
+
+    def delete(self, session_id):
+        self.cache.invalidate(session_id)
+
+    def stats(self):
+        return {"backend": "memory", **self.cache.stats()}
+
+
+class MongoSessionStore:
+    """Shared store: one `engine_sessions` document per session."""
+
+    def __init__(self, namespace, collection=engine_sessions_collection):
+        self.namespace = namespace
+        self.collection = collection
+        self._counters = {"reads": 0, "misses": 0, "writes": 0, "deletes": 0, "write_failures": 0, "conflicts": 0}
+        self._lock = threading.Lock()
+
+    def _key(self, session_id):
+        return f"{self.namespace}:{session_id}"
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def get(self, session_id):
+        doc = self.collection.find_one({"_id": self._key(session_id)})
+        self._count("reads" if doc else "misses")
+        return _restore(doc) if doc else None
+
+    def version(self, session_id):
+        doc = self.collection.find_one({"_id": self._key(session_id)}, {"version": 1})
+        return doc.get("version", 0) if doc else None
+
+    def write(self, session_id, doc, base_version):
+        """
+        Store a `_persistent` snapshot if the stored session is still at
+        `base_version` (0: not stored yet). Raises SessionConflictError
+        otherwise.
+        """
+        doc = {**doc, "namespace": self.namespace, "expires_at": datetime.utcnow() + SESSION_TTL}
+        key = self._key(session_id)
+        try:
+            if base_version:
+                stored = self.collection.replace_one({"_id": key, "version": base_version}, doc).matched_count
+            else:
+                try:
+                    self.collection.insert_one({"_id": key, **doc})
+                    stored = True
+                except DuplicateKeyError:
+                    stored = False
+        except Exception:
+            self._count("write_failures")
+            raise
+        if not stored:
+            self._count("conflicts")
+            raise SessionConflictError(f"Session {key} changed since version {base_version}")
+        self._count("writes")
+
+    def put(self, session_id, state):
+        base_version = state.get("version", 0)
+        state["version"] = base_version + 1
+        try:
+            self.write(session_id, _persistent(state), base_version)
+        except Exception:
+            state["version"] = base_version
+            raise
+
+    def delete(self, session_id):
+        self.collection.delete_one({"_id": self._key(session_id)})
+        self._count("deletes")
+
+    def stats(self):
+        with self._lock:
+            return {"backend": "mongo", **self._counters}
+
+
+class HybridSessionStore:
+    """Memory in front of Mongo with background write-behind."""
+
+    def __init__(self, namespace, flush_seconds=SESSION_STORE_WRITE_BEHIND_SECONDS):
+        self.namespace = namespace
+        self.memory = MemorySessionStore(namespace)
+        self.mongo = MongoSessionStore(namespace)
+        self.flush_seconds = flush_seconds
+        # session_id -> {"doc": snapshot, "version": ..., "base": stored version it replaces,
+        #                "replaced": earlier base already overwritten by this worker}
+        self._dirty = {}
+        self._lock = threading.Lock()
+        # session_id -> version being written by the flusher right now
+        self._writing = {}
+        self._flushes = 0
+        self._conflicts = 0
+        self._flusher = threading.Thread(target=self._flush_loop, name=f"session-store-{namespace}", daemon=True)
+        self._flusher.start()
+        atexit.register(self.flush)
+
+    def _discard(self, session_id, reason):
+        """Drop this worker's copy of a session another worker has advanced."""
+        with self._lock:
+            lost = self._dirty.pop(session_id, None)
+            if lost is not None:
+                self._conflicts += 1
+        self.memory.delete(session_id)
+        if lost is not None:
+            print(f"⚠️ Session store dropped unflushed version {lost['version']} of {session_id}: {reason}")
+
+    def get(self, session_id):
+        # Stored version first: a write-behind finishing in between then only adds known versions
+        stored = self.mongo.version(session_id)
+        with self._lock:
+            pending = self._dirty.get(session_id)
+            own = {self._writing.get(session_id)}
+            if pending is not None:
+                own |= {pending["base"] or None, pending.get("replaced")}
+
+        if pending is not None:
+            if stored not in own:
+                self._discard(session_id, f"stored version is {stored}")
+            else:
+                state = self.memory.get(session_id)
+                if state is None or state["version"] != pending["version"]:
+                    # Evicted before its write-behind: rebuild from the snapshot
+                    state = _restore(copy.deepcopy(pending["doc"]))
+                    self.memory.cache.put(session_id, state["version"], state)
+                return state
+        else:
+            state = self.memory.get(session_id)
+            if state is not None:
+                if stored == state["version"]:
+                    return state
+                # Another worker advanced (or deleted) the session
+                self.memory.delete(session_id)
+
+        state = self.mongo.get(session_id)
+        if state is not None:
+            self.memory.cache.put(session_id, state["version"], state)
+        return state
+
+    def put(self, session_id, state):
+        base_version = state.get("version", 0)
+        self.memory.put(session_id, state)
+        snapshot = _persistent(state)
+        with self._lock:
+            earlier = self._dirty.get(session_id)
+            # Unflushed versions collapse into one write based on the last stored version
+            self._dirty[session_id] = {
+                "doc": snapshot,
+                "version": state["version"],
+                "base": earlier["base"] if earlier else base_version
+            }
+
+    def delete(self, session_id):
+        with self._lock:
+            self._dirty.pop(session_id, None)
+        self.memory.delete(session_id)
+        self.mongo.delete(session_id)
+
+    def flush(self):
+        """Write dirty snapshots; an entry stays dirty until its latest version is stored."""
+        with self._lock:
+            dirty = [(session_id, dict(entry)) for session_id, entry in self._dirty.items()]
+        for session_id, entry in dirty:
+            with self._lock:
+                self._writing[session_id] = entry["version"]
+            try:
+                self.mongo.write(session_id, entry["doc"], entry["base"])
+            except SessionConflictError as e:
+                with self._lock:
+                    self._writing.pop(session_id, None)
+                self._discard(session_id, str(e))
+                continue
+            except Exception as e:
+                with self._lock:
+                    self._writing.pop(session_id, None)
+                print(f"Session store write-behind failed for {session_id}: {e}")
+                continue
+            with self._lock:
+                self._writing.pop(session_id, None)
+                current = self._dirty.get(session_id)
+                if current is None:
+                    pass
+                elif current["version"] == entry["version"]:
+                    del self._dirty[session_id]
+                else:
+                    # Put again while this write was in flight
+                    current["replaced"], current["base"] = current["base"], entry["version"]
+        with self._lock:
+            self._flushes += 1
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_seconds)
+            self.flush()
+
+    def stats(self):
+        with self._lock:
+            pending, flushes, conflicts = len(self._dirty), self._flushes, self._conflicts
+        return {
+            "backend": "hybrid",
+            "memory": self.memory.stats(),
+            "mongo": self.mongo.stats(),
+            "pending_writes": pending,
+            "flushes": flushes,
+            "conflicts": conflicts
+        }
+
+
+BACKENDS = {
+    "memory": MemorySessionStore,
+    "mongo": MongoSessionStore,
+    "hybrid": HybridSessionStore,
+}
+
+
+def create(namespace, backend=None):
+    """Create (or return the already created) store for `namespace`."""
+    with _registry_lock:
+        if namespace not in _registry:
+            _registry[namespace] = BACKENDS[backend or SESSION_STORE_BACKEND](namespace)
+        return _registry[namespace]
+
+
+def register(namespace, store):
+    """Report an engine's own store (anything with stats()) alongside the others."""
+    with _registry_lock:
+        _registry[namespace] = store
+
+
+def stats():
+    with _registry_lock:
+        stores = dict(_registry)
+    return {namespace: store.stats() for namespace, store in stores.items()}
+
+
+# ─── Chat conversion ─────────────────────────────────────────────────────────
+
+def history_from_chat(chat):
+    """Role/text messages of a ChatSession's history."""
+    return [{"role": m.role, "text": "".join(p.text for p in m.parts)} for m in chat.history]
+
+
+def chat_from_history(model, history):
+    """Rebuild a ChatSession from role/text messages without a model call."""
+    return model.start_chat(history=[{"role": m["role"], "parts": [m["text"]]} for m in history])
@@ -0,0 +1,234 @@
+"""
+Token Budget Module
+===================
+Per-interview and per-organisation token ceilings for interview sessions.
+
+Before every turn the engine asks `plan_turn` which stage the session is
+in, based on the tokens the session has spent so far and an estimate of
+the next call:
+
+  normal     budget left for several more turns
+  wrap_up    the model is asked for one final question
+  closing    the model closes the interview (candidate presses End Interview)
+  exhausted  no room for another call: a fixed closing message is served
+             locally, keeping `summary_reserve_tokens` for the evaluation
+
+The estimate is local (last prompt + expected output + the new answer)
+while the budget is far away, and `count_tokens` on the exact next
+request once the session is inside the wrap-up window, so most turns pay
+no extra round trip. `plan_turn_async` is the same plan for the async
+turns (ASGI), with the count awaited.
+
+Settings live on the `budget_wrap_up_prompt` prompt document:
+
+  enabled                  budget new sessions
+  max_interview_tokens     ceiling per interview session
+  max_org_monthly_tokens   ceiling per organisation per calendar month (0 = none)
+  summary_reserve_tokens   kept back for the end-of-interview evaluation
+  wrap_up_turns            turns of headroom at which wrap-up starts
+  closing_message          served when the budget cannot fund another call
+
+An organisation can override the two ceilings with a `tokenBudget`
+document ({"max_interview_tokens", "max_org_monthly_tokens"}).
+"""
+
+import threading
+import time
+from datetime import datetime
+
+from bson.objectid import ObjectId
+
+from config import organizations_collection, scheduled_interviews_collection
+from services.prompt_service import PromptService
+from services import token_ledger
+from services import llm_guard
+from services.async_runtime import run_blocking
+
+BUDGET_PROMPT = "budget_wrap_up_prompt"
+
+DEFAULT_SETTINGS = {
+    "enabled": False,
+    "max_interview_tokens": 200000,
+    "max_org_monthly_tokens": 0,
+    "summary_reserve_tokens": 8000,
+    "wrap_up_turns": 3,
+    "closing_message": (
+        "Thank you for your time. We have reached the end of this interview. "
+        "Please press the End Interview button to finish."
+    ),
+}
+
+NORMAL, WRAP_UP, CLOSING, EXHAUSTED = "normal", "wrap_up", "closing", "exhausted"
+
+# Rough characters per token for local estimates
+CHARS_PER_TOKEN = 4
+
+# Organisation monthly usage is re-read from the ledger at most this often
+ORG_USAGE_TTL_SECONDS = 60
+
+_org_usage = {}
+_org_lock = threading.Lock()
+
+
+def load_settings():
+    """Budget settings of the active prompt set, or None when disabled."""
+    try:
+        settings = {**DEFAULT_SETTINGS, **PromptService.get_prompt_settings(BUDGET_PROMPT)}
+    except Exception as e:
+        print(f"Could not load token budget settings: {e}")
+        return None
+    return settings if settings["enabled"] else None
+
+
+def session_state(config):
+    """Initial budget state for a new session, or None when budgets are disabled."""
+    settings = load_settings()
+    if not settings:
+        return None
+
+    organization_id = None
+    try:
+        scheduled = scheduled_interviews_collection.find_one(
+            {"_id": ObjectId(config.get("scheduledInterviewId"))}, {"organizationId": 1}
+        )
+        organization_id = (scheduled or {}).get("organizationId")
+        if organization_id:
+            org = organizations_collection.find_one({"_id": ObjectId(organization_id)}, {"tokenBudget": 1})
+            overrides = (org or {}).get("tokenBudget") or {}
+            for field in ("max_interview_tokens", "max_org_monthly_tokens"):
+                if overrides.get(field) is not None:
+                    settings[field] = overrides[field]
+    except Exception as e:
+        print(f"Could not resolve the organisation budget: {e}")
+
+    return {"settings": settings, "organization_id": organization_id, "stage": NORMAL}
+
+
+def session_spent(session_doc):
+    """Tokens spent by the session's own calls so far."""
+    return sum(u.get("total_tokens") or 0 for u in session_doc.get("usage") or [])
+
+
+def organization_spent(organization_id):
+    """Tokens the organisation spent this calendar month (cached briefly per process)."""
+    now = time.monotonic()
+    with _org_lock:
+        cached = _org_usage.get(organization_id)
+        if cached and cached[1] > now:
+            return cached[0]
+    month_start = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    spent = token_ledger.organization_usage(organization_id, since=month_start)["total"]["total_tokens"]
+    with _org_lock:
+        _org_usage[organization_id] = (spent, now + ORG_USAGE_TTL_SECONDS)
+    return spent
+
+
+def _remaining(state, session_doc):
+    settings = state["settings"]
+    remaining = settings["max_interview_tokens"] - session_spent(session_doc)
+    if settings["max_org_monthly_tokens"] and state.get("organization_id"):
+        try:
+            org_remaining = settings["max_org_monthly_tokens"] - organization_spent(state["organization_id"])
+            remaining = min(remaining, org_remaining)
+        except Exception as e:
+            print(f"Could not read organisation token usage: {e}")
+    return remaining - settings["summary_reserve_tokens"]
+
+
+def _local_estimate(session_doc, answer):
+    usage_log = session_doc.get("usage") or []
+    last = usage_log[-1] if usage_log else {}
+    outputs = [u.get("output_tokens") or 0 for u in usage_log]
+    expected_output = max(outputs) if outputs else 0
+    return (
+        (last.get("prompt_tokens") or 0) + (last.get("output_tokens") or 0)
+        + len(answer or "") // CHARS_PER_TOKEN + expected_output
+    )
+
+
+def _next_request(chat, turn_prompt):
+    return list(chat.history) + [{"role": "user", "parts": [turn_prompt]}]
+
+
+def _with_reply(prompt_tokens, session_doc):
+    """Exact prompt size of the next request plus the largest reply so far."""
+    outputs = [u.get("output_tokens") or 0 for u in session_doc.get("usage") or []]
+    return prompt_tokens + (max(outputs) if outputs else 0)
+
+
+def _counted_estimate(chat, turn_prompt, session_doc):
+    response = llm_guard.count_tokens(chat.model, _next_request(chat, turn_prompt), "budget_count")
+    return _with_reply(response.total_tokens, session_doc)
+
+
+async def _counted_estimate_async(chat, turn_prompt, session_doc):
+    response = await llm_guard.count_tokens_async(chat.model, _next_request(chat, turn_prompt), "budget_count")
+    return _with_reply(response.total_tokens, session_doc)
+
+
+def _local_plan(state, session_doc, answer):
+    """
+    (stage, estimate, remaining) decided without a count_tokens call;
+    stage is None when the session is close enough to its ceiling that
+    the next request must be counted.
+    """
+    if state["stage"] == WRAP_UP:
+        return CLOSING, None, None
+    if state["stage"] in (CLOSING, EXHAUSTED):
+        return EXHAUSTED, None, None
+
+    remaining = _remaining(state, session_doc)
+    estimate = _local_estimate(session_doc, answer)
+    if remaining > estimate * state["settings"]["wrap_up_turns"] * 2:
+        return NORMAL, estimate, remaining
+    return None, estimate, remaining
+
+
+def plan_turn(state, session_doc, chat, turn_prompt, answer):
+    """
+    Return (stage, estimate) for the next turn. Stages only move forward:
+    a session in wrap-up closes on its next turn, and a closed session
+    stays exhausted.
+    """
+    stage, estimate, remaining = _local_plan(state, session_doc, answer)
+    if stage:
+        return stage, estimate
+    try:
+        estimate = _counted_estimate(chat, turn_prompt, session_doc)
+    except Exception as e:
+        print(f"count_tokens failed, using the local estimate: {e}")
+    return _counted_stage(state, remaining, estimate), estimate
+
+
+async def plan_turn_async(state, session_doc, chat, turn_prompt, answer):
+    """plan_turn() for the event loop; the organisation usage read runs on the blocking pool."""
+    stage, estimate, remaining = await run_blocking(_local_plan, state, session_doc, answer)
+    if stage:
+        return stage, estimate
+    try:
+        estimate = await _counted_estimate_async(chat, turn_prompt, session_doc)
+    except Exception as e:
+        print(f"count_tokens failed, using the local estimate: {e}")
+    return _counted_stage(state, remaining, estimate), estimate
+
+
+def _counted_stage(state, remaining, estimate):
+    window = estimate * state["settings"]["wrap_up_turns"]
+    if remaining < estimate:
+        stage = EXHAUSTED
+    elif remaining < window:
+        stage = WRAP_UP
+    else:
+        stage = NORMAL
+    if stage != NORMAL:
+        print(f"💰 Token budget: {remaining} tokens left, next call ~{estimate} → {stage}")
+    return stage
+
+
+def stage_instruction(stage):
+    """Instruction appended to the turn prompt for the wrap-up and closing stages."""
+    if stage == WRAP_UP:
+        return PromptService.get_budget_wrap_up_prompt()
+    if stage == CLOSING:
+        return PromptService.get_budget_closing_prompt()
+    return None
@@ -0,0 +1,251 @@
+"""
+Token Ledger Module
+===================
+Per-call record of every Gemini call in the `llm_usage` time-series
+collection: input, cached and output tokens, model, latency, feature,
+organisation, scheduled interview, session and screening job.
+
+Calls never write to MongoDB themselves. `record()` appends to an
+in-process buffer and a flusher thread writes the buffer in batches
+(one insert_many for the ledger, one bulk_write for the running
+`tokens` / `cachedTokens` / savings counters on scheduled interviews and
+screening jobs). The buffer is flushed every TOKEN_LEDGER_FLUSH_SECONDS,
+as soon as it holds TOKEN_LEDGER_BATCH_SIZE records, and at exit.
+
+Interview records are tagged with their organisation at flush time
+(one lookup per batch), so callers only need the scheduled interview id.
+
+Rollups (`interview_usage`, `screening_usage`, `organization_usage`)
+aggregate the ledger per feature.
+"""
+
+import atexit
+import threading
+from datetime import datetime
+from collections import defaultdict
+
+from bson.objectid import ObjectId
+from pymongo import UpdateOne
+
+from config import (
+    TOKEN_LEDGER_FLUSH_SECONDS,
+    TOKEN_LEDGER_BATCH_SIZE,
+    llm_usage_collection,
+    scheduled_interviews_collection,
+    screening_jobs_collection
+)
+
+DEFAULT_MODEL = "gemini-2.5-flash"
+
+TOKEN_FIELDS = ("prompt_tokens", "cached_tokens", "output_tokens", "total_tokens")
+
+# Records kept when MongoDB is unreachable; older ones are dropped first
+MAX_BUFFERED = 50000
+
+_buffer = []
+_lock = threading.Lock()
+_wakeup = threading.Event()
+_flusher = None
+_org_by_interview = {}
+_stats = {"recorded": 0, "flushed": 0, "flushes": 0, "failed_flushes": 0, "dropped": 0}
+
+
+def record(feature, usage, model=DEFAULT_MODEL, latency_ms=None, organization_id=None,
+           scheduled_interview_id=None, session_id=None, screening_job_id=None, tokens_saved=0):
+    """Buffer one call's usage (a usage_from_response dict). Never raises, never blocks on MongoDB."""
+    try:
+        entry = {
+            "at": usage.get("at") or datetime.utcnow(),
+            "meta": {
+                "feature": feature,
+                "model": usage.get("model") or model,
+                "organization_id": organization_id,
+                "scheduled_interview_id": str(scheduled_interview_id) if scheduled_interview_id else None,
+                "session_id": session_id,
+                "screening_job_id": str(screening_job_id) if screening_job_id else None
+            },
+            "latency_ms": latency_ms if latency_ms is not None else usage.get("latency_ms"),
+            "tokens_saved": tokens_saved or 0,
+            "answer_tokens_saved": usage.get("answer_tokens_saved") or 0
+        }
+        for field in TOKEN_FIELDS:
+            entry[field] = usage.get(field) or 0
+        if "turn" in usage:
+            entry["turn"] = usage["turn"]
+    except Exception as e:
+        print(f"Could not record token usage for {feature}: {e}")
+        return
+
+    with _lock:
+        _buffer.append(entry)
+        _stats["recorded"] += 1
+        if len(_buffer) > MAX_BUFFERED:
+            _stats["dropped"] += len(_buffer) - MAX_BUFFERED
+            del _buffer[:len(_buffer) - MAX_BUFFERED]
+        full = len(_buffer) >= TOKEN_LEDGER_BATCH_SIZE
+    _start_flusher()
+    if full:
+        _wakeup.set()
+
+
+def _resolve_organizations(entries):
+    """Fill in organization_id for interview records from their scheduled interview (cached per process)."""
+    missing = {
+        e["meta"]["scheduled_interview_id"] for e in entries
+        if not e["meta"]["organization_id"] and e["meta"]["scheduled_interview_id"]
+        and e["meta"]["scheduled_interview_id"] not in _org_by_interview
+    }
+    object_ids = []
+    for interview_id in missing:
+        try:
+            object_ids.append(ObjectId(interview_id))
+        except Exception:
+            _org_by_interview[interview_id] = None
+    if object_ids:
+        for doc in scheduled_interviews_collection.find({"_id": {"$in": object_ids}}, {"organizationId": 1}):
+            _org_by_interview[str(doc["_id"])] = doc.get("organizationId")
+
+    for e in entries:
+        meta = e["meta"]
+        if not meta["organization_id"] and meta["scheduled_interview_id"]:
+            meta["organization_id"] = _org_by_interview.get(meta["scheduled_interview_id"])
+
+
+def _counter_updates(entries):
+    """One $inc per scheduled interview / screening job in the batch."""
+    interviews = defaultdict(lambda: defaultdict(int))
+    jobs = defaultdict(lambda: defaultdict(int))
+    for e in entries:
+        meta = e["meta"]
+        if meta["scheduled_interview_id"]:
+            counters = interviews[meta["scheduled_interview_id"]]
+            counters["tokens"] += e["total_tokens"]
+            counters["cachedTokens"] += e["cached_tokens"]
+            counters["compactionTokensSaved"] += e["tokens_saved"]
+            counters["answerTokensSaved"] += e.get("answer_tokens_saved", 0)
+        if meta["screening_job_id"]:
+            counters = jobs[meta["screening_job_id"]]
+            counters["tokens"] += e["total_tokens"]
+            counters["cachedTokens"] += e["cached_tokens"]
+
+    def updates(grouped):
+        ops = []
+        for doc_id, counters in grouped.items():
+            try:
+                ops.append(UpdateOne({"_id": ObjectId(doc_id)}, {"$inc": dict(counters)}))
+            except Exception:
+                continue
+        return ops
+
+    return updates(interviews), updates(jobs)
+
+
+def flush():
+    """Write every buffered record. Failed batches go back to the buffer for the next flush."""
+    with _lock:
+        entries = _buffer[:]
+        del _buffer[:]
+    if not entries:
+        return 0
+
+    try:
+        _resolve_organizations(entries)
+        llm_usage_collection.insert_many(entries, ordered=False)
+    except Exception as e:
+        print(f"Token ledger flush failed ({len(entries)} records kept): {e}")
+        for entry in entries:
+            entry.pop("_id", None)
+        with _lock:
+            _buffer[:0] = entries
+            _stats["failed_flushes"] += 1
+        return 0
+
+    interview_ops, job_ops = _counter_updates(entries)
+    try:
+        if interview_ops:
+            scheduled_interviews_collection.bulk_write(interview_ops, ordered=False)
+        if job_ops:
+            screening_jobs_collection.bulk_write(job_ops, ordered=False)
+    except Exception as e:
+        print(f"Token counters update failed: {e}")
+
+    with _lock:
+        _stats["flushed"] += len(entries)
+        _stats["flushes"] += 1
+    return len(entries)
+
+
+def _flush_loop():
+    while True:
+        _wakeup.wait(TOKEN_LEDGER_FLUSH_SECONDS)
+        _wakeup.clear()
+        flush()
+
+
+def _start_flusher():
+    global _flusher
+    if _flusher is not None:
+        return
+    with _lock:
+        if _flusher is None:
+            _flusher = threading.Thread(target=_flush_loop, name="token-ledger", daemon=True)
+            _flusher.start()
+            atexit.register(flush)
+
+
+def stats():
+    with _lock:
+        return {**_stats, "buffered": len(_buffer)}
+
+
+# ─── Rollups ─────────────────────────────────────────────────────────────────
+
+def _rollup(match):
+    """Totals per feature plus an overall total for ledger records matching `match`."""
+    pipeline = [
+        {"$match": match},
+        {"$group": {
+            "_id": "$meta.feature",
+            "calls": {"$sum": 1},
+            "prompt_tokens": {"$sum": "$prompt_tokens"},
+            "cached_tokens": {"$sum": "$cached_tokens"},
+            "output_tokens": {"$sum": "$output_tokens"},
+            "total_tokens": {"$sum": "$total_tokens"},
+            "tokens_saved": {"$sum": "$tokens_saved"},
+            "answer_tokens_saved": {"$sum": "$answer_tokens_saved"},
+            "avg_latency_ms": {"$avg": "$latency_ms"}
+        }},
+        {"$sort": {"total_tokens": -1}}
+    ]
+    by_feature = {}
+    total = {"calls": 0, **{field: 0 for field in TOKEN_FIELDS}, "tokens_saved": 0, "answer_tokens_saved": 0}
+    for row in llm_usage_collection.aggregate(pipeline):
+        feature = row.pop("_id") or "unknown"
+        if row["avg_latency_ms"] is not None:
+            row["avg_latency_ms"] = round(row["avg_latency_ms"])
+        by_feature[feature] = row
+        for field in total:
+            total[field] += row[field]
+    return {"total": total, "by_feature": by_feature}
+
+
+def _time_range(match, since=None, until=None):
+    if since or until:
+        match["at"] = {}
+        if since:
+            match["at"]["$gte"] = since
+        if until:
+            match["at"]["$lt"] = until
+    return match
+
+
+def interview_usage(scheduled_interview_id):
+    return _rollup({"meta.scheduled_interview_id": str(scheduled_interview_id)})
+
+
+def screening_usage(screening_job_id):
+    return _rollup({"meta.screening_job_id": str(screening_job_id)})
+
+
+def organization_usage(organization_id, since=None, until=None):
+    return _rollup(_time_range({"meta.organization_id": organization_id}, since, until))
@@ -0,0 +1,182 @@
+"""
+Turn Scoring Module
+===================
+Incremental per-answer scoring for interview sessions.
+
+When enabled, the interviewer model ends every reply to a candidate
+answer with a score trailer:
+
+  <next interviewer message>
+  <<<TURN_SCORE>>>
+  {"subject_knowledge": 4, "practical_knowledge": 3, ..., "note": "..."}
+
+The trailer is split off before the question is shown or streamed, and
+the parsed score is stored on that turn's turn-log entry. The final
+report is then aggregated locally from the stored scores, plus an
+optional short synthesis call over the compact per-turn notes, so the
+end-of-interview cost no longer grows with the interview length.
+
+Settings live on the `turn_scoring_rules` prompt document:
+
+  enabled     add the scoring rules to new sessions
+  synthesis   run the short synthesis call for strengths/improvements
+"""
+
+import json
+
+from services.prompt_service import PromptService
+
+SCORING_PROMPT = "turn_scoring_rules"
+
+SCORE_MARKER = "<<<TURN_SCORE>>>"
+
+DIMENSIONS = {
+    "subject_knowledge": "Subject Knowledge",
+    "practical_knowledge": "Practical Knowledge",
+    "aptitude": "Aptitude",
+    "communication": "Communication Skills",
+    "confidence": "Confidence Level",
+}
+
+MIN_RATING, MAX_RATING = 1, 5
+MAX_NOTE_LENGTH = 300
+
+# Points taken off the 0-100 score per proctoring violation, and at most
+VIOLATION_PENALTY = 2
+MAX_VIOLATION_PENALTY = 10
+
+DEFAULT_SETTINGS = {
+    "enabled": False,
+    "synthesis": True,
+}
+
+
+def load_settings():
+    """Turn-scoring settings of the active prompt set, or None when disabled."""
+    try:
+        settings = {**DEFAULT_SETTINGS, **PromptService.get_prompt_settings(SCORING_PROMPT)}
+    except Exception as e:
+        print(f"Could not load turn scoring settings: {e}")
+        return None
+    return settings if settings["enabled"] else None
+
+
+# ─── Reply parsing ───────────────────────────────────────────────────────────
+
+def _parse_score(text):
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end < start:
+        return None
+    try:
+        raw = json.loads(text[start:end + 1])
+    except ValueError:
+        return None
+
+    score = {}
+    for dimension in DIMENSIONS:
+        try:
+            score[dimension] = min(MAX_RATING, max(MIN_RATING, int(raw[dimension])))
+        except (KeyError, TypeError, ValueError):
+            continue
+    if not score:
+        return None
+    score["note"] = str(raw.get("note") or "")[:MAX_NOTE_LENGTH]
+    return score
+
+
+def split_reply(text):
+    """Split a model reply into (question, score); score is None if absent or unparsable."""
+    marker_at = text.find(SCORE_MARKER)
+    if marker_at == -1:
+        return text.strip(), None
+    return text[:marker_at].strip(), _parse_score(text[marker_at + len(SCORE_MARKER):])
+
+
+class ScoreTrailerFilter:
+    """
+    Streaming counterpart of split_reply: feed() returns the part of each
+    chunk that is safe to show, holding back text that could be the start
+    of the score marker.
+    """
+
+    def __init__(self):
+        self._pending = ""
+        self._done = False
+
+    def feed(self, text):
+        if self._done:
+            return ""
+        buffer = self._pending + text
+        marker_at = buffer.find(SCORE_MARKER)
+        if marker_at != -1:
+            self._done = True
+            self._pending = ""
+            return buffer[:marker_at]
+
+        keep = 0
+        for size in range(min(len(SCORE_MARKER) - 1, len(buffer)), 0, -1):
+            if SCORE_MARKER.startswith(buffer[-size:]):
+                keep = size
+                break
+        self._pending = buffer[len(buffer) - keep:] if keep else ""
+        return buffer[:len(buffer) - keep]
+
+    def flush(self):
+        text = "" if self._done else self._pending
+        self._pending = ""
+        return text
+
+
+# ─── Aggregation ─────────────────────────────────────────────────────────────
+
+def _rating_label(mean):
+    if mean >= 4.25:
+        return "Excellent"
+    if mean >= 3.5:
+        return "Good"
+    if mean >= 2.5:
+        return "Average"
+    return "Poor"
+
+
+def aggregate(turn_scores, violation_count=0):
+    """
+    Build the evaluation from per-turn scores: dimension means, a 0-100
+    score (reduced slightly for violations), verdict and rule-based
+    strengths/improvements. `turn_scores` is [{"turn": t, <dimension>: r, "note": ...}].
+    """
+    means = {}
+    for dimension in DIMENSIONS:
+        ratings = [s[dimension] for s in turn_scores if dimension in s]
+        if ratings:
+            means[dimension] = round(sum(ratings) / len(ratings), 2)
+
+    overall = sum(means.values()) / len(means)
+    score = round((overall - MIN_RATING) / (MAX_RATING - MIN_RATING) * 100)
+    score = max(0, score - min(MAX_VIOLATION_PENALTY, VIOLATION_PENALTY * violation_count))
+
+    ranked = sorted(means.items(), key=lambda item: item[1], reverse=True)
+    strengths = [f"{DIMENSIONS[d]} ({_rating_label(m).lower()}, {m}/5)" for d, m in ranked if m >= 3.5][:3]
+    improvements = [f"{DIMENSIONS[d]} ({_rating_label(m).lower()}, {m}/5)" for d, m in reversed(ranked) if m < 3.5][:3]
+
+    return {
+        "score": score,
+        "strengths": strengths or [f"{DIMENSIONS[ranked[0][0]]} was the strongest area"],
+        "improvements": improvements or [f"{DIMENSIONS[ranked[-1][0]]} has the most room to grow"],
+        "communication": _rating_label(means.get("communication", overall)),
+        "technical_depth": _rating_label((means.get("subject_knowledge", overall) + means.get("practical_knowledge", overall)) / 2),
+        "interview_verdict": _rating_label(MIN_RATING + score / 100 * (MAX_RATING - MIN_RATING)),
+        "improvement_guide": "",
+        "dimension_scores": means,
+        "turn_scores": turn_scores,
+    }
+
+
+def format_notes(turn_scores, questions):
+    """Compact per-turn lines for the synthesis prompt (turn t answers questions[t-1])."""
+    lines = []
+    for s in turn_scores:
+        ratings = ", ".join(f"{d} {s[d]}" for d in DIMENSIONS if d in s)
+        question = questions[s["turn"] - 1] if 0 < s["turn"] <= len(questions) else ""
+        lines.append(f"Q{s['turn']}: {question[:160]}\n  [{ratings}] {s.get('note', '')}")
+    return "\n".join(lines)
@@ -0,0 +1,40 @@
+from services.answer_normalizer import normalize
+
+
+def compact(answer):
+    return normalize(answer)[0]
+
+
+def test_fillers_removed():
+    assert compact("um I think uh we shipped it") == "I think we shipped it"
+    assert compact("Um, I led the team, er, for two years. Hmm, mostly backend.") == "I led the team, for two years. mostly backend."
+
+
+def test_acronyms_kept():
+    assert compact("I worked in the ER for three years.") == "I worked in the ER for three years."
+    assert compact("My GPA at UM was 3.8") == "My GPA at UM was 3.8"
+    assert compact("UM. ER. HMM.") == "UM. ER. HMM."
+
+
+def test_stutters_and_phrases_collapsed():
+    assert compact("the the design was I think I think solid") == "the design was I think solid"
+    assert compact("We had had enough of 10 10 builds") == "We had had enough of 10 10 builds"
+
+
+def test_only_adjacent_sentences_collapsed():
+    assert compact("I rewrote the parser. I rewrote the parser. It was faster.") == "I rewrote the parser. It was faster."
+    assert compact("Yes. I did that. Yes.") == "Yes. I did that. Yes."
+    assert compact("I said no. No. No.") == "I said no. No. No."
+    assert compact("It scaled well. Then traffic doubled. It scaled well.") == \
+        "It scaled well. Then traffic doubled. It scaled well."
+
+
+def test_only_fillers_keeps_original():
+    assert compact("um uh") == "um uh"
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"✅ {name}")
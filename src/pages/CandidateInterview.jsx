@@ -1,6 +1,7 @@
 import { useLocation, useNavigate } from "react-router-dom";
 import { useEffect, useState, useRef } from "react";
-import { startInterview, sendAnswer, endInterview } from "../services/api";
+import { createInterviewChannel } from "../services/interviewSocket";
+import { getEvaluationStatus } from "../services/api";
 import TypingIndicator from "../components/TypingIndicator";
 import InterviewSetup from "../components/interview/InterviewSetup";
 import SpeechToTextInput from "../components/interview/SpeechToTextInput";
@@ -9,6 +10,9 @@ import { useTextToSpeech } from "../hooks/useTextToSpeech";
 import { FaExclamationTriangle, FaVideo, FaVolumeUp, FaVolumeMute } from "react-icons/fa";
 import "./CandidateInterview.css";
 
+const EVALUATION_POLL_MS = 3000;
+const EVALUATION_POLL_LIMIT = 40; // ~2 minutes; after that the evaluation keeps running server-side
+
 export default function CandidateInterview() {
   const { state } = useLocation();
   // console.log(state)
@@ -20,6 +24,7 @@ export default function CandidateInterview() {
   const [setupData, setSetupData] = useState(null);
   const [sessionId, setSessionId] = useState(null);
   const [currentQuestion, setCurrentQuestion] = useState("");
+  const [streamingQuestion, setStreamingQuestion] = useState("");
   const [questionNumber, setQuestionNumber] = useState(0);
   const [conversationHistory, setConversationHistory] = useState([]);
   const [loading, setLoading] = useState(false);
@@ -27,15 +32,27 @@ export default function CandidateInterview() {
   const [timeLeft, setTimeLeft] = useState(state?.duration * 60 );
   const [showViolationAlert, setShowViolationAlert] = useState(false);
   const [autoSpeak, setAutoSpeak] = useState(true);
+  const [evaluation, setEvaluation] = useState(null); // { status, error } of the queued evaluation job
 
   const videoRef = useRef(null);
+  const channelRef = useRef(null);
+  if (!channelRef.current) {
+    channelRef.current = createInterviewChannel();
+  }
+
+  const addViolation = (violation) => {
+    setViolations(prev => [...prev, violation]);
+    channelRef.current.violation(violation);
+  };
+
+  useEffect(() => () => channelRef.current.close(), []);
 
   const { speak, stop, speaking } = useTextToSpeech();
 
   const { noiseLevel } = useAudioMonitor(
     setupData?.analyser,
     (violation) => {
-      setViolations(prev => [...prev, violation]);
+      addViolation(violation);
       setShowViolationAlert(true);
       setTimeout(() => setShowViolationAlert(false), 3000);
     }
@@ -59,10 +76,14 @@ export default function CandidateInterview() {
 
     if (timeLeft <= 0) {
       alert("⏱️ Time is up! Please answer faster.");
-      setViolations((v) => [...v, { type: "TIME_EXCEEDED" }]);
+      addViolation({ type: "TIME_EXCEEDED" });
       return;
     }
 
+    if (timeLeft % 10 === 0) {
+      channelRef.current.tick(timeLeft);
+    }
+
     const timer = setInterval(() => {
       setTimeLeft((t) => t - 1);
     }, 1000);
@@ -75,10 +96,7 @@ export default function CandidateInterview() {
   const handleVisibilityChange = () => {
     if (document.hidden) {
       console.log("Tab is now hidden (User switched tabs)");
-      setViolations((prev) => [
-        ...prev,
-        { type: "TAB_SWITCH", time: new Date().toISOString() }
-      ]);
+      addViolation({ type: "TAB_SWITCH", time: new Date().toISOString() });
     } else {
       console.log("Tab is now visible (User came back)");
     }
@@ -95,10 +113,7 @@ export default function CandidateInterview() {
   // Track tab switches
   useEffect(() => {
     const handleBlur = () => {
-      setViolations((prev) => [
-        ...prev,
-        { type: "TAB_SWITCH", time: new Date().toISOString() }
-      ]);
+      addViolation({ type: "TAB_SWITCH", time: new Date().toISOString() });
       console.log("Tab switch detected");
       // alert("⚠️ Please do not switch tabs during the interview.");
     };
@@ -118,7 +133,7 @@ export default function CandidateInterview() {
     async function init() {
       setLoading(true);
       try {
-        const res = await startInterview(state);
+        const res = await channelRef.current.start(state);
         console.log(res)
         setSessionId(res.session_id);
         setCurrentQuestion(res.question);
@@ -162,12 +177,25 @@ export default function CandidateInterview() {
     ]);
 
     try {
-      const res = await sendAnswer({
+      const payload = {
         session_id: sessionId,
         scheduledInterviewId: state?.scheduledInterviewId,
         answer: answer,
-        timeRemaining : timeLeft
-      });
+        timeRemaining : timeLeft,
+        // Retries of this answer (socket drop, REST fallback) reuse the key,
+        // so the backend replays the turn instead of generating it twice
+        turn_index: questionNumber,
+        idempotency_key: crypto.randomUUID()
+      };
+
+      let res;
+      try {
+        res = await channelRef.current.answer(payload, (text) => {
+          setStreamingQuestion(prev => prev + text);
+        });
+      } finally {
+        setStreamingQuestion("");
+      }
 
       if (res.question) {
         setQuestionNumber(prev => prev + 1);
@@ -195,6 +223,23 @@ export default function CandidateInterview() {
     }
   };
 
+  // Polls the evaluation job queued by end-interview; resolves with its final (or last seen) status
+  const waitForEvaluation = async (jobId) => {
+    let status = "queued";
+    for (let i = 0; i < EVALUATION_POLL_LIMIT; i++) {
+      try {
+        const job = await getEvaluationStatus(jobId);
+        status = job.status;
+        setEvaluation({ status: job.status, error: job.error });
+        if (status === "done" || status === "failed") break;
+      } catch (error) {
+        console.error("Error checking evaluation status:", error);
+      }
+      await new Promise(resolve => setTimeout(resolve, EVALUATION_POLL_MS));
+    }
+    return status;
+  };
+
   const finishInterview = async () => {
     if (!window.confirm("Are you sure you want to end the interview?")) {
       return;
@@ -204,7 +249,7 @@ export default function CandidateInterview() {
     setLoading(true);
     
     try {
-      const res = await endInterview({
+      const res = await channelRef.current.end({
         session_id: sessionId,
         violations,
         credentialId: state?.credentialId,
@@ -217,6 +262,13 @@ export default function CandidateInterview() {
       if (setupData?.audioContext) {
         setupData.audioContext.close();
       }
+
+      if (res?.job_id) {
+        setEvaluation({ status: res.status || "queued" });
+        if (await waitForEvaluation(res.job_id) === "failed") {
+          return; // Leave the failure on screen; the candidate continues from there
+        }
+      }
       
       navigate("/dashboard");
     } catch (error) {
@@ -253,6 +305,25 @@ export default function CandidateInterview() {
         </div>
       )}
 
+      {evaluation && (
+        <div className={`evaluation-status ${evaluation.status === "failed" ? "failed" : ""}`}>
+          {evaluation.status === "failed" ? (
+            <>
+              <FaExclamationTriangle />
+              <span>
+                Your interview was submitted, but its evaluation failed
+                {evaluation.error ? `: ${evaluation.error}.` : "."} Please contact your recruiter.
+              </span>
+              <button className="btn btn-secondary" onClick={() => navigate("/dashboard")}>
+                Go to Dashboard
+              </button>
+            </>
+          ) : (
+            <span>Interview submitted. Evaluating your answers ({evaluation.status})...</span>
+          )}
+        </div>
+      )}
+
       <div className="interview-layout">
         <div className="interview-sidebar">
           <div className="video-monitor">
@@ -341,7 +412,7 @@ export default function CandidateInterview() {
               </div>
               <div className="question-text">
                 {loading ? (
-                  <TypingIndicator />
+                  streamingQuestion ? <p>{streamingQuestion}</p> : <TypingIndicator />
                 ) : (
                   <p>{currentQuestion}</p>
                 )}
@@ -26,6 +26,59 @@ function authHeaders() {
 //   return res.json();
 // }
 
+// Streams the next question as server-sent events. onDelta receives each text chunk;
+// resolves with { question } once the backend has stored the turn.
+export async function sendAnswerStream(payload, onDelta) {
+  const token = getToken();
+  if (!token) {
+    throw new Error("Not authenticated. Please login first.");
+  }
+
+  const res = await fetch(`${backendURL}/interview/next-question/stream`, {
+    method: "POST",
+    headers: authHeaders(),
+    body: JSON.stringify(payload),
+  });
+
+  if (res.status === 401) {
+    throw new Error("Session expired. Please login again.");
+  }
+
+  if (!res.ok || !res.body) {
+    throw new Error(`Failed to send answer: ${res.statusText}`);
+  }
+
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    let boundary;
+    while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+      const rawEvent = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+
+      const dataLine = rawEvent.split("\n").find((line) => line.startsWith("data: "));
+      if (!dataLine) continue;
+      const event = JSON.parse(dataLine.slice(6));
+
+      if (event.type === "delta") {
+        onDelta?.(event.text);
+      } else if (event.type === "done") {
+        return { question: event.question };
+      } else if (event.type === "error") {
+        throw new Error(event.error);
+      }
+    }
+  }
+
+  throw new Error("Failed to send answer: stream ended unexpectedly");
+}
+
 // export async function endInterview(payload) {
 //   const res = await fetch(`${backendURL}/end-interview`, {
 //     method: "POST",
@@ -104,6 +157,45 @@ export async function endInterview(payload) {
   return res.json();
 }
 
+// Proctoring events are batched by the interview channel; this is its fallback without a WebSocket
+export async function sendProctoringEvents(payload) {
+  const res = await fetch(`${backendURL}/interview/proctoring/events`, {
+    method: "POST",
+    headers: authHeaders(),
+    body: JSON.stringify(payload),
+    keepalive: true,
+  });
+
+  if (!res.ok) {
+    throw new Error(`Failed to send proctoring events: ${res.statusText}`);
+  }
+
+  return res.json();
+}
+
+// Evaluations run in the background after endInterview; poll until status is "done" or "failed"
+export async function getEvaluationStatus(jobId) {
+  const token = getToken();
+  if (!token) {
+    throw new Error("Not authenticated. Please login first.");
+  }
+
+  const res = await fetch(`${backendURL}/interview/evaluation-status/${jobId}`, {
+    method: "GET",
+    headers: authHeaders(),
+  });
+
+  if (res.status === 401) {
+    throw new Error("Session expired. Please login again.");
+  }
+
+  if (!res.ok) {
+    throw new Error(`Failed to fetch evaluation status: ${res.statusText}`);
+  }
+
+  return res.json();
+}
+
 // Mock Interview API functions
 export async function createMockInterview(payload) {
   const res = await fetch(`${backendURL}/mock-interview/create`, {
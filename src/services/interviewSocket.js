@@ -0,0 +1,208 @@
+import { getToken } from "./token";
+import { backendURL } from "../pages/Home";
+import { startInterview, sendAnswer, sendAnswerStream, endInterview, sendProctoringEvents } from "./api";
+
+// One WebSocket for the whole candidate interview (questions, answers,
+// timer ticks and proctoring events). Every call falls back to the REST
+// endpoints when the socket can't be opened or drops mid-interview.
+
+const CONNECT_TIMEOUT_MS = 5000;
+// Proctoring events are sent in batches at most this often
+const VIOLATION_FLUSH_MS = 1000;
+
+function socketURL() {
+  // The token goes in the first frame, never the URL (access logs and proxies record URLs)
+  return `${backendURL.replace(/^http/, "ws")}/interview/ws`;
+}
+
+function closedError(message = "Interview connection closed") {
+  const error = new Error(message);
+  error.socketClosed = true;
+  return error;
+}
+
+export function createInterviewChannel() {
+  let socket = null;
+  let pending = null; // { resolve, reject, onDelta } of the request in flight
+  let sessionId = null;
+  let scheduledInterviewId = null;
+  let violations = []; // proctoring events not sent yet
+  let violationTimer = null;
+
+  function settle(callback, value) {
+    const request = pending;
+    pending = null;
+    request?.[callback](value);
+  }
+
+  function handleMessage(message) {
+    const event = JSON.parse(message.data);
+    if (event.type === "delta") {
+      pending?.onDelta?.(event.text);
+    } else if (event.type === "question") {
+      settle("resolve", { session_id: event.session_id, question: event.question });
+    } else if (event.type === "queued") {
+      settle("resolve", { status: "queued", job_id: event.job_id, session_id: event.session_id });
+    } else if (event.type === "error") {
+      // "fallback": the server failed and closes the socket; continue over REST
+      settle("reject", event.fallback ? closedError(event.error) : new Error(event.error));
+    }
+  }
+
+  function handleClose() {
+    socket = null;
+    settle("reject", closedError());
+  }
+
+  function connect() {
+    return new Promise((resolve) => {
+      if (!getToken() || typeof WebSocket === "undefined") {
+        resolve(null);
+        return;
+      }
+
+      const ws = new WebSocket(socketURL());
+      const timer = setTimeout(() => {
+        ws.close();
+        resolve(null);
+      }, CONNECT_TIMEOUT_MS);
+
+      ws.onopen = () => {
+        ws.send(JSON.stringify({ type: "auth", token: getToken() }));
+      };
+      ws.onmessage = (message) => {
+        const event = JSON.parse(message.data);
+        clearTimeout(timer);
+        if (event.type === "ready") {
+          ws.onmessage = handleMessage;
+          resolve(ws);
+        } else {
+          ws.close();
+          resolve(null);
+        }
+      };
+      ws.onerror = () => {
+        clearTimeout(timer);
+        resolve(null);
+      };
+      ws.onclose = () => {
+        clearTimeout(timer);
+        if (socket === ws) handleClose();
+        resolve(null);
+      };
+    });
+  }
+
+  function request(frame, onDelta) {
+    return new Promise((resolve, reject) => {
+      pending = { resolve, reject, onDelta };
+      socket.send(JSON.stringify(frame));
+    });
+  }
+
+  function send(frame) {
+    if (socket?.readyState === WebSocket.OPEN) {
+      socket.send(JSON.stringify(frame));
+    }
+  }
+
+  function flushViolations() {
+    clearTimeout(violationTimer);
+    violationTimer = null;
+    if (!violations.length || !sessionId) return;
+
+    const batch = violations;
+    violations = [];
+    if (socket?.readyState === WebSocket.OPEN) {
+      send({ type: "violation", violations: batch });
+      return;
+    }
+    sendProctoringEvents({ session_id: sessionId, scheduledInterviewId, events: batch }).catch(() => {
+      violations = batch.concat(violations);
+    });
+  }
+
+  return {
+    // Resolves with { session_id, question }
+    async start(payload) {
+      scheduledInterviewId = payload.scheduledInterviewId;
+      socket = await connect();
+      let res = null;
+      if (socket) {
+        try {
+          res = await request({ type: "start", config: payload });
+        } catch (error) {
+          if (!error.socketClosed) throw error;
+        }
+      }
+      res = res || (await startInterview(payload));
+      sessionId = res.session_id;
+      flushViolations();
+      return res;
+    },
+
+    // Resolves with { question }; onDelta receives streamed question text
+    async answer(payload, onDelta) {
+      let receivedDelta = false;
+      const handleDelta = (text) => {
+        receivedDelta = true;
+        onDelta?.(text);
+      };
+
+      if (socket) {
+        try {
+          return await request(
+            {
+              type: "answer",
+              answer: payload.answer,
+              timeRemaining: payload.timeRemaining,
+              turn_index: payload.turn_index,
+              idempotency_key: payload.idempotency_key,
+            },
+            handleDelta
+          );
+        } catch (error) {
+          // The turn was already generated server-side; don't submit it twice
+          if (!error.socketClosed || receivedDelta) throw error;
+        }
+      }
+
+      try {
+        return await sendAnswerStream(payload, handleDelta);
+      } catch (streamError) {
+        // Fall back to the plain endpoint only if nothing was streamed yet
+        if (receivedDelta || streamError.message.includes("expired")) throw streamError;
+        return sendAnswer(payload);
+      }
+    },
+
+    tick(timeRemaining) {
+      send({ type: "tick", timeRemaining });
+    },
+
+    violation(violation) {
+      violations.push({ ...violation, time: violation.time || new Date().toISOString() });
+      if (!violationTimer) violationTimer = setTimeout(flushViolations, VIOLATION_FLUSH_MS);
+    },
+
+    // Resolves with { status: "queued", job_id }; the evaluation runs in the background
+    async end(payload) {
+      flushViolations();
+      if (socket) {
+        try {
+          return await request({ type: "end" });
+        } catch (error) {
+          if (!error.socketClosed) throw error;
+        }
+      }
+      return endInterview(payload);
+    },
+
+    close() {
+      flushViolations();
+      const ws = socket;
+      socket = null;
+      ws?.close();
+    },
+  };
+}